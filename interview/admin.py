@@ -1,17 +1,32 @@
 import csv
+import hashlib
 import logging
 
+from django.conf import settings
 from django.contrib import admin
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied, ValidationError
 from django.utils import timezone, dateformat
-from django.http import HttpResponse
-from django.db.models import Q
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.db import transaction
 from django.contrib import messages
+from django.urls import path, reverse
+from django.template.defaultfilters import linebreaksbr
+from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
-from interview.models import Candidate
+from interview.models import (
+    FIRST_INTERVIEW_RESULT_TYPE, FUNNEL_STAGES, INTERVIEW_RESULT_TYPE, Candidate, DingtalkNotification,
+    DuplicateCandidate, ExportJob, FunnelStat)
 from interview import candidate_field as cf
-from interview.dingtalk import send
-from jobs.models import Resume
+from interview import analytics, dedup, interviewers, ranking
+from interview.exports import resumable, run_in_background
+from interview.outbox import enqueue, wake_worker
+from interview.pagination import KeysetChangeList
+from interview.roles import filter_visible_candidates, get_role
+from interview.search import FullTextSearchAdminMixin
+from interview.services import assign_interviewers
 
 logger = logging.getLogger(__name__)
 
@@ -19,71 +34,95 @@ exportable_fields = (
     'username', 'city', 'phone', 'bachelor_school', 'master_school', 'degree', 'first_result', 'first_interviewer_user',
     'second_result', 'second_interviewer_user', 'hr_result', 'hr_score', 'hr_remark', 'hr_interviewer_user')
 
-
-def get_group_names(user):
-    """
-    获取当前用户的所有的组
-    """
-    group_names = []
-    group_names.extend(user.groups.values_list('name', flat=True))
-    return group_names
+# 导出时服务端游标每次读取的行数
+EXPORT_CHUNK_SIZE = 2000
 
 
 # 通知一面面试官面试
 def notify_interviewer(model_admin, request, queryset):
     """
     动作菜单，通知对应面试官
+    通知写入发件箱后立即返回，由后台 worker 投递
     """
-    candidates = '、'.join([getattr(rec, 'username', '') for rec in queryset])
-    interviewers = '、'.join(
-        list(
-            set(
-                [
-                    getattr(rec, 'first_interviewer_user', None) and
-                    getattr(rec, 'first_interviewer_user').username or ''
-                    for rec in queryset
-                ]
-            )
-        )
-    )
-    send("候选人 %s 进入面试环节，亲爱的面试官，请准备好面试： %s" % (candidates, interviewers))
-    messages.add_message(request, messages.INFO, '已经成功发送面试通知')
+    rows = list(queryset.values_list('username', 'first_interviewer_user__username'))
+    candidates = '、'.join([username for username, _ in rows])
+    interviewers = '、'.join(set([interviewer or '' for _, interviewer in rows]))
+    enqueue("候选人 %s 进入面试环节，亲爱的面试官，请准备好面试： %s" % (candidates, interviewers))
+    messages.add_message(request, messages.INFO, '面试通知已加入发送队列')
 
 
 notify_interviewer.short_description = '通知一面面试官'
 notify_interviewer.allowed_permissions = ('notify', )
 
 
+def assign_interviewers_action(stage):
+    """
+    动作菜单，按面试官负载和所在城市批量分配面试官
+    """
+    def action(model_admin, request, queryset):
+        assigned, unassigned = assign_interviewers(queryset, stage)
+        messages.add_message(request, messages.INFO, '已为 %s 位候选人分配面试官' % assigned)
+        if unassigned:
+            messages.add_message(request, messages.WARNING,
+                                 '%s 位候选人没有分配：面试官的待面试人数都已达到上限' % unassigned)
+
+    action.__name__ = 'assign_%s_interviewers' % stage
+    action.short_description = '自动分配%s面试官' % ('一面' if stage == 'first' else '二面')
+    action.allowed_permissions = ('assign', )
+    return action
+
+
+assign_first_interviewers = assign_interviewers_action('first')
+assign_second_interviewers = assign_interviewers_action('second')
+
+
+class Echo:
+    """
+    只实现 write 的伪文件对象，csv.writer 写入后直接返回该行内容，供流式响应逐行输出
+    """
+
+    def write(self, value):
+        return value
+
+
+def get_export_columns(model, field_list=exportable_fields):
+    """
+    导出列的元数据，每次导出只解析一次
+    返回 (表头, values_list 查询字段)，外键字段直接关联取面试官用户名
+    """
+    headers, columns = [], []
+    for field in field_list:
+        field_object = model._meta.get_field(field)
+        headers.append(field_object.verbose_name.title())
+        columns.append('%s__username' % field if field_object.is_relation else field)
+    return headers, columns
+
+
 def export_model_as_csv(model_admin, request, queryset):
     """
     导出数据，并会添加到动作中
+    使用流式响应逐行输出，只查询导出字段，服务端游标分批读取，内存占用不随导出行数增长
     """
-    response = HttpResponse(content_type='text/csv')
-    field_list = exportable_fields
+    headers, columns = get_export_columns(queryset.model)
+    # 流式响应在请求处理完之后才读取数据，先确定使用的数据库（读写分离时为从库）
+    rows = queryset.using(queryset.db).values_list(*columns).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    writer = csv.writer(Echo())
+    username = request.user.username
+
+    def stream():
+        # 写入表头
+        yield writer.writerow(headers)
+        count = 0
+        for row in rows:
+            count += 1
+            yield writer.writerow(row)
+        logger.error(" %s has exported %s candidate records" % (username, count))
+
+    response = StreamingHttpResponse(stream(), content_type='text/csv')
     response['Content-Disposition'] = 'attachment; filename=%s-list-%s.csv' % (
         'recruitment-candidates',
         dateformat.DateFormat(timezone.now()).format('Ymd'),
     )
-    # 写入表头
-    writer = csv.writer(response)
-    writer.writerow(
-        [
-            queryset.model._mseta.get_field(f).verbose_name.title()
-            for f in field_list
-        ],
-    )
-    for obj in queryset:
-        # 单行 的记录（各个字段的值）， 根据字段对象，从当前实例 (obj) 中获取字段值
-        csv_line_values = []
-        for field in field_list:
-            # 确认字段属于该模型
-            field_object = queryset.model._meta.get_field(field)
-            # 取值
-            field_value = field_object.value_from_object(obj)
-            csv_line_values.append(field_value)
-        writer.writerow(csv_line_values)
-    logger.error(" %s has exported %s candidate records" % (request.user.username, len(queryset)))
-
     return response
 
 
@@ -97,50 +136,83 @@ def get_list_editable(request):
     通过用户来控制行内编辑的权限
     只有hr可以行内编辑面试官
     """
-    group_names = get_group_names(request.user)
-
-    if request.user.is_superuser or 'hr' in group_names:
+    if get_role(request).sees_all_candidates:
         return 'first_interviewer_user', 'second_interviewer_user'
     return ()
 
 
-class CandidateAdmin(admin.ModelAdmin):
+class CandidateAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     # 自定义动作
-    actions = (export_model_as_csv, notify_interviewer, )
+    actions = (export_model_as_csv, notify_interviewer, assign_first_interviewers, assign_second_interviewers, )
+    # 面试官字段只限制新选择的用户，见 interview.interviewers.InterviewerForm
+    form = interviewers.InterviewerForm
     # 不展示的字段
     exclude = ('creator', 'created_date', 'modified_date')
     # 要展示的字段
     list_display = (
-        'username', 'city', 'bachelor_school', 'get_resume', 'first_score', 'first_result', 'first_interviewer_user', 'second_score',
+        'username', 'city', 'bachelor_school', 'get_resume', 'composite_score', 'first_score', 'first_result', 'first_interviewer_user', 'second_score',
         'second_result', 'second_interviewer_user', 'hr_score', 'hr_result', 'hr_interviewer_user')
-    # 右侧筛选条件
+    # 右侧筛选条件，面试官只列出该列中出现过的用户
     list_filter = (
-        'city', 'first_result', 'second_result', 'hr_result', 'first_interviewer_user', 'second_interviewer_user',
-        'hr_interviewer_user')
-    # 查询字段
+        'city', 'first_result', 'second_result', 'hr_result',
+        ('first_interviewer_user', interviewers.InterviewerListFilter),
+        ('second_interviewer_user', interviewers.InterviewerListFilter),
+        ('hr_interviewer_user', interviewers.InterviewerListFilter))
+    # 查询字段，支持全文索引时使用 interview.search 的索引
     search_fields = ('username', 'phone', 'email', 'bachelor_school')
     # 默认排序
     ordering = ('hr_result', 'second_result', 'first_result',)
+    # 游标分页时不再额外统计未筛选的总数
+    show_full_result_count = not settings.CANDIDATE_KEYSET_PAGINATION
+
+    def get_changelist(self, request, **kwargs):
+        """
+        候选人数据量大，默认使用游标分页，见 interview.pagination
+        """
+        if settings.CANDIDATE_KEYSET_PAGINATION:
+            return KeysetChangeList
+        return super().get_changelist(request, **kwargs)
+
+    def get_changelist_form(self, request, **kwargs):
+        # 行内编辑同样使用 InterviewerForm
+        kwargs.setdefault('form', self.form)
+        return super().get_changelist_form(request, **kwargs)
 
     # 当前用户是否有导出权限
     def has_export_permission(self, request):
-        return request.user.has_perm(f'{self.opts.app_label}.{"export"}')
+        return get_role(request).has_perm(f'{self.opts.app_label}.{"export"}')
 
-    # 当前用户是否有导出权限
+    # 当前用户是否有通知权限
     def has_notify_permission(self, request):
-        return request.user.has_perm(f'{self.opts.app_label}.{"notify"}')
+        return get_role(request).has_perm(f'{self.opts.app_label}.{"notify"}')
+
+    # 只有 hr 可以分配面试官，与行内编辑面试官的权限一致
+    def has_assign_permission(self, request):
+        return get_role(request).sees_all_candidates
 
     def get_resume(self, obj):
-        if not obj.phone:
+        # 直接使用候选人的简历外键，不再查询简历表
+        if not obj.resume_id:
             return ""
-        resumes = Resume.objects.filter(phone=obj.phone).order_by('-modified_date')
-        if resumes and len(resumes) > 0:
-            return mark_safe(u'<a href="/resume/%s" target="_blank">%s</a>' % (resumes[0].id, "查看简历"))
-        return ""
+        return mark_safe(u'<a href="/resume/%s" target="_blank">%s</a>' % (obj.resume_id, "查看简历"))
 
     get_resume.short_description = '查看简历'
     get_resume.allow_tags = True
 
+    def get_resume_content(self, obj):
+        """
+        详情页展示简历内容，简历由 get_object 的 select_related 一起查询
+        """
+        resume = obj.resume
+        if resume is None:
+            return ""
+        return format_html(
+            '{}<br><br><b>自我介绍</b><br>{}<br><br><b>工作经历</b><br>{}<br><br><b>项目经历</b><br>{}',
+            self.get_resume(obj), linebreaksbr(resume.candidate_introduction), linebreaksbr(resume.work_experience),
+            linebreaksbr(resume.project_experience))
+
+    get_resume_content.short_description = '简历'
+
     def get_fieldsets(self, request, obj=None):
         """
         权限控制： fieldsets
@@ -148,27 +220,119 @@ class CandidateAdmin(admin.ModelAdmin):
         二面可以看到基础+一面+二面的信息
         hr可以看到基础+一面+二面+hr的信息
         """
-        group_names = get_group_names(request.user)
-
-        if 'interviewer' in group_names and obj.first_interviewer_user == request.user:
-            return cf.default_fieldsets_first
-        elif 'interviewer' in group_names and obj.second_interviewer_user == request.user:
-            return cf.default_fieldsets_second
-        else:
-            return cf.default_fieldsets
+        fieldsets = cf.fieldsets_for(get_role(request), request.user.pk, obj)
+        if obj and obj.resume_id:
+            fieldsets = fieldsets + cf.resume_fieldsets
+        return fieldsets
 
     def get_queryset(self, request):
         """
         数据集权限
         出了admin和hr组，其他的人，一面和二面是当前用户的才能看到
         """
-        user = request.user
-        queryset = super().get_queryset(request)
-        group_names = get_group_names(user)
+        return filter_visible_candidates(super().get_queryset(request), request)
+
+    def get_object(self, request, object_id, from_field=None):
+        """
+        详情页和简历内容一次查询取出
+        """
+        queryset = self.get_queryset(request).select_related('resume')
+        field = self.model._meta.pk if from_field is None else self.model._meta.get_field(from_field)
+        try:
+            return queryset.get(**{field.name: field.to_python(object_id)})
+        except (self.model.DoesNotExist, ValidationError, ValueError):
+            return None
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        """
+        面试官字段只能选择 interviewer / hr 组的用户，使用自动补全控件，见 interview.interviewers
+        """
+        if db_field.name in interviewers.INTERVIEWER_FIELDS:
+            choices = interviewers.get_choices(request)
+            kwargs['form_class'] = interviewers.InterviewerChoiceField
+            kwargs['interviewer_choices'] = choices
+            kwargs['queryset'] = interviewers.interviewer_queryset()
+            kwargs['widget'] = interviewers.InterviewerAutocompleteSelect(
+                db_field.remote_field, self.admin_site, interviewer_choices=choices)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_urls(self):
+        urls = [
+            path('interviewer-autocomplete/', self.admin_site.admin_view(self.interviewer_autocomplete_view),
+                 name='interview_candidate_interviewer_autocomplete'),
+            path('analytics/', self.admin_site.admin_view(self.analytics_view), name='interview_candidate_analytics'),
+            path('shortlist/', self.admin_site.admin_view(self.shortlist_view), name='interview_candidate_shortlist'),
+        ]
+        return urls + super().get_urls()
+
+    def interviewer_autocomplete_view(self, request):
+        # 只有可以修改面试官的 hr 使用
+        if not get_role(request).sees_all_candidates:
+            raise PermissionDenied
+        return interviewers.autocomplete_view(request)
+
+    def analytics_view(self, request):
+        """
+        面试打分分析报表，只有 hr 可以查看，按 城市、应聘职位 筛选，结果缓存 ANALYTICS_CACHE_TIMEOUT 秒
+        """
+        if not get_role(request).sees_all_candidates:
+            raise PermissionDenied
+        city = request.GET.get('city', '')
+        apply_position = request.GET.get('apply_position', '')
+        key = 'recruitment:analytics:%s' % hashlib.md5(('%s|%s' % (city, apply_position)).encode()).hexdigest()
+        data = cache.get(key)
+        if data is None:
+            queryset = Candidate.objects.all()
+            if city:
+                queryset = queryset.filter(city=city)
+            if apply_position:
+                queryset = queryset.filter(apply_position=apply_position)
+            data = analytics.report(queryset)
+            cache.set(key, data, settings.ANALYTICS_CACHE_TIMEOUT)
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.model._meta,
+            title='面试打分分析',
+            city=city,
+            apply_position=apply_position,
+            cities=FunnelStat.objects.values_list('city', flat=True).distinct().order_by('city'),
+            positions=FunnelStat.objects.values_list('apply_position', flat=True).distinct().order_by('apply_position'),
+            report=data,
+        )
+        return TemplateResponse(request, 'admin/interview/analytics.html', context)
+
+    def shortlist_view(self, request):
+        """
+        某职位某城市综合得分最高的前 K 名候选人，使用 candidate_rank_idx 索引，不对整张表排序
+        面试官只能看到自己面试的候选人
+        """
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+        apply_position = request.GET.get('apply_position', '')
+        city = request.GET.get('city', '')
+        try:
+            limit = min(max(int(request.GET.get('limit', ranking.TOP_K)), 1), ranking.MAX_TOP_K)
+        except ValueError:
+            limit = ranking.TOP_K
+        candidates = None
+        if city:
+            candidates = ranking.top_candidates(self.get_queryset(request), apply_position, city, limit)
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.model._meta,
+            title='综合排名',
+            city=city,
+            apply_position=apply_position,
+            limit=limit,
+            cities=FunnelStat.objects.values_list('city', flat=True).distinct().order_by('city'),
+            positions=FunnelStat.objects.values_list('apply_position', flat=True).distinct().order_by('apply_position'),
+            candidates=candidates,
+        )
+        return TemplateResponse(request, 'admin/interview/shortlist.html', context)
 
-        if user.is_superuser or 'hr' in group_names:
-            return queryset
-        return queryset.filter(Q(first_interviewer_user=user) | Q(second_interviewer_user=user))
+    def changelist_view(self, request, extra_context=None):
+        extra_context = dict(extra_context or {}, show_analytics=get_role(request).sees_all_candidates)
+        return super().changelist_view(request, extra_context)
 
     # 全局的，达不到效果
     # list_editable = ('first_interviewer_user', 'second_interviewer_user',)
@@ -186,13 +350,11 @@ class CandidateAdmin(admin.ModelAdmin):
         重写获取只读字段逻辑
         如果在interviewer组里面，则一面面试官和二面面试官字段只读
         """
-        group_names = get_group_names(request.user)
-
-        readonly_fields = ()
+        readonly_fields = ('get_resume_content', 'composite_score', 'first_score_calibrated', 'second_score_calibrated')
 
-        if 'interviewer' in group_names:
+        if get_role(request).is_interviewer:
             logger.info("interviewer is in user's group for %s" % request.user.username)
-            readonly_fields = ('first_interviewer_user', 'second_interviewer_user',)
+            readonly_fields += ('first_interviewer_user', 'second_interviewer_user',)
         return readonly_fields
 
     def save_model(self, request, obj, form, change):
@@ -206,4 +368,208 @@ class CandidateAdmin(admin.ModelAdmin):
         return super().save_model(request, obj, form, change)
 
 
+def retry_notification(model_admin, request, queryset):
+    """
+    重新投递发送失败的通知
+    """
+    count = queryset.exclude(status='sent').update(status='pending', attempts=0, next_attempt_at=timezone.now())
+    wake_worker()
+    messages.add_message(request, messages.INFO, '%s 条通知已重新加入发送队列' % count)
+
+
+retry_notification.short_description = '重新发送'
+
+
+class DingtalkNotificationAdmin(admin.ModelAdmin):
+    actions = (retry_notification, )
+    list_display = ('message', 'status', 'attempts', 'next_attempt_at', 'created_date', 'sent_date')
+    list_filter = ('status', )
+    readonly_fields = ('status', 'attempts', 'next_attempt_at', 'last_error', 'created_date', 'sent_date')
+
+    def has_add_permission(self, request):
+        return False
+
+
+class FunnelStatAdmin(admin.ModelAdmin):
+    """
+    招聘漏斗看板，只读，数据来自增量维护的汇总表，与候选人数量无关
+    """
+
+    # 每一轮展示的结果列
+    stage_results = {
+        'first': [value for value, _ in FIRST_INTERVIEW_RESULT_TYPE] + [''],
+        'second': [value for value, _ in INTERVIEW_RESULT_TYPE] + [''],
+        'hr': [value for value, _ in INTERVIEW_RESULT_TYPE] + [''],
+    }
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        city = request.GET.get('city', '')
+        apply_position = request.GET.get('apply_position', '')
+        stats = FunnelStat.objects.all()
+        if city:
+            stats = stats.filter(city=city)
+        if apply_position:
+            stats = stats.filter(apply_position=apply_position)
+
+        columns = [(stage, self.stage_results[stage]) for stage, _ in FUNNEL_STAGES]
+        counts = {}
+        for stat in stats.values_list('city', 'apply_position', 'stage', 'result', 'count'):
+            counts.setdefault(stat[:2], {})[stat[2:4]] = stat[4]
+        rows = [
+            {
+                'city': key[0],
+                'apply_position': key[1],
+                'counts': [values.get((stage, result), 0) for stage, results in columns for result in results],
+            }
+            for key, values in sorted(counts.items())
+        ]
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.model._meta,
+            title='招聘漏斗',
+            city=city,
+            apply_position=apply_position,
+            cities=FunnelStat.objects.values_list('city', flat=True).distinct().order_by('city'),
+            positions=FunnelStat.objects.values_list('apply_position', flat=True).distinct().order_by('apply_position'),
+            columns=[(dict(FUNNEL_STAGES)[stage], results) for stage, results in columns],
+            rows=rows,
+        )
+        context.update(extra_context or {})
+        return TemplateResponse(request, 'admin/interview/funnel.html', context)
+
+
+def run_export_job(model_admin, request, queryset):
+    """
+    在后台执行（或从断点继续）等待中、失败和心跳超时的导出任务
+    """
+    job_ids = list(queryset.filter(resumable()).values_list('pk', flat=True))
+    for job_id in job_ids:
+        run_in_background(job_id)
+    messages.add_message(request, messages.INFO, '%s 个导出任务已开始执行' % len(job_ids))
+
+
+run_export_job.short_description = '执行 / 继续导出'
+
+
+class ExportJobAdmin(admin.ModelAdmin):
+    """
+    候选人导出任务，保存后在后台执行，列表页查看进度
+    """
+    actions = (run_export_job, )
+    list_display = ('id', 'mode', 'format', 'status', 'rows_written', 'chunk_count', 'watermark_from', 'watermark_to',
+                    'created_by', 'created_date', 'finished_date')
+    list_filter = ('status', 'mode')
+    progress_fields = ('status', 'output_dir', 'watermark_from', 'watermark_to', 'cursor_modified_date', 'cursor_id',
+                       'chunk_count', 'rows_written', 'error', 'created_by', 'created_date', 'started_date',
+                       'heartbeat_date', 'finished_date')
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is None:
+            return ()
+        return ('format', 'mode') + self.progress_fields
+
+    def get_fields(self, request, obj=None):
+        if obj is None:
+            return 'mode', 'format'
+        return ('mode', 'format') + self.progress_fields
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            # 已创建的任务只能通过动作执行或继续
+            return
+        obj.created_by = request.user.username
+        super().save_model(request, obj, form, change)
+        transaction.on_commit(lambda: run_in_background(obj.pk))
+        messages.add_message(request, messages.INFO, '导出任务已在后台开始执行')
+
+
+def merge_duplicates(model_admin, request, queryset):
+    """
+    批量合并，按相似度从高到低处理，已经被合并掉的记录对跳过
+    """
+    count = 0
+    for pair_id in queryset.filter(status='pending').order_by('-score').values_list('pk', flat=True):
+        pair = DuplicateCandidate.objects.filter(pk=pair_id, status='pending').exclude(duplicate=None).first()
+        if pair is not None:
+            dedup.merge(pair, request.user.username)
+            count += 1
+    messages.add_message(request, messages.INFO, '已合并 %s 对重复候选人' % count)
+
+
+merge_duplicates.short_description = '合并到较早创建的候选人'
+merge_duplicates.allowed_permissions = ('change', )
+
+
+def ignore_duplicates(model_admin, request, queryset):
+    count = dedup.ignore(queryset, request.user.username)
+    messages.add_message(request, messages.INFO, '%s 对标记为不是重复' % count)
+
+
+ignore_duplicates.short_description = '标记为不是重复'
+ignore_duplicates.allowed_permissions = ('change', )
+
+
+class DuplicateCandidateAdmin(admin.ModelAdmin):
+    """
+    疑似重复候选人的确认页面，详情页并排对比两条记录，可以合并或者忽略
+    """
+    actions = (merge_duplicates, ignore_duplicates)
+    list_display = ('candidate', 'duplicate', 'score', 'reasons', 'status', 'created_date', 'reviewed_by')
+    list_filter = ('status', )
+    list_select_related = ('candidate', 'duplicate')
+    ordering = ('status', '-score')
+    # 详情页展示的字段
+    compare_fields = (
+        'username', 'phone', 'email', 'city', 'apply_position', 'bachelor_school', 'master_school', 'major', 'degree',
+        'first_result', 'first_interviewer_user', 'second_result', 'second_interviewer_user', 'hr_result',
+        'created_date', 'modified_date')
+
+    def has_add_permission(self, request):
+        return False
+
+    def change_view(self, request, object_id, form_url='', extra_context=None):
+        pair = self.get_object(request, object_id)
+        if pair is None:
+            return self._get_obj_does_not_exist_redirect(request, self.model._meta, object_id)
+        if request.method == 'POST' and pair.status == 'pending':
+            if not self.has_change_permission(request, pair):
+                raise PermissionDenied
+            if '_merge' in request.POST and pair.duplicate_id:
+                dedup.merge(pair, request.user.username)
+                messages.add_message(request, messages.SUCCESS, '已合并')
+            elif '_ignore' in request.POST:
+                dedup.ignore(DuplicateCandidate.objects.filter(pk=pair.pk), request.user.username)
+                messages.add_message(request, messages.SUCCESS, '已标记为不是重复')
+            return HttpResponseRedirect(reverse('admin:interview_duplicatecandidate_changelist'))
+
+        rows = []
+        for name in self.compare_fields:
+            field = Candidate._meta.get_field(name)
+            left = getattr(pair.candidate, name)
+            right = getattr(pair.duplicate, name) if pair.duplicate_id else None
+            rows.append((field.verbose_name, left, right, pair.duplicate_id and left != right))
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.model._meta,
+            title='重复候选人',
+            pair=pair,
+            rows=rows,
+        )
+        context.update(extra_context or {})
+        return TemplateResponse(request, 'admin/interview/duplicate_compare.html', context)
+
+
 admin.site.register(Candidate, CandidateAdmin)
+admin.site.register(DingtalkNotification, DingtalkNotificationAdmin)
+admin.site.register(FunnelStat, FunnelStatAdmin)
+admin.site.register(ExportJob, ExportJobAdmin)
+admin.site.register(DuplicateCandidate, DuplicateCandidateAdmin)
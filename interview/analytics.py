@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: analytics
+# ========================================
+"""
+面试打分分析和面试官校准
+    - 分数列用 values_list 一次取出，在数据库中转换成浮点数（HR 等级 S/A/B/C 记为 4/3/2/1，面试结果记为 1 通过、0 未通过、
+      空为未面试），不实例化模型，每列放进一个 numpy 数组，之后的统计都是数组运算
+    - 每个面试官的打分分布（人数、均值、标准差、四分位数、通过率）以及与整体均值的偏差，偏差为负说明打分偏严
+    - 校准分：把每个面试官的打分按自己的均值和标准差做 z-score，再映射回整体的分布；打分人数少的面试官的均值和标准差
+      向整体收缩（CALIBRATION_PRIOR），避免只面试过几个人的面试官被过度修正
+    - 各轮分数之间的相关系数，按城市、本科学校的各轮通过率
+校准分是派生数据，由 python manage.py calibrate_interviewers 全量计算后批量回写，回写时不更新 modified_date
+"""
+import numpy as np
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+
+from interview.models import Candidate
+
+# HR 等级对应的分数
+GRADE_POINTS = {'S': 4.0, 'A': 3.0, 'B': 2.0, 'C': 1.0}
+GRADE_FIELDS = ('hr_score', 'hr_responsibility', 'hr_communication_ability', 'hr_logic_ability', 'hr_potential',
+                'hr_stability')
+SCORE_FIELDS = (
+    'test_score_of_general_ability', 'paper_score',
+    'first_score', 'first_learning_ability', 'first_professional_competency',
+    'second_score', 'second_learning_ability', 'second_professional_competency', 'second_pursue_of_excellence',
+    'second_communication_ability', 'second_pressure_score',
+) + GRADE_FIELDS
+
+# 面试轮次 -> (总分字段, 面试官字段, 结果字段, 通过的结果)
+ROUNDS = {
+    'first': ('first_score', 'first_interviewer_user', 'first_result', u'建议复试'),
+    'second': ('second_score', 'second_interviewer_user', 'second_result', u'建议录用'),
+    'hr': ('hr_score', 'hr_interviewer_user', 'hr_result', u'建议录用'),
+}
+ROUND_NAMES = {'first': u'第一轮面试', 'second': u'第二轮面试', 'hr': u'HR复试'}
+
+# 计算相关系数的分数
+CORRELATION_FIELDS = ('test_score_of_general_ability', 'paper_score', 'first_score', 'second_score', 'hr_score')
+
+# 校准的轮次 -> 回写的字段，HR 是等级，不校准
+CALIBRATED_FIELDS = {'first': 'first_score_calibrated', 'second': 'second_score_calibrated'}
+
+# 面试官的均值和标准差向整体收缩的先验人数
+CALIBRATION_PRIOR = 10
+# 分组统计的分位数
+QUANTILES = (0.25, 0.5, 0.75)
+# 通过率表格最多展示的分组数（按候选人数排序）
+RATE_LIMIT = 50
+# 数据库每次读取的行数，回写时每个事务更新的行数
+FETCH_SIZE = 5000
+WRITE_BATCH_SIZE = 5000
+
+CATEGORY_FIELDS = ('city', 'bachelor_school')
+
+
+def score_expression(field):
+    if field in GRADE_FIELDS:
+        whens = [When(**{field: grade}, then=Value(points)) for grade, points in GRADE_POINTS.items()]
+        return Case(*whens, default=Value(None), output_field=FloatField())
+    return Cast(field, FloatField())
+
+
+def outcome_expression(field, passed):
+    return Case(When(**{field: passed}, then=Value(1.0)), When(**{field: ''}, then=Value(None)),
+                default=Value(0.0), output_field=FloatField())
+
+
+class ScoreTable:
+    """
+    按列存放的候选人分数，每列一个数组，缺失值为 nan；面试官为用户ID，没有面试官为 -1；城市和学校为分组编号
+    """
+
+    def __init__(self, ids, scores, interviewers, outcomes, calibrated, categories):
+        self.ids = ids
+        self.scores = scores
+        self.interviewers = interviewers
+        self.outcomes = outcomes
+        self.calibrated = calibrated
+        # 字段 -> (分组编号数组, [分组名])
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def factorize(values):
+    index = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int64, count=len(values))
+    return codes, list(index)
+
+
+def load(queryset=None):
+    """
+    一次查询取出所有分数列，返回 ScoreTable
+    """
+    queryset = Candidate.objects.all() if queryset is None else queryset
+    expressions = [F('id')]
+    expressions += [score_expression(field) for field in SCORE_FIELDS]
+    expressions += [F('%s_id' % interviewer_field) for _, interviewer_field, _, _ in ROUNDS.values()]
+    expressions += [outcome_expression(result_field, passed) for _, _, result_field, passed in ROUNDS.values()]
+    expressions += [F(field) for field in CALIBRATED_FIELDS.values()]
+    rows = queryset.order_by().values_list(*expressions, *CATEGORY_FIELDS).iterator(chunk_size=FETCH_SIZE)
+    columns = list(zip(*rows)) or [()] * (len(expressions) + len(CATEGORY_FIELDS))
+
+    # None 转换为 nan
+    numeric = iter(np.array(columns[:len(expressions)], dtype=float))
+    ids = next(numeric).astype(np.int64)
+    scores = {field: next(numeric) for field in SCORE_FIELDS}
+    interviewers = {stage: np.nan_to_num(next(numeric), nan=-1).astype(np.int64) for stage in ROUNDS}
+    outcomes = {stage: next(numeric) for stage in ROUNDS}
+    calibrated = {stage: next(numeric) for stage in CALIBRATED_FIELDS}
+    categories = {field: factorize(values) for field, values in zip(CATEGORY_FIELDS, columns[len(expressions):])}
+    return ScoreTable(ids, scores, interviewers, outcomes, calibrated, categories)
+
+
+def group_stats(codes, values, size):
+    """
+    按组号（0..size-1）计算 人数、均值、标准差 和 分位数，values 中没有 nan
+    """
+    count = np.bincount(codes, minlength=size)
+    total = np.bincount(codes, weights=values, minlength=size)
+    squares = np.bincount(codes, weights=values * values, minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        std = np.sqrt(np.maximum(squares / count - mean * mean, 0))
+    quantiles = {}
+    if len(values):
+        # 先按组号再按分数排序，每组的分位数就是组内对应位置的值
+        ordered = values[np.lexsort((values, codes))]
+        starts = np.cumsum(count) - count
+        for q in QUANTILES:
+            position = np.minimum(starts + np.floor(np.maximum(count - 1, 0) * q).astype(np.int64), len(values) - 1)
+            quantiles[q] = np.where(count > 0, ordered[position], np.nan)
+    else:
+        quantiles = {q: np.full(size, np.nan) for q in QUANTILES}
+    return count, mean, std, quantiles
+
+
+def rated(table, stage):
+    """
+    该轮有分数且有面试官的候选人: (掩码, 面试官ID, 面试官组号)
+    """
+    score_field = ROUNDS[stage][0]
+    interviewer = table.interviewers[stage]
+    mask = ~np.isnan(table.scores[score_field]) & (interviewer >= 0)
+    user_ids, codes = np.unique(interviewer[mask], return_inverse=True)
+    return mask, user_ids, codes
+
+
+def rates(codes, outcomes, size):
+    """
+    每组 (已有结果的人数, 通过率)
+    """
+    decided = ~np.isnan(outcomes)
+    decided_count = np.bincount(codes[decided], minlength=size)
+    passed = np.bincount(codes[decided], weights=outcomes[decided], minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return decided_count, passed / decided_count
+
+
+def nan_to_none(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def interviewer_stats(table, stage):
+    """
+    每个面试官在该轮的打分分布，按与整体均值的偏差从低到高排序（最严的在前）
+    """
+    score_field = ROUNDS[stage][0]
+    mask, user_ids, codes = rated(table, stage)
+    values = table.scores[score_field][mask]
+    if not len(values):
+        return []
+    count, mean, std, quantiles = group_stats(codes, values, len(user_ids))
+    decided, pass_rate = rates(codes, table.outcomes[stage][mask], len(user_ids))
+    global_mean, global_std = values.mean(), values.std()
+    offset = mean - global_mean
+    # 偏差相对于标准误的倍数，绝对值大于 2 说明不太可能是随机波动
+    with np.errstate(invalid='ignore', divide='ignore'):
+        significance = offset / (global_std / np.sqrt(count))
+    names = dict(User.objects.filter(pk__in=user_ids.tolist()).values_list('pk', 'username'))
+    stats = [
+        {
+            'user_id': int(user_id),
+            'username': names.get(int(user_id), user_id),
+            'count': int(count[i]),
+            'mean': nan_to_none(mean[i]),
+            'std': nan_to_none(std[i]),
+            'quantiles': [nan_to_none(quantiles[q][i]) for q in QUANTILES],
+            'offset': nan_to_none(offset[i]),
+            'significance': nan_to_none(significance[i]),
+            'decided': int(decided[i]),
+            'pass_rate': nan_to_none(pass_rate[i]),
+        }
+        for i, user_id in enumerate(user_ids)
+    ]
+    return sorted(stats, key=lambda row: row['offset'])
+
+
+def calibrate(table, stage, prior=CALIBRATION_PRIOR):
+    """
+    返回 (z-score 数组, 校准分数组)，没有分数或没有面试官的候选人为 nan
+    """
+    score_field = ROUNDS[stage][0]
+    raw = table.scores[score_field]
+    zscores = np.full(len(raw), np.nan)
+    calibrated = np.full(len(raw), np.nan)
+    mask, user_ids, codes = rated(table, stage)
+    values = raw[mask]
+    if not len(values) or values.std() == 0:
+        calibrated[mask] = values
+        return zscores, calibrated
+    count, mean, std, _ = group_stats(codes, values, len(user_ids))
+    global_mean, global_std = values.mean(), values.std()
+    weight = count / (count + prior)
+    mean = weight * mean + (1 - weight) * global_mean
+    std = weight * std + (1 - weight) * global_std
+    # 面试官给所有人都打同一个分时，标准差为 0，按整体的标准差计算
+    std = np.where(std > 0, std, global_std)
+    zscores[mask] = (values - mean[codes]) / std[codes]
+    calibrated[mask] = np.round(np.clip(global_mean + global_std * zscores[mask], values.min(), values.max()), 2)
+    return zscores, calibrated
+
+
+def correlation(table, fields=CORRELATION_FIELDS):
+    """
+    各轮分数两两之间的皮尔逊相关系数，每一对只使用两项都有分数的候选人: [(字段, [(相关系数, 人数)])]
+    """
+    matrix = []
+    for a in fields:
+        row = []
+        for b in fields:
+            x, y = table.scores[a], table.scores[b]
+            mask = ~np.isnan(x) & ~np.isnan(y)
+            n = int(mask.sum())
+            r = None
+            if n > 2 and x[mask].std() > 0 and y[mask].std() > 0:
+                r = float(np.corrcoef(x[mask], y[mask])[0, 1])
+            row.append((r, n))
+        matrix.append((a, row))
+    return matrix
+
+
+def pass_rates(table, field, limit=RATE_LIMIT):
+    """
+    按城市或学校统计各轮通过率，按候选人数取前 limit 组: [(分组名, 候选人数, [(已有结果的人数, 通过率)])]
+    """
+    codes, labels = table.categories[field]
+    total = np.bincount(codes, minlength=len(labels))
+    per_round = [rates(codes, table.outcomes[stage], len(labels)) for stage in ROUNDS]
+    top = np.argsort(-total, kind='stable')[:limit]
+    return [
+        (labels[i] or '-', int(total[i]), [(int(decided[i]), nan_to_none(rate[i])) for decided, rate in per_round])
+        for i in top
+    ]
+
+
+def report(queryset=None):
+    """
+    管理后台分析报表的数据
+    """
+    table = load(queryset)
+    field_names = {field: Candidate._meta.get_field(field).verbose_name for field in SCORE_FIELDS}
+    return {
+        'count': len(table),
+        'interviewers': [(ROUND_NAMES[stage], interviewer_stats(table, stage)) for stage in ROUNDS],
+        'correlation': [(field_names[field], row) for field, row in correlation(table)],
+        'correlation_fields': [field_names[field] for field in CORRELATION_FIELDS],
+        'rounds': [ROUND_NAMES[stage] for stage in ROUNDS],
+        'cities': pass_rates(table, 'city'),
+        'schools': pass_rates(table, 'bachelor_school'),
+    }
+
+
+def write_calibrated(table, calibrated, batch_size=WRITE_BATCH_SIZE):
+    """
+    批量回写校准分，只更新发生变化的行，返回更新的行数
+    """
+    changed = np.zeros(len(table), dtype=bool)
+    for stage, values in calibrated.items():
+        old = table.calibrated[stage]
+        same = (np.isnan(old) & np.isnan(values)) | (np.abs(old - values) < 0.005)
+        changed |= ~same
+    if not changed.any():
+        return 0
+
+    stages = list(calibrated)
+    columns = np.column_stack([calibrated[stage][changed] for stage in stages] + [table.ids[changed]])
+    params = [tuple(value if value == value else None for value in row[:-1]) + (int(row[-1]), )
+              for row in columns.tolist()]
+
+    db = router.db_for_write(Candidate)
+    connection = connections[db]
+    quote = connection.ops.quote_name
+    sql = 'UPDATE %s SET %s WHERE %s = %%s' % (
+        quote(Candidate._meta.db_table),
+        ', '.join('%s = %%s' % quote(CALIBRATED_FIELDS[stage]) for stage in stages),
+        quote(Candidate._meta.pk.column))
+    for i in range(0, len(params), batch_size):
+        with transaction.atomic(using=db), connection.cursor() as cursor:
+            cursor.executemany(sql, params[i:i + batch_size])
+    return len(params)
+
+
+def run_calibration(dry_run=False):
+    """
+    全量计算校准分并回写，返回 (候选人数, 更新的行数)
+    校准依赖全体候选人的分布，所以总是使用整张表
+    """
+    table = load()
+    calibrated = {stage: calibrate(table, stage)[1] for stage in CALIBRATED_FIELDS}
+    if dry_run:
+        return len(table), 0
+    return len(table), write_calibrated(table, calibrated)
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: api
+# ========================================
+"""
+职位、简历、候选人的只读 REST API，供外部招聘系统同步数据
+
+    GET /api/candidates/?fields=id,username,phone,first_result&modified_since=2020-11-01T00:00:00&page_size=500
+
+- 游标分页，按 (modified_date, id) 排序，游标记住上一页最后一行的 (modified_date, id)，同一时间修改的大量行
+  （批量导入、批量分配面试官共用一个时间）也不会重复或遗漏；增量同步时带上 modified_since，翻页代价不随页数增长
+- fields 只查询需要的列，面试官字段通过 select_related 一次取出
+- 支持 ETag 条件请求，ETag 由当前页的行计算，页面没有变化时返回 304
+- 候选人的行级权限与管理后台相同，见 interview.roles.filter_visible_candidates；字段权限也与管理后台详情页相同，
+  面试官只能看到自己负责的那一轮及之前的字段，见 interview.candidate_field.visible_fields
+"""
+import base64
+import hashlib
+import json
+from collections import OrderedDict
+
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from django.utils.http import quote_etag
+from django_filters import rest_framework as filters
+from rest_framework import permissions, serializers, status, viewsets
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from interview import candidate_field as cf
+from interview.dedup import normalize_phone
+from interview.models import Candidate
+from interview.roles import filter_visible_candidates, get_role
+from jobs.models import Job, Resume
+
+FIELDS_PARAM = 'fields'
+
+
+class ModifiedDateCursorPagination(BasePagination):
+    """
+    按 (modified_date, id) 定位的游标分页，下一页的条件为
+        modified_date > d OR (modified_date = d AND id > pk)
+    DRF 的 CursorPagination 只按第一个排序字段定位，同一时间的行超过一页时会重复返回
+    modified_date 为空的旧数据排在最前面
+    """
+    cursor_query_param = 'cursor'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def get_page_size(self, request):
+        try:
+            return min(max(int(request.query_params[self.page_size_query_param]), 1), self.max_page_size)
+        except (KeyError, ValueError):
+            return self.page_size
+
+    @staticmethod
+    def encode_cursor(obj):
+        # 不使用 DjangoJSONEncoder，它会把微秒截断成毫秒，之后的等值比较就对不上了
+        modified_date = obj.modified_date and obj.modified_date.isoformat()
+        return base64.urlsafe_b64encode(json.dumps([modified_date, obj.pk]).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            modified_date, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            if modified_date is not None:
+                modified_date = parse_datetime(modified_date)
+                if modified_date is None:
+                    raise ValueError(cursor)
+            return modified_date, int(pk)
+        except (TypeError, ValueError):
+            raise NotFound('无效的游标')
+
+    @staticmethod
+    def seek(modified_date, pk):
+        if modified_date is None:
+            return Q(modified_date__isnull=True, id__gt=pk) | Q(modified_date__isnull=False)
+        return Q(modified_date__gt=modified_date) | Q(modified_date=modified_date, id__gt=pk)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(F('modified_date').asc(nulls_first=True), 'id')
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.seek(*self.decode_cursor(cursor)))
+        rows = list(queryset[:page_size + 1])
+        self.page = rows[:page_size]
+        self.has_next = len(rows) > page_size
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([('next', self.get_next_link()), ('results', data)]))
+
+
+class SparseFieldsSerializer(serializers.ModelSerializer):
+    """
+    通过 fields 参数只输出部分字段
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class JobSerializer(SparseFieldsSerializer):
+    job_type_display = serializers.CharField(source='get_job_type_display', read_only=True)
+    job_city_display = serializers.CharField(source='get_job_city_display', read_only=True)
+
+    class Meta:
+        model = Job
+        fields = ('id', 'job_type', 'job_type_display', 'job_name', 'job_city', 'job_city_display',
+                  'job_responsibility', 'job_requirement', 'created_date', 'modified_date')
+
+
+class ResumeSerializer(SparseFieldsSerializer):
+    class Meta:
+        model = Resume
+        fields = ('id', 'username', 'applicant', 'city', 'phone', 'email', 'apply_position', 'born_address', 'gender',
+                  'bachelor_school', 'master_school', 'doctor_school', 'major', 'degree', 'candidate_introduction',
+                  'work_experience', 'project_experience', 'created_date', 'modified_date')
+
+
+class CandidateSerializer(SparseFieldsSerializer):
+    first_interviewer_user = serializers.CharField(source='first_interviewer_user.username', default=None)
+    second_interviewer_user = serializers.CharField(source='second_interviewer_user.username', default=None)
+    hr_interviewer_user = serializers.CharField(source='hr_interviewer_user.username', default=None)
+
+    class Meta:
+        model = Candidate
+        exclude = ('creator', 'last_editor', 'phone_key', 'email_key', 'block_key')
+
+    def to_representation(self, instance):
+        """
+        按行去掉当前用户不能看到的字段（例如面试官看不到 hr 的评分和备注）
+        """
+        data = super().to_representation(instance)
+        request = self.context['request']
+        allowed = cf.visible_fields(get_role(request), request.user.pk, instance)
+        if allowed is None:
+            return data
+        return OrderedDict((name, value) for name, value in data.items() if name in allowed)
+
+
+class JobFilter(filters.FilterSet):
+    modified_since = filters.IsoDateTimeFilter(field_name='modified_date', lookup_expr='gte')
+
+    class Meta:
+        model = Job
+        fields = ('job_type', 'job_city')
+
+
+class ResumeFilter(filters.FilterSet):
+    modified_since = filters.IsoDateTimeFilter(field_name='modified_date', lookup_expr='gte')
+    # 按规范化手机号筛选，使用 resume_phonekey_modified_idx
+    phone = filters.CharFilter(method='filter_phone')
+
+    class Meta:
+        model = Resume
+        fields = ('city', 'apply_position', 'phone')
+
+    def filter_phone(self, queryset, name, value):
+        return queryset.filter(phone_key=normalize_phone(value))
+
+
+class CandidateFilter(filters.FilterSet):
+    modified_since = filters.IsoDateTimeFilter(field_name='modified_date', lookup_expr='gte')
+
+    class Meta:
+        model = Candidate
+        fields = ('city', 'apply_position', 'phone', 'first_result', 'second_result', 'hr_result')
+
+
+class InterviewerCandidateFilter(CandidateFilter):
+    """
+    面试官只能按一面面试官也能看到的字段筛选，否则可以通过筛选结果推断出看不到的二面、hr 结果
+    """
+
+    class Meta(CandidateFilter.Meta):
+        fields = ('city', 'apply_position', 'phone', 'first_result')
+
+
+class ReadOnlySyncViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    稀疏字段 + 条件请求
+    """
+    pagination_class = ModifiedDateCursorPagination
+    filter_backends = (filters.DjangoFilterBackend, )
+    # 游标分页需要从每一行读取排序字段，这些列总是查询
+    always_loaded = ('id', 'modified_date')
+
+    def requested_fields(self):
+        """
+        fields 参数中合法的字段，没有传时返回 None 表示全部字段
+        """
+        if not hasattr(self, '_requested_fields'):
+            value = self.request.query_params.get(FIELDS_PARAM)
+            allowed = set(self.serializer_class(context=self.get_serializer_context()).fields)
+            self._requested_fields = value and [name for name in value.split(',') if name in allowed] or None
+        return self._requested_fields
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.requested_fields()
+        related = []
+        columns = set(self.always_loaded)
+        for name in fields or self.serializer_class(context=self.get_serializer_context()).fields:
+            field = self.serializer_class._declared_fields.get(name)
+            source = field.source if field is not None and field.source else name
+            if '.' in source:
+                # 面试官的用户名
+                relation, attribute = source.split('.', 1)
+                related.append(relation)
+                columns.add('%s__%s' % (relation, attribute))
+            elif source.startswith('get_') and source.endswith('_display'):
+                columns.add(source[len('get_'):-len('_display')])
+            else:
+                columns.add(source)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
+    def make_etag(self, page):
+        """
+        当前页的版本：页中每一行的 (id, 修改时间) + 是否还有下一页 + 用户 + 请求参数，不需要额外查询
+        """
+        rows = ';'.join('%s:%s' % (obj.pk, obj.modified_date and obj.modified_date.isoformat()) for obj in page)
+        raw = '%s|%s|%s|%s' % (rows, self.paginator.has_next, self.request.user.pk,
+                               self.request.META.get('QUERY_STRING', ''))
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    def not_modified(self, etag):
+        return etag in [tag.strip() for tag in self.request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        etag = self.make_etag(page)
+        if self.not_modified(etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        response['ETag'] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = quote_etag('%s-%s-%s' % (instance.pk, instance.modified_date and instance.modified_date.timestamp(),
+                                        self.request.META.get('QUERY_STRING', '')))
+        if self.not_modified(etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        response = Response(self.get_serializer(instance).data)
+        response['ETag'] = etag
+        return response
+
+
+class JobViewSet(ReadOnlySyncViewSet):
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    filterset_class = JobFilter
+    permission_classes = (permissions.AllowAny, )
+
+
+class ResumeViewSet(ReadOnlySyncViewSet):
+    queryset = Resume.objects.all()
+    serializer_class = ResumeSerializer
+    filterset_class = ResumeFilter
+    permission_classes = (permissions.IsAdminUser, )
+
+    def get_queryset(self):
+        """
+        hr 可以看到所有简历，面试官只能看到自己负责的候选人的简历
+        候选人通过 resume 外键或规范化手机号关联简历，手机号格式不同（+86、空格、横线）也能匹配
+        """
+        queryset = super().get_queryset()
+        if get_role(self.request).sees_all_candidates:
+            return queryset
+        visible = filter_visible_candidates(Candidate.objects.all(), self.request)
+        return queryset.filter(Q(pk__in=visible.exclude(resume=None).values('resume'))
+                               | Q(phone_key__in=visible.exclude(phone_key='').values('phone_key')))
+
+
+class CandidateViewSet(ReadOnlySyncViewSet):
+    queryset = Candidate.objects.all()
+    serializer_class = CandidateSerializer
+    permission_classes = (permissions.IsAdminUser, )
+
+    @property
+    def filterset_class(self):
+        return CandidateFilter if get_role(self.request).sees_all_candidates else InterviewerCandidateFilter
+
+    def get_queryset(self):
+        return filter_visible_candidates(super().get_queryset(), self.request)
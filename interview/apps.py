@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class InterviewConfig(AppConfig):
     name = 'interview'
+
+    def ready(self):
+        # 注册信号处理
+        from interview import signals  # noqa: F401
+        # SQLite 连接参数，见 recruitment.db
+        from recruitment import db  # noqa: F401
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: benchmarks
+# ========================================
+"""
+热点路径的性能测试，配合 generate_recruitment_data 生成的数据使用，由 run_benchmarks 命令执行
+每个测试记录耗时、SQL 条数和耗时、峰值内存、响应大小；会写库的测试在回滚的事务里执行，不会改变数据
+"""
+import csv
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from interview import analytics
+from interview.models import Candidate
+from interview.services import convert_resumes
+from jobs import intake
+from jobs.models import Job, Resume
+
+# 注册的测试: 名称 -> (函数, 是否需要回滚)
+BENCHMARKS = {}
+
+
+def benchmark(name, rollback=False):
+    def decorator(func):
+        BENCHMARKS[name] = (func, rollback)
+        return func
+    return decorator
+
+
+class QueryCounter:
+    """
+    通过 execute_wrapper 统计 SQL，不依赖 DEBUG，也不会像 CaptureQueriesContext 那样保存所有 SQL
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+def response_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+class Context:
+    """
+    测试共用的数据：hr、面试官、登录好的客户端
+    """
+
+    def __init__(self, import_rows, convert_rows):
+        self.import_rows = import_rows
+        self.convert_rows = convert_rows
+        self.hr = User.objects.filter(is_superuser=True).first() or User.objects.filter(groups__name='hr').first()
+        interviewer = Candidate.objects.exclude(first_interviewer_user=None).values('first_interviewer_user') \
+            .annotate(total=Count('id')).order_by('-total').first()
+        self.interviewer = interviewer and User.objects.get(pk=interviewer['first_interviewer_user'])
+        self.job = Job.objects.order_by('pk').first()
+        self.clients = {}
+
+    def client(self, user=None):
+        """
+        每个用户只登录一次，登录本身不计入测试
+        """
+        key = user and user.pk
+        if key not in self.clients:
+            client = Client(HTTP_HOST='localhost')
+            if user is not None:
+                client.force_login(user)
+            self.clients[key] = client
+        return self.clients[key]
+
+
+@benchmark('changelist_hr')
+def changelist_hr(ctx):
+    return ctx.client(ctx.hr).get(reverse('admin:interview_candidate_changelist'))
+
+
+@benchmark('changelist_interviewer')
+def changelist_interviewer(ctx):
+    return ctx.client(ctx.interviewer).get(reverse('admin:interview_candidate_changelist'))
+
+
+@benchmark('export_model_as_csv')
+def export_model_as_csv(ctx):
+    return ctx.client(ctx.hr).post(reverse('admin:interview_candidate_changelist'), {
+        'action': 'export_model_as_csv',
+        'select_across': '1',
+        'index': '0',
+        '_selected_action': list(Candidate.objects.values_list('pk', flat=True)[:1]),
+    })
+
+
+@benchmark('import_candidates', rollback=True)
+def import_candidates(ctx):
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='GBK', newline='', delete=False) as f:
+        writer = csv.writer(f, delimiter=';')
+        for i in range(ctx.import_rows):
+            writer.writerow(['候选人%s' % i, '北京', '199%08d' % i, '北京大学', '软件工程', '本科', '80', '75'])
+    try:
+        with open(os.devnull, 'w') as devnull:
+            call_command('import_candidates', path=f.name, stdout=devnull)
+    finally:
+        os.unlink(f.name)
+
+
+@benchmark('enter_interview_process', rollback=True)
+def enter_interview_process(ctx):
+    pks = Resume.objects.order_by('-pk').values_list('pk', flat=True)[:ctx.convert_rows]
+    convert_resumes(Resume.objects.filter(pk__in=list(pks)), creator='benchmark')
+
+
+@benchmark('joblist')
+def joblist(ctx):
+    return ctx.client().get(reverse('jobs:joblist'))
+
+
+@benchmark('job_detail')
+def job_detail(ctx):
+    return ctx.client().get(reverse('jobs:job_detail', kwargs={'job_id': ctx.job.pk}))
+
+
+@benchmark('resume_post', rollback=True)
+def resume_post(ctx):
+    return ctx.client(ctx.hr).post(reverse('jobs:resume_add'), {
+        'username': '性能测试', 'city': '北京', 'phone': '19900000000', 'email': 'bench@example.com',
+        'apply_position': '后端开发工程师', 'bachelor_school': '北京大学', 'major': '软件工程', 'degree': '本科',
+        'created_date': '2020-11-17 10:00:00', 'modified_date': '2020-11-17 10:00:00',
+        'candidate_introduction': '性能测试', 'work_experience': '性能测试', 'project_experience': '性能测试',
+    })
+
+
+@benchmark('resume_post_journal', rollback=True)
+def resume_post_journal(ctx):
+    """
+    缓冲投递：写入临时目录的日志文件，再执行一次批量写入，与 resume_post 比较
+    """
+    with tempfile.TemporaryDirectory() as directory, override_settings(
+            RESUME_INTAKE_MODE='journal', RESUME_INTAKE_WORKER='command', RESUME_INTAKE_DIR=directory):
+        response = resume_post(ctx)
+        intake.flush()
+    return response
+
+
+@benchmark('score_analytics')
+def score_analytics(ctx):
+    """
+    全量读取分数并计算打分分析报表，不经过缓存
+    """
+    analytics.report()
+
+
+@benchmark('calibrate_interviewers', rollback=True)
+def calibrate_interviewers(ctx):
+    analytics.run_calibration()
+
+
+@contextmanager
+def maybe_rollback(rollback):
+    if not rollback:
+        yield
+        return
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def run_once(func, ctx, rollback, trace_memory=False):
+    counter = QueryCounter()
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter), maybe_rollback(rollback):
+        response = func(ctx)
+        size = response_size(response) if response is not None else 0
+    elapsed = time.perf_counter() - started
+    peak = 0
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {
+        'wall_ms': elapsed * 1000,
+        'queries': counter.count,
+        'query_ms': counter.duration * 1000,
+        'bytes': size,
+        'status': getattr(response, 'status_code', None),
+        'peak_kb': peak / 1024,
+    }
+
+
+def run(names=None, repeat=5, import_rows=1000, convert_rows=1000):
+    """
+    执行测试并返回可以序列化成 json 的报告
+    每个测试先冷启动执行一次（清空缓存），再执行 repeat 次取统计值，最后单独执行一次统计峰值内存
+    """
+    ctx = Context(import_rows, convert_rows)
+    results = []
+    for name, (func, rollback) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        cache.clear()
+        cold = run_once(func, ctx, rollback)
+        runs = [run_once(func, ctx, rollback) for _ in range(repeat)]
+        memory = run_once(func, ctx, rollback, trace_memory=True)
+        wall = [r['wall_ms'] for r in runs]
+        results.append({
+            'name': name,
+            'repeat': repeat,
+            'cold_wall_ms': round(cold['wall_ms'], 2),
+            'wall_ms': {
+                'min': round(min(wall), 2),
+                'median': round(statistics.median(wall), 2),
+                'max': round(max(wall), 2),
+            },
+            'queries': runs[-1]['queries'],
+            'query_ms': round(statistics.median(r['query_ms'] for r in runs), 2),
+            'peak_kb': round(memory['peak_kb'], 1),
+            'bytes': runs[-1]['bytes'],
+            'status': runs[-1]['status'],
+        })
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'database': connection.vendor,
+        'rows': {
+            'job': Job.objects.count(),
+            'resume': Resume.objects.count(),
+            'candidate': Candidate.objects.count(),
+            'user': User.objects.count(),
+        },
+        'results': results,
+    }
@@ -4,18 +4,22 @@
 # Date：2020/11/16
 # FILE: candidate_field
 # ========================================
-"""分组展示字段，分三块，基础信息、第一轮面试记录、第二轮面试（专业复试）、HR复试"""
+"""分组展示字段，分三块，基础信息、第一轮面试记录、第二轮面试（专业复试）、HR复试
+校准分（interview.analytics）只在 hr 看到的完整字段中展示
+管理后台详情页和接口都通过 fieldsets_for / visible_fields 决定用户能看到的字段"""
+from django.contrib.admin.utils import flatten_fieldsets
 default_fieldsets = (
     (None, {'fields': (
         "userid", ("username", "city", "phone"),
         ("email", "apply_position", "born_address"), ("gender", "candidate_remark"),
         ("bachelor_school", "master_school", "doctor_school"), ("major", "degree"), "test_score_of_general_ability",
-        "paper_score",)}),
+        "paper_score", "composite_score",)}),
     ('第一轮面试', {'fields': (
-        ("first_score", "first_learning_ability", "first_professional_competency"), "first_advantage",
-        "first_disadvantage",
+        ("first_score", "first_learning_ability", "first_professional_competency"), "first_score_calibrated",
+        "first_advantage", "first_disadvantage",
         "first_result", "first_recommend_position", "first_interviewer_user", "first_remark",)}),
-    ('第二轮面试（专业复试）', {'fields': ("second_score", ("second_learning_ability", "second_professional_competency"), (
+    ('第二轮面试（专业复试）', {'fields': (("second_score", "second_score_calibrated"), (
+        "second_learning_ability", "second_professional_competency"), (
         "second_pursue_of_excellence", "second_communication_ability", "second_pressure_score"), "second_advantage",
                                 "second_disadvantage", "second_result", "second_recommend_position",
                                 "second_interviewer_user", "second_remark",)}),
@@ -48,3 +52,33 @@ default_fieldsets_second = (
                                 "second_disadvantage", "second_result", "second_recommend_position",
                                 "second_interviewer_user", "second_remark",)}),
 )
+
+# 详情页展示当前简历的内容
+resume_fieldsets = (
+    ('简历', {'fields': ("get_resume_content",)}),
+)
+
+
+# 不在分组中、但面试官也可以看到的字段
+VISIBLE_EXTRA_FIELDS = ('id', 'resume', 'created_date', 'modified_date')
+
+
+def fieldsets_for(role, user_id, candidate):
+    """
+    一面面试官只能看到基础+一面信息，二面面试官可以看到基础+一面+二面的信息，hr 可以看到全部
+    """
+    if not role.sees_all_candidates and candidate is not None:
+        if candidate.first_interviewer_user_id == user_id:
+            return default_fieldsets_first
+        if candidate.second_interviewer_user_id == user_id:
+            return default_fieldsets_second
+    return default_fieldsets
+
+
+def visible_fields(role, user_id, candidate):
+    """
+    用户能看到的候选人字段名，返回 None 表示全部
+    """
+    if role.sees_all_candidates:
+        return None
+    return set(flatten_fieldsets(fieldsets_for(role, user_id, candidate))) | set(VISIBLE_EXTRA_FIELDS)
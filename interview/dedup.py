@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: dedup
+# ========================================
+"""
+重复候选人的识别与合并
+    - 手机号、邮箱规范化后保存在 phone_key / email_key，姓名拼音 + 本科学校保存在 block_key，三个字段都有索引
+    - 只在同一个 key 下的记录之间两两比较（分块），不做全表 O(n²) 比较，过大的块跳过
+    - 每一对记录按命中的特征打分，超过 DEDUP_MIN_SCORE 的保存为 DuplicateCandidate，由 hr 在管理后台确认合并或忽略
+    - 新增和修改的候选人在提交后增量检测，存量数据由 python manage.py detect_duplicates 批量检测
+拼音依赖可选的 pypinyin，没有安装时直接使用姓名
+"""
+import logging
+import re
+from itertools import combinations, groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from interview.models import Candidate, DuplicateCandidate
+
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:  # pragma: no cover
+    lazy_pinyin = None
+
+logger = logging.getLogger(__name__)
+
+KEY_FIELDS = ('phone_key', 'email_key', 'block_key')
+# 打分需要的列
+ROW_FIELDS = ('id', 'phone_key', 'email_key', 'block_key', 'username', 'bachelor_school', 'major', 'city')
+ID, PHONE, EMAIL, BLOCK, NAME, SCHOOL, MAJOR, CITY = range(len(ROW_FIELDS))
+
+# 特征的分数，总分最高 1
+WEIGHTS = {
+    'phone': 0.6,
+    'phone_typo': 0.3,
+    'email': 0.4,
+    'email_typo': 0.2,
+    'name': 0.25,
+    'name_pinyin': 0.15,
+    'school': 0.1,
+    'major': 0.1,
+    'city': 0.05,
+}
+DEDUP_MIN_SCORE = 0.45
+
+# 同一个 key 下超过该数量的记录不比较（例如常见姓名 + 同一学校），避免一个块产生大量的比较
+MAX_BLOCK_SIZE = 200
+# 每条 SQL 的参数个数，批量写入的行数
+LOOKUP_CHUNK_SIZE = 500
+BATCH_SIZE = 2000
+
+# 常见的邮箱域名拼写错误
+EMAIL_DOMAIN_TYPOS = {
+    'qq.con': 'qq.com', 'qq.cm': 'qq.com', 'qq.co': 'qq.com',
+    '163.con': '163.com', '163.cm': '163.com', '126.con': '126.com',
+    'gmial.com': 'gmail.com', 'gmai.com': 'gmail.com', 'gamil.com': 'gmail.com', 'gmail.con': 'gmail.com',
+    'hotmial.com': 'hotmail.com', 'outlook.con': 'outlook.com',
+}
+NON_DIGITS = re.compile(r'\D+')
+SPACES = re.compile(r'\s+')
+
+
+def normalize_phone(phone):
+    """
+    只保留数字，去掉 +86 / 0086 国家码
+    """
+    digits = NON_DIGITS.sub('', phone or '')
+    for prefix in ('0086', '86'):
+        if digits.startswith(prefix) and len(digits) - len(prefix) == 11:
+            return digits[len(prefix):]
+    return digits
+
+
+def normalize_email(email):
+    email = SPACES.sub('', email or '').lower()
+    if '@' not in email:
+        return ''
+    local, domain = email.rsplit('@', 1)
+    return '%s@%s' % (local, EMAIL_DOMAIN_TYPOS.get(domain, domain))
+
+
+def name_key(name):
+    name = SPACES.sub('', name or '').lower()
+    if lazy_pinyin is not None:
+        return ''.join(lazy_pinyin(name))
+    return name
+
+
+def block_key(name, school):
+    name = name_key(name)
+    if not name:
+        return ''
+    return '%s|%s' % (name, SPACES.sub('', school or ''))
+
+
+def fill_keys(obj):
+    """
+    计算 Candidate / Resume 的去重字段，save() 之前由 pre_save 调用，bulk_create / bulk_update 之前需要手动调用
+    """
+    obj.phone_key = normalize_phone(obj.phone)
+    obj.email_key = normalize_email(obj.email)
+    obj.block_key = block_key(obj.username, obj.bachelor_school)
+    return obj
+
+
+def within_one_edit(a, b):
+    """
+    两个字符串是否只相差一个字符（替换、插入或删除）
+    """
+    if a == b or abs(len(a) - len(b)) > 1:
+        return a == b
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+
+def score(a, b):
+    """
+    两条记录（ROW_FIELDS 顺序的元组）的相似度，返回 (分数, 命中的特征)
+    """
+    reasons = []
+    if a[PHONE] and a[PHONE] == b[PHONE]:
+        reasons.append('phone')
+    elif len(a[PHONE]) == 11 and within_one_edit(a[PHONE], b[PHONE]):
+        reasons.append('phone_typo')
+    if a[EMAIL] and a[EMAIL] == b[EMAIL]:
+        reasons.append('email')
+    elif a[EMAIL] and b[EMAIL] and within_one_edit(a[EMAIL], b[EMAIL]):
+        reasons.append('email_typo')
+    if a[NAME] and a[NAME].strip() == b[NAME].strip():
+        reasons.append('name')
+    elif a[BLOCK] and a[BLOCK].split('|')[0] == b[BLOCK].split('|')[0]:
+        reasons.append('name_pinyin')
+    for index, reason in ((SCHOOL, 'school'), (MAJOR, 'major'), (CITY, 'city')):
+        if a[index] and a[index] == b[index]:
+            reasons.append(reason)
+    return min(1.0, round(sum(WEIGHTS[reason] for reason in reasons), 2)), reasons
+
+
+def min_score():
+    return getattr(settings, 'DEDUP_MIN_SCORE', DEDUP_MIN_SCORE)
+
+
+def score_block(rows, seen, targets=None):
+    """
+    比较一个块内的记录，targets 不为空时只比较至少一条在 targets 中的记录对
+    返回新发现的 DuplicateCandidate（未保存）
+    """
+    if len(rows) > MAX_BLOCK_SIZE:
+        logger.info("skip duplicate block of %s rows", len(rows))
+        return []
+    threshold = min_score()
+    pairs = []
+    for a, b in combinations(sorted(rows), 2):
+        key = (a[ID], b[ID])
+        if key in seen or (targets is not None and a[ID] not in targets and b[ID] not in targets):
+            continue
+        seen.add(key)
+        value, reasons = score(a, b)
+        if value >= threshold:
+            pairs.append(DuplicateCandidate(
+                candidate_id=a[ID], duplicate_id=b[ID], score=value, reasons=','.join(reasons)))
+    return pairs
+
+
+def save_pairs(pairs):
+    # 已经确认合并或忽略的记录对保持不变
+    DuplicateCandidate.objects.bulk_create(pairs, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return len(pairs)
+
+
+def detect_for(queryset):
+    """
+    增量检测：queryset 中的候选人与所有候选人比较
+    """
+    targets = {row[ID]: row for row in queryset.values_list(*ROW_FIELDS)}
+    if not targets:
+        return 0
+    seen, pairs = set(), []
+    for index, field in enumerate(KEY_FIELDS, start=PHONE):
+        keys = sorted({row[index] for row in targets.values() if row[index]})
+        for i in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            rows = Candidate.objects.filter(**{'%s__in' % field: keys[i:i + LOOKUP_CHUNK_SIZE]}) \
+                .order_by(field).values_list(*ROW_FIELDS)
+            for _, block in groupby(rows, key=lambda row: row[index]):
+                pairs.extend(score_block(list(block), seen, targets))
+    return save_pairs(pairs)
+
+
+def detect_all(progress=None):
+    """
+    全量检测：每个 key 只读取有重复的块，按 key 排序流式分组
+    """
+    seen, pairs, total = set(), [], 0
+    for index, field in enumerate(KEY_FIELDS, start=PHONE):
+        duplicated = Candidate.objects.exclude(**{field: ''}).values(field) \
+            .annotate(total=Count('id')).filter(total__gt=1).values(field)
+        rows = Candidate.objects.filter(**{'%s__in' % field: duplicated}) \
+            .order_by(field, 'id').values_list(*ROW_FIELDS).iterator(chunk_size=BATCH_SIZE)
+        for _, block in groupby(rows, key=lambda row: row[index]):
+            pairs.extend(score_block(list(block), seen))
+            if len(pairs) >= BATCH_SIZE:
+                total += save_pairs(pairs)
+                pairs = []
+        if progress:
+            progress(field, total + len(pairs))
+    return total + save_pairs(pairs)
+
+
+def fill_missing_keys(model, batch_size=BATCH_SIZE):
+    """
+    给去重字段为空的存量数据补齐，按主键分批读取和 bulk_update
+    """
+    fields = ('id', 'username', 'phone', 'email', 'bachelor_school') + KEY_FIELDS
+    queryset = model.objects.filter(phone_key='').exclude(phone='').only(*fields).order_by('id')
+    last_id, count = 0, 0
+    while True:
+        objs = [fill_keys(obj) for obj in queryset.filter(id__gt=last_id)[:batch_size]]
+        if not objs:
+            return count
+        model.objects.bulk_update(objs, KEY_FIELDS)
+        last_id = objs[-1].id
+        count += len(objs)
+
+
+# 合并时不从重复记录复制的字段
+MERGE_EXCLUDED_FIELDS = ('id', 'userid', 'creator', 'created_date', 'modified_date', 'last_editor') + KEY_FIELDS
+
+
+def merge(pair, editor):
+    """
+    把重复记录合并到保留的候选人（记录对中较早创建的一条）：保留记录中为空的字段用重复记录的值补齐，然后删除重复记录
+    """
+    with transaction.atomic():
+        keep = Candidate.objects.select_for_update().get(pk=pair.candidate_id)
+        other = Candidate.objects.select_for_update().get(pk=pair.duplicate_id)
+        for field in Candidate._meta.concrete_fields:
+            if field.name in MERGE_EXCLUDED_FIELDS:
+                continue
+            if getattr(keep, field.attname) in (None, '') and getattr(other, field.attname) not in (None, ''):
+                setattr(keep, field.attname, getattr(other, field.attname))
+        if keep.userid is None and other.userid is not None:
+            keep.userid, other.userid = other.userid, None
+            other.save(update_fields=['userid'])
+        keep.last_editor = editor
+        keep.save()
+
+        DuplicateCandidate.objects.filter(Q(candidate=other) | Q(duplicate=other)).exclude(pk=pair.pk).delete()
+        pair.status = 'merged'
+        pair.merged_from = '%s %s #%s' % (other.username, other.phone, other.pk)
+        pair.reviewed_by = editor
+        pair.reviewed_date = timezone.now()
+        pair.save()
+        other.delete()
+    return keep
+
+
+def ignore(queryset, editor):
+    return queryset.filter(status='pending').update(status='ignored', reviewed_by=editor, reviewed_date=timezone.now())
@@ -11,6 +11,10 @@ from dingtalkchatbot.chatbot import DingtalkChatbot
 from django.conf import settings
 
 
+class DingtalkError(Exception):
+    pass
+
+
 def send(message, at_mobiles=[]):
     # 引用 settings里面配置的钉钉群消息通知的WebHook地址:
     webhook = settings.DINGTALK_WEB_HOOK
@@ -22,4 +26,8 @@ def send(message, at_mobiles=[]):
     # xiaoding = DingtalkChatbot(webhook, secret=secret)
 
     # Text消息@所有人
-    xiaoding.send_text(msg=('通知: %s' % message), at_mobiles=at_mobiles)
+    result = xiaoding.send_text(msg=('通知: %s' % message), at_mobiles=at_mobiles)
+    # 钉钉接口返回 errcode 非 0 表示发送失败
+    if not result or result.get('errcode'):
+        raise DingtalkError(result and result.get('errmsg') or 'empty response')
+    return result
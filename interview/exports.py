@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: exports
+# ========================================
+"""
+候选人数据的后台导出（全量 / 增量），给下游 HR 系统每晚同步使用
+    - 按 (modified_date, id) 的游标顺序读取，服务端分批迭代，不会把全部数据放进内存
+    - 每 CHUNK_ROWS 行写一个 gzip 压缩文件，先写临时文件再改名，文件写完后记录断点，中断后从断点继续
+    - 增量导出的范围是 (上一次成功导出的结束水位线, 本次开始时间 - EXPORT_WATERMARK_LAG_SECONDS]，
+      结束水位线在任务第一次启动时确定。modified_date 在 save() 时取值、提交时才可见，
+      水位线往前留出一段延迟（需要长于最长的写事务），避免导出时还没提交的修改被下一次增量跳过
+    - 增量只包含新增和修改，删除（例如 interview.dedup 合并重复候选人时删除的记录）不会出现在增量中，
+      下游需要定期用全量导出对账
+    - 全部完成后写 manifest.json
+    - 执行中的任务定期更新心跳，进程退出后心跳超过 STALE_SECONDS 的任务可以重新领取、从断点继续
+"""
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from interview.dedup import KEY_FIELDS
+from interview.models import Candidate, ExportJob
+
+logger = logging.getLogger(__name__)
+
+# 每个文件的行数，数据库每次读取的行数
+CHUNK_ROWS = 100000
+FETCH_SIZE = 2000
+# 心跳间隔，心跳超过该时间没有更新的执行中任务视为已经中断
+HEARTBEAT_SECONDS = 30
+STALE_SECONDS = 5 * 60
+
+
+def export_columns():
+    """
+    导出的列: 除去重字段外的所有字段，面试官导出用户名，简历导出ID
+    """
+    headers, columns = [], []
+    for field in Candidate._meta.concrete_fields:
+        if field.name in KEY_FIELDS:
+            continue
+        headers.append(field.name)
+        columns.append('%s__username' % field.name if field.related_model is User else field.attname)
+    return headers, columns
+
+
+def export_root():
+    return getattr(settings, 'EXPORT_ROOT', os.path.join(settings.BASE_DIR, 'exports'))
+
+
+def watermark_lag():
+    return timedelta(seconds=getattr(settings, 'EXPORT_WATERMARK_LAG_SECONDS', 300))
+
+
+def previous_watermark(job):
+    """
+    上一次成功导出的结束水位线
+    """
+    previous = ExportJob.objects.filter(status='done', pk__lt=job.pk).exclude(watermark_to=None) \
+        .order_by('-watermark_to').first()
+    return previous and previous.watermark_to
+
+
+def prepare(job):
+    """
+    任务第一次启动时确定导出范围和输出目录，之后断点续传沿用
+    """
+    if job.watermark_to is None:
+        job.watermark_to = timezone.now() - watermark_lag()
+        if job.mode == 'delta':
+            job.watermark_from = previous_watermark(job)
+        job.output_dir = os.path.join(export_root(), 'candidates-%s-%s-%s' % (
+            job.pk, job.mode, job.watermark_to.strftime('%Y%m%d%H%M%S')))
+    os.makedirs(job.output_dir, exist_ok=True)
+    job.status = 'running'
+    job.started_date = job.started_date or timezone.now()
+    job.heartbeat_date = timezone.now()
+    job.error = ''
+    job.save()
+
+
+def heartbeat(job):
+    job.heartbeat_date = timezone.now()
+    ExportJob.objects.filter(pk=job.pk).update(heartbeat_date=job.heartbeat_date)
+
+
+def resumable():
+    """
+    可以领取的任务: 等待中、失败，或者执行中但心跳已经超时
+    """
+    stale = timezone.now() - timedelta(seconds=STALE_SECONDS)
+    return Q(status__in=('pending', 'failed')) | \
+        Q(status='running') & (Q(heartbeat_date=None) | Q(heartbeat_date__lt=stale))
+
+
+def pending_rows(job):
+    queryset = Candidate.objects.filter(modified_date__lte=job.watermark_to)
+    if job.watermark_from is not None:
+        queryset = queryset.filter(modified_date__gt=job.watermark_from)
+    if job.cursor_id is not None:
+        queryset = queryset.filter(
+            Q(modified_date__gt=job.cursor_modified_date) |
+            Q(modified_date=job.cursor_modified_date, id__gt=job.cursor_id)
+        )
+    return queryset.order_by('modified_date', 'id')
+
+
+class ChunkWriter:
+    """
+    一个压缩文件，写完后原子改名
+    """
+
+    def __init__(self, job, headers):
+        self.path = os.path.join(job.output_dir, 'part-%05d.%s.gz' % (job.chunk_count + 1, job.format))
+        self.tmp_path = self.path + '.tmp'
+        self.headers = headers
+        self.format = job.format
+        self.file = io.TextIOWrapper(gzip.open(self.tmp_path, 'wb'), encoding='utf-8', newline='')
+        if self.format == 'csv':
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(headers)
+
+    def write(self, row):
+        if self.format == 'csv':
+            self.writer.writerow(row)
+        else:
+            self.file.write(json.dumps(dict(zip(self.headers, row)), cls=DjangoJSONEncoder, ensure_ascii=False))
+            self.file.write('\n')
+
+    def close(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+
+def write_manifest(job, headers):
+    manifest = {
+        'job': job.pk,
+        'mode': job.mode,
+        'format': job.format,
+        'watermark_from': job.watermark_from,
+        'watermark_to': job.watermark_to,
+        'rows': job.rows_written,
+        'columns': headers,
+        'files': sorted(name for name in os.listdir(job.output_dir) if name.startswith('part-')),
+    }
+    with open(os.path.join(job.output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2)
+
+
+def run(job, chunk_rows=CHUNK_ROWS, progress=None):
+    """
+    执行（或继续执行）导出任务
+    """
+    headers, columns = export_columns()
+    modified_index, id_index = columns.index('modified_date'), columns.index('id')
+    try:
+        prepare(job)
+        beat_at = time.monotonic()
+        while True:
+            rows = pending_rows(job).values_list(*columns)[:chunk_rows].iterator(chunk_size=FETCH_SIZE)
+            writer, count, last = None, 0, None
+            for row in rows:
+                if writer is None:
+                    writer = ChunkWriter(job, headers)
+                writer.write(row)
+                count += 1
+                last = row
+                if time.monotonic() - beat_at >= HEARTBEAT_SECONDS:
+                    heartbeat(job)
+                    beat_at = time.monotonic()
+            if writer is None:
+                break
+            writer.close()
+            job.chunk_count += 1
+            job.rows_written += count
+            job.cursor_modified_date, job.cursor_id = last[modified_index], last[id_index]
+            job.heartbeat_date = timezone.now()
+            job.save(update_fields=['chunk_count', 'rows_written', 'cursor_modified_date', 'cursor_id',
+                                    'heartbeat_date'])
+            beat_at = time.monotonic()
+            if progress:
+                progress(job)
+            if count < chunk_rows:
+                break
+        write_manifest(job, headers)
+    except Exception as e:
+        fail(job.pk, e)
+        raise
+    job.status = 'done'
+    job.finished_date = timezone.now()
+    job.save(update_fields=['status', 'finished_date'])
+    return job
+
+
+def fail(job_id, error):
+    logger.exception("export job %s failed", job_id)
+    ExportJob.objects.filter(pk=job_id).update(status='failed', error=repr(error))
+
+
+def claim(job_id):
+    """
+    把等待中、失败或者心跳超时的任务标记为执行中，正在执行的任务返回 None
+    """
+    if not ExportJob.objects.filter(resumable(), pk=job_id).update(status='running', heartbeat_date=timezone.now()):
+        return None
+    return ExportJob.objects.get(pk=job_id)
+
+
+def run_in_background(job_id):
+    """
+    管理后台触发的导出，在后台线程中执行
+    """
+    def target():
+        try:
+            job = claim(job_id)
+            if job is not None:
+                run(job)
+        except Exception as e:
+            # run 中的错误已经记录在任务上，这里处理领取任务时的错误
+            if not ExportJob.objects.filter(pk=job_id, status='failed').exists():
+                fail(job_id, e)
+        finally:
+            close_old_connections()
+
+    thread = threading.Thread(target=target, name='candidate-export-%s' % job_id, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: funnel
+# ========================================
+"""
+招聘漏斗统计的增量维护
+候选人加载时记录 城市、职位、各轮结果 的快照，保存时与新值比较，只对变化的统计行做 count +/- 1
+字段被延迟加载的候选人没有快照，保存前多读取一次修改前的值
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from interview.models import Candidate, FunnelStat
+
+# 面试轮次 -> 结果字段
+STAGE_FIELDS = (('first', 'first_result'), ('second', 'second_result'), ('hr', 'hr_result'))
+SNAPSHOT_FIELDS = ('city', 'apply_position') + tuple(field for _, field in STAGE_FIELDS)
+SNAPSHOT_ATTR = '_funnel_snapshot'
+
+
+def snapshot(candidate):
+    """
+    候选人当前的漏斗相关字段，字段被延迟加载时返回 None，避免额外查询
+    """
+    if candidate.get_deferred_fields() & set(SNAPSHOT_FIELDS):
+        return None
+    return tuple(getattr(candidate, field) for field in SNAPSHOT_FIELDS)
+
+
+def stat_keys(values):
+    city, apply_position = values[0], values[1]
+    return [(city, apply_position, stage, result) for (stage, _), result in zip(STAGE_FIELDS, values[2:])]
+
+
+def diff(old, new):
+    """
+    从旧快照变为新快照时，各统计行的变化量
+    """
+    deltas = Counter()
+    if old is not None:
+        deltas.subtract(stat_keys(old))
+    if new is not None:
+        deltas.update(stat_keys(new))
+    return deltas
+
+
+def apply_deltas(deltas):
+    """
+    把变化量写入统计表，已有的行用 F 表达式原子更新，没有的行新建
+    """
+    with transaction.atomic():
+        for (city, apply_position, stage, result), delta in deltas.items():
+            if not delta:
+                continue
+            lookup = dict(city=city, apply_position=apply_position, stage=stage, result=result)
+            if FunnelStat.objects.filter(**lookup).update(count=F('count') + delta):
+                continue
+            try:
+                with transaction.atomic():
+                    FunnelStat.objects.create(count=delta, **lookup)
+            except IntegrityError:
+                # 并发时其他请求已经建好了这一行
+                FunnelStat.objects.filter(**lookup).update(count=F('count') + delta)
+
+
+def load_snapshot(candidate):
+    """
+    快照不可用时（延迟加载），从数据库读取保存前的值
+    """
+    return Candidate.objects.filter(pk=candidate.pk).values_list(*SNAPSHOT_FIELDS).first()
+
+
+def prepare_save(candidate):
+    """
+    保存前调用: 加载时没有快照（字段被延迟加载）的已有候选人，先从数据库读取修改前的值，
+    否则保存后只能加上新值，无法减去旧值
+    """
+    if candidate.pk is not None and getattr(candidate, SNAPSHOT_ATTR, None) is None:
+        setattr(candidate, SNAPSHOT_ATTR, load_snapshot(candidate))
+
+
+def record_save(candidate, created):
+    old = None if created else getattr(candidate, SNAPSHOT_ATTR, None)
+    new = snapshot(candidate)
+    if new is None:
+        new = load_snapshot(candidate)
+    apply_deltas(diff(old, new))
+    setattr(candidate, SNAPSHOT_ATTR, new)
+
+
+def record_delete(candidate):
+    apply_deltas(diff(getattr(candidate, SNAPSHOT_ATTR, None) or load_snapshot(candidate), None))
+
+
+def record_bulk(created=(), updated=()):
+    """
+    批量写入后的统计，updated 中的对象需要是从数据库加载后再修改的，才有修改前的快照
+    """
+    deltas = Counter()
+    for candidate in created:
+        deltas.update(diff(None, snapshot(candidate)))
+    for candidate in updated:
+        new = snapshot(candidate)
+        deltas.update(diff(getattr(candidate, SNAPSHOT_ATTR, None), new))
+        setattr(candidate, SNAPSHOT_ATTR, new)
+    apply_deltas(deltas)
+
+
+def rebuild():
+    """
+    全量重建统计表，每一轮一条 GROUP BY 查询
+    """
+    stats = []
+    for stage, field in STAGE_FIELDS:
+        rows = Candidate.objects.order_by().values('city', 'apply_position', field).annotate(total=Count('id'))
+        stats.extend(
+            FunnelStat(city=row['city'], apply_position=row['apply_position'], stage=stage, result=row[field],
+                       count=row['total'])
+            for row in rows
+        )
+    with transaction.atomic():
+        FunnelStat.objects.all().delete()
+        FunnelStat.objects.bulk_create(stats, batch_size=1000)
+    return len(stats)
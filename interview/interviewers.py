@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: interviewers
+# ========================================
+"""
+候选人管理后台的面试官选择和筛选
+    - 可选的面试官只有 interviewer / hr 组的活跃用户，列表跨请求缓存，组成员或用户变化时由 interview.signals 失效，
+      同一个请求内只读取一次缓存；和角色缓存一样，只在共享缓存上跨请求缓存，见 interview.roles.cross_request_cache
+    - 行内编辑和详情页使用自动补全控件，页面上只渲染已选中的面试官，不再为每一行输出所有用户的 <select>，
+      渲染和校验都使用缓存的列表，不按行查询用户
+    - 右侧的面试官筛选只列出该列中出现过的用户，hr 看到的列表按列缓存
+"""
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.urls import reverse
+
+from interview.roles import cross_request_cache, get_role
+
+INTERVIEWER_GROUPS = ('interviewer', 'hr')
+INTERVIEWER_FIELDS = ('first_interviewer_user', 'second_interviewer_user', 'hr_interviewer_user')
+
+CHOICES_CACHE_KEY = 'recruitment:interviewers:choices'
+CHOICES_CACHE_TIMEOUT = 60 * 10
+FILTER_CACHE_KEY = 'recruitment:interviewers:filter:%s'
+FILTER_CACHE_TIMEOUT = 60
+
+# 挂在 request 上的属性名，同一个请求内复用
+REQUEST_ATTR = '_interviewer_choices'
+
+# 自动补全每页返回的条数
+AUTOCOMPLETE_PAGE_SIZE = 20
+
+
+def interviewer_queryset():
+    return User.objects.filter(groups__name__in=INTERVIEWER_GROUPS, is_active=True).distinct()
+
+
+def load_choices():
+    """
+    [(用户ID, 用户名)]，按用户名排序，优先读取跨请求缓存
+    """
+    shared = cross_request_cache()
+    choices = cache.get(CHOICES_CACHE_KEY) if shared else None
+    if choices is None:
+        choices = list(interviewer_queryset().order_by('username').values_list('pk', 'username'))
+        if shared:
+            cache.set(CHOICES_CACHE_KEY, choices, CHOICES_CACHE_TIMEOUT)
+    return choices
+
+
+def get_choices(request):
+    choices = getattr(request, REQUEST_ATTR, None)
+    if choices is None:
+        choices = load_choices()
+        setattr(request, REQUEST_ATTR, choices)
+    return choices
+
+
+def invalidate_choices():
+    cache.delete(CHOICES_CACHE_KEY)
+
+
+def invalidate_filters():
+    cache.delete_many([FILTER_CACHE_KEY % field for field in INTERVIEWER_FIELDS])
+
+
+class InterviewerChoiceField(forms.ModelChoiceField):
+    """
+    使用缓存的面试官列表校验，不按行查询用户
+    只限制新选择的面试官：候选人当前的面试官即使已经离开面试官组，也可以原样保存，
+    当前值由 InterviewerForm 写入 current_pk
+    """
+
+    def __init__(self, *args, interviewer_choices=(), **kwargs):
+        self.interviewer_names = dict(interviewer_choices)
+        self.current_pk = None
+        super().__init__(*args, **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            pk = int(value)
+        except (TypeError, ValueError):
+            raise forms.ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+        if pk not in self.interviewer_names and pk != self.current_pk:
+            raise forms.ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+        # 外键赋值只需要主键
+        return User(pk=pk, username=self.interviewer_names.get(pk, ''))
+
+
+class InterviewerForm(forms.ModelForm):
+    """
+    把实例当前的面试官写入各个 InterviewerChoiceField，详情页和行内编辑都使用这个表单
+    self.fields 是每个表单实例各自的副本，不会互相影响
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, field in self.fields.items():
+            if isinstance(field, InterviewerChoiceField):
+                field.current_pk = self.initial.get(name)
+
+
+class InterviewerAutocompleteSelect(AutocompleteSelect):
+    """
+    自动补全选择面试官，数据来自 CandidateAdmin 的 interviewer-autocomplete 接口
+    """
+
+    def __init__(self, rel, admin_site, interviewer_choices=(), attrs=None):
+        super().__init__(rel, admin_site, attrs=attrs)
+        self.interviewer_names = dict(interviewer_choices)
+
+    def get_url(self):
+        return reverse('%s:interview_candidate_interviewer_autocomplete' % self.admin_site.name)
+
+    def optgroups(self, name, value, attr=None):
+        """
+        只输出已选中的面试官，名字从缓存的列表中取，已经不在面试官组中的用户才查询一次
+        """
+        default = (None, [], 0)
+        selected = [int(v) for v in value if v not in (None, '', 'None')]
+        names = dict(self.interviewer_names)
+        missing = [pk for pk in selected if pk not in names]
+        if missing:
+            names.update(User.objects.filter(pk__in=missing).values_list('pk', 'username'))
+        if not self.is_required:
+            default[1].append(self.create_option(name, '', '', False, 0))
+        for index, pk in enumerate(selected, start=1):
+            default[1].append(self.create_option(name, pk, names.get(pk, pk), True, index))
+        return [default]
+
+
+def autocomplete_view(request):
+    """
+    select2 格式的面试官搜索结果，在缓存的列表中按用户名过滤
+    """
+    term = request.GET.get('term', '').strip().lower()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    matched = [(pk, username) for pk, username in get_choices(request) if term in username.lower()]
+    start = (page - 1) * AUTOCOMPLETE_PAGE_SIZE
+    return JsonResponse({
+        'results': [{'id': str(pk), 'text': username} for pk, username in matched[start:start + AUTOCOMPLETE_PAGE_SIZE]],
+        'pagination': {'more': start + AUTOCOMPLETE_PAGE_SIZE < len(matched)},
+    })
+
+
+class InterviewerListFilter(admin.RelatedOnlyFieldListFilter):
+    """
+    只列出该列中出现过的面试官
+    hr 看到所有候选人，列表按列缓存，通过外键索引取出不重复的用户ID；面试官只看到自己的候选人，直接计算
+    """
+
+    def field_choices(self, field, request, model_admin):
+        if not get_role(request).sees_all_candidates:
+            return super().field_choices(field, request, model_admin)
+        shared = cross_request_cache()
+        key = FILTER_CACHE_KEY % self.field_path
+        choices = cache.get(key) if shared else None
+        if choices is None:
+            user_ids = model_admin.model.objects.order_by().exclude(**{self.field_path: None}) \
+                .values_list(self.field_path, flat=True).distinct()
+            choices = list(User.objects.filter(pk__in=user_ids).order_by('username').values_list('pk', 'username'))
+            if shared:
+                cache.set(key, choices, FILTER_CACHE_TIMEOUT)
+        return choices
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: backfill_candidate_resumes
+# ========================================
+import time
+
+from django.core.management import BaseCommand
+
+from interview.performance import track
+from interview.services import backfill_resumes
+
+# run command to link existing candidates to their latest resume
+# python manage.py backfill_candidate_resumes
+# python manage.py backfill_candidate_resumes --all
+
+
+class Command(BaseCommand):
+    help = '存量候选人关联同一手机号最新的简历，需要先执行 detect_duplicates 补齐规范化手机号'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='重新计算所有候选人，默认只处理还没有简历的候选人')
+
+    def handle(self, *args, **kwargs):
+        started = time.monotonic()
+        with track('command:backfill_candidate_resumes'):
+            count = backfill_resumes(only_missing=not kwargs['all'])
+        self.stdout.write(self.style.SUCCESS('已处理 %s 位候选人, 耗时 %.2fs' % (count, time.monotonic() - started)))
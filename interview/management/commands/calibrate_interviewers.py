@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: calibrate_interviewers
+# ========================================
+import time
+
+from django.core.management import BaseCommand
+
+from interview import analytics
+from interview.performance import track
+
+# run command to compute the calibrated first/second round scores of all candidates
+# python manage.py calibrate_interviewers
+# python manage.py calibrate_interviewers --dry-run --show
+
+
+class Command(BaseCommand):
+    help = '按面试官的打分习惯计算所有候选人的一面、二面校准分并批量回写，打分分析报表在管理后台的候选人列表页查看'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='只计算，不回写')
+        parser.add_argument('--show', action='store_true', help='输出每个面试官的打分分布')
+
+    def handle(self, *args, **kwargs):
+        started = time.monotonic()
+        with track('command:calibrate_interviewers'):
+            if kwargs['show']:
+                table = analytics.load()
+                self.stdout.write('已读取 %s 名候选人, 耗时 %.2fs' % (len(table), time.monotonic() - started))
+                for stage in analytics.ROUNDS:
+                    self.stdout.write(analytics.ROUND_NAMES[stage])
+                    for row in analytics.interviewer_stats(table, stage):
+                        self.stdout.write('  %-20s 人数 %6d  平均分 %.2f  标准差 %.2f  偏差 %+.2f' % (
+                            row['username'], row['count'], row['mean'], row['std'], row['offset']))
+            count, updated = analytics.run_calibration(dry_run=kwargs['dry_run'])
+        self.stdout.write(self.style.SUCCESS('已计算 %s 名候选人的校准分, 更新 %s 行, 总耗时 %.2fs' % (
+            count, updated, time.monotonic() - started)))
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: deliver_notifications
+# ========================================
+import time
+
+from django.core.management import BaseCommand
+
+from interview.outbox import RateLimiter, deliver_due, get_setting
+
+# run command to deliver dingtalk notifications
+# python manage.py deliver_notifications            # 常驻，轮询投递
+# python manage.py deliver_notifications --once     # 投递一次后退出，可以配合 crontab
+# thread 方式的投递线程随 recruitment.wsgi 启动，没有 web 进程或者 web 进程不加载 recruitment.wsgi 时需要常驻运行该命令，
+# 多个进程同时投递时共享每分钟的发送限额
+
+
+class Command(BaseCommand):
+    help = '投递钉钉发件箱中到期的通知'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='投递一次后退出')
+        parser.add_argument('--interval', type=float, default=5, help='轮询间隔（秒）')
+
+    def handle(self, *args, **kwargs):
+        limiter = RateLimiter(get_setting('DINGTALK_RATE_LIMIT_PER_MINUTE', 20))
+        while True:
+            sent = deliver_due(limiter)
+            if sent:
+                self.stdout.write('已发送 %s 条通知' % sent)
+            if kwargs['once']:
+                return
+            time.sleep(kwargs['interval'])
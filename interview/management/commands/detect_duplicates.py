@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: detect_duplicates
+# ========================================
+import time
+
+from django.core.management import BaseCommand
+
+from interview import dedup
+from interview.models import Candidate
+from interview.performance import track
+from jobs.models import Resume
+
+# run command to find duplicate candidates in the whole table
+# python manage.py detect_duplicates
+# python manage.py detect_duplicates --skip-backfill
+
+
+class Command(BaseCommand):
+    help = '补齐存量候选人和简历的去重字段，然后全量检测疑似重复的候选人，结果在管理后台的"重复候选人"中确认'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skip-backfill', action='store_true', help='不补齐去重字段')
+
+    def handle(self, *args, **kwargs):
+        started = time.monotonic()
+        with track('command:detect_duplicates'):
+            if not kwargs['skip_backfill']:
+                for model in (Candidate, Resume):
+                    count = dedup.fill_missing_keys(model)
+                    self.stdout.write('%s: 补齐 %s 行去重字段, 耗时 %.2fs' % (
+                        model._meta.verbose_name, count, time.monotonic() - started))
+
+            def progress(field, count):
+                self.stdout.write('%s: 已发现 %s 对, 耗时 %.2fs' % (field, count, time.monotonic() - started))
+
+            count = dedup.detect_all(progress)
+        self.stdout.write(self.style.SUCCESS('检测完成: 发现 %s 对疑似重复的候选人, 总耗时 %.2fs' % (
+            count, time.monotonic() - started)))
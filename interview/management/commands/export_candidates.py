@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: export_candidates
+# ========================================
+from django.core.management import BaseCommand, CommandError
+
+from interview import exports
+from interview.models import ExportJob
+from interview.performance import track
+
+# run command to export candidates for downstream systems (nightly)
+# python manage.py export_candidates --mode delta --format csv
+# python manage.py export_candidates --resume 12
+
+
+class Command(BaseCommand):
+    help = '导出候选人数据到压缩文件，增量导出只包含上一次成功导出之后修改过的候选人，中断后可以用 --resume 继续'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=('full', 'delta'), default='delta')
+        parser.add_argument('--format', choices=('csv', 'jsonl'), default='csv')
+        parser.add_argument('--resume', type=int, help='继续执行中断或失败的导出任务')
+        parser.add_argument('--chunk-rows', type=int, default=exports.CHUNK_ROWS, help='每个文件的行数')
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            try:
+                job = ExportJob.objects.get(pk=options['resume'])
+            except ExportJob.DoesNotExist:
+                raise CommandError('导出任务 %s 不存在' % options['resume'])
+            if job.status == 'done':
+                raise CommandError('导出任务 %s 已经完成' % job.pk)
+        else:
+            job = ExportJob.objects.create(mode=options['mode'], format=options['format'], created_by='command')
+        # 执行中的任务心跳超时后才能继续，避免和仍在运行的进程同时写同一个目录
+        job_id, job = job.pk, exports.claim(job.pk)
+        if job is None:
+            raise CommandError('导出任务 %s 正在执行' % job_id)
+
+        def progress(job):
+            self.stdout.write('%s: 已写入 %s 个文件, %s 行' % (job.pk, job.chunk_count, job.rows_written))
+
+        with track('command:export_candidates', mode=job.mode):
+            try:
+                exports.run(job, chunk_rows=options['chunk_rows'], progress=progress)
+            except Exception as e:
+                raise CommandError('导出任务 %s 失败: %r, 可以使用 --resume %s 继续' % (job.pk, e, job.pk))
+        self.stdout.write(self.style.SUCCESS('导出任务 %s 完成, 共 %s 行, 输出目录 %s' % (
+            job.pk, job.rows_written, job.output_dir)))
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: generate_recruitment_data
+# ========================================
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from interview.dedup import fill_keys
+from interview.ranking import fill_composite
+from interview.models import FIRST_INTERVIEW_RESULT_TYPE, HR_SCORE_TYPE, INTERVIEW_RESULT_TYPE, Candidate
+from interview.services import RESUME_TO_CANDIDATE_FIELDS
+from jobs.models import DEGREE_TYPE, Cities, Job, JobTypes, Resume
+
+# run command to generate synthetic data for benchmarks
+# python manage.py generate_recruitment_data --scale 100k --seed 2020
+# 生成的用户密码都是 recruitment
+
+SCALES = {
+    '1k': 1000,
+    '100k': 100000,
+    '1m': 1000000,
+}
+
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈'
+GIVEN_NAMES = '伟芳娜秀英敏静丽强磊军洋勇艳杰娟涛明超秀兰霞平刚桂英华玉萍红娥玲芬燕彬鹏辉宇浩然子轩一诺欣怡梓涵'
+SCHOOLS = (
+    '北京大学', '清华大学', '复旦大学', '上海交通大学', '浙江大学', '南京大学', '中国科学技术大学', '武汉大学', '华中科技大学',
+    '中山大学', '西安交通大学', '哈尔滨工业大学', '北京航空航天大学', '同济大学', '南开大学', '天津大学', '东南大学',
+    '厦门大学', '四川大学', '电子科技大学', '华南理工大学', '北京邮电大学', '西北工业大学', '山东大学', '吉林大学',
+)
+MAJORS = ('计算机科学与技术', '软件工程', '电子信息工程', '通信工程', '自动化', '数学与应用数学', '统计学', '工业设计',
+          '市场营销', '工商管理', '新闻传播学', '人工智能')
+POSITIONS = ('后端开发工程师', '前端开发工程师', '算法工程师', '测试开发工程师', '产品经理', '运营专员', '交互设计师',
+             '市场专员', '数据分析师')
+CITY_NAMES = [name for _, name in Cities]
+FIRST_RESULTS = [value for value, _ in FIRST_INTERVIEW_RESULT_TYPE] + ['']
+RESULTS = [value for value, _ in INTERVIEW_RESULT_TYPE] + ['']
+HR_SCORES = [value for value, _ in HR_SCORE_TYPE]
+DEGREES = [value for value, _ in DEGREE_TYPE]
+PASSWORD = 'recruitment'
+
+
+class Command(BaseCommand):
+    help = '按固定随机种子生成职位、简历、候选人和面试官数据，用于性能测试'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', default='1k', help='数据规模: 1k / 100k / 1m 或者具体的简历数量')
+        parser.add_argument('--seed', type=int, default=2020)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **kwargs):
+        scale = kwargs['scale'].lower()
+        try:
+            self.resume_count = SCALES[scale] if scale in SCALES else int(scale)
+        except ValueError:
+            raise CommandError('无效的数据规模: %s' % scale)
+        self.seed = kwargs['seed']
+        self.random = random.Random(self.seed)
+        self.batch_size = kwargs['batch_size']
+        self.now = timezone.now()
+        started = time.monotonic()
+
+        with transaction.atomic():
+            interviewers, hrs = self.create_users()
+            self.create_jobs()
+            # 本次生成的简历ID都大于它，同一个库多次生成时候选人只关联本次的简历
+            last_resume_id = Resume.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+            self.create_resumes()
+            self.create_candidates(interviewers, hrs, last_resume_id)
+
+        self.stdout.write(self.style.SUCCESS('数据生成完成，耗时 %.2fs，请执行 rebuild_search_index 和 rebuild_funnel 生成索引和统计' % (
+            time.monotonic() - started)))
+
+    def log(self, model, count, started):
+        self.stdout.write('%s: %s 行, %.2fs' % (model.__name__, count, time.monotonic() - started))
+
+    def phone(self, i):
+        return '1%02d%08d' % (30 + i % 60, i)
+
+    def name(self):
+        return self.random.choice(SURNAMES) + ''.join(
+            self.random.choice(GIVEN_NAMES) for _ in range(self.random.choice((1, 2, 2))))
+
+    def score(self, low, high):
+        if self.random.random() < 0.2:
+            return None
+        return Decimal('%.1f' % self.random.uniform(low, high))
+
+    def bulk_create(self, model, objs):
+        started = time.monotonic()
+        model.objects.bulk_create(objs, batch_size=self.batch_size)
+        self.log(model, len(objs), started)
+
+    def create_users(self):
+        """
+        面试官和hr，用户名带上随机种子和已有用户数作为前缀，在同一个库里多次生成不会冲突
+        """
+        prefix = 'bench%s_%s' % (self.seed, User.objects.count())
+        password = make_password(PASSWORD)
+        interviewer_count = max(5, self.resume_count // 200)
+        hr_count = max(2, interviewer_count // 20)
+        users = [
+            User(username='%s_interviewer_%s' % (prefix, i), password=password, is_staff=True)
+            for i in range(interviewer_count)
+        ] + [
+            User(username='%s_hr_%s' % (prefix, i), password=password, is_staff=True)
+            for i in range(hr_count)
+        ]
+        self.bulk_create(User, users)
+        interviewers = list(User.objects.filter(username__startswith='%s_interviewer_' % prefix))
+        hrs = list(User.objects.filter(username__startswith='%s_hr_' % prefix))
+        interviewer_group, _ = Group.objects.get_or_create(name='interviewer')
+        hr_group, _ = Group.objects.get_or_create(name='hr')
+        interviewer_group.user_set.add(*interviewers)
+        hr_group.user_set.add(*hrs)
+        return interviewers, hrs
+
+    def create_jobs(self):
+        job_count = min(max(10, self.resume_count // 1000), 500)
+        self.bulk_create(Job, [
+            Job(
+                job_type=self.random.choice(JobTypes)[0],
+                job_name='%s-%s' % (self.random.choice(POSITIONS), i),
+                job_city=self.random.choice(Cities)[0],
+                job_responsibility='负责%s相关工作。' % self.random.choice(POSITIONS) * 5,
+                job_requirement='熟悉%s，有良好的沟通能力。' % self.random.choice(MAJORS) * 5,
+                created_date=self.now,
+                modified_date=self.now,
+            )
+            for i in range(job_count)
+        ])
+
+    def create_resumes(self):
+        started = time.monotonic()
+        resumes = []
+        for i in range(self.resume_count):
+            modified = self.now - timedelta(minutes=self.random.randrange(60 * 24 * 180))
+            resumes.append(fill_keys(Resume(
+                username=self.name(),
+                city=self.random.choice(CITY_NAMES),
+                phone=self.phone(i),
+                email='user%s@example.com' % i,
+                apply_position=self.random.choice(POSITIONS),
+                gender=self.random.choice(('男', '女')),
+                bachelor_school=self.random.choice(SCHOOLS),
+                master_school=self.random.choice(SCHOOLS) if self.random.random() < 0.4 else '',
+                major=self.random.choice(MAJORS),
+                degree=self.random.choice(DEGREES),
+                created_date=modified,
+                modified_date=modified,
+                candidate_introduction='热爱技术，学习能力强。' * 3,
+                work_experience='在%s实习，负责%s。' % (self.random.choice(SCHOOLS), self.random.choice(POSITIONS)),
+                project_experience='参与%s项目开发。' % self.random.choice(MAJORS) * 2,
+            )))
+            if len(resumes) >= self.batch_size:
+                Resume.objects.bulk_create(resumes)
+                resumes = []
+        Resume.objects.bulk_create(resumes)
+        self.log(Resume, self.resume_count, started)
+
+    def create_candidates(self, interviewers, hrs, last_resume_id):
+        """
+        约 60% 的简历进入面试流程，和 convert_resumes 一样复制简历的身份信息并关联简历，按面试进度填写各轮结果
+        bulk_create 在 SQLite 上不回填主键，简历ID按主键顺序从库中读回
+        """
+        started = time.monotonic()
+        candidates, count = [], 0
+        resume_fields = list(RESUME_TO_CANDIDATE_FIELDS)
+        resumes = Resume.objects.filter(pk__gt=last_resume_id).order_by('pk') \
+            .values('id', *resume_fields).iterator(chunk_size=self.batch_size)
+        for values in resumes:
+            if self.random.random() >= 0.6:
+                continue
+            first_result = self.random.choice(FIRST_RESULTS)
+            second_result = self.random.choice(RESULTS) if first_result == '建议复试' else ''
+            hr_result = self.random.choice(RESULTS) if second_result == '建议录用' else ''
+            candidates.append(fill_composite(fill_keys(Candidate(
+                resume_id=values['id'],
+                **{RESUME_TO_CANDIDATE_FIELDS[field]: values[field] for field in resume_fields},
+                test_score_of_general_ability=self.score(40, 99),
+                paper_score=self.score(40, 99),
+                first_score=self.score(1, 5) if first_result else None,
+                first_learning_ability=self.score(1, 5) if first_result else None,
+                first_professional_competency=self.score(1, 5) if first_result else None,
+                first_result=first_result,
+                first_interviewer_user=self.random.choice(interviewers),
+                second_score=self.score(1, 5) if second_result else None,
+                second_pressure_score=self.score(1, 5) if second_result else None,
+                second_result=second_result,
+                second_interviewer_user=self.random.choice(interviewers) if first_result == '建议复试' else None,
+                hr_score=self.random.choice(HR_SCORES) if hr_result else '',
+                hr_result=hr_result,
+                hr_interviewer_user=self.random.choice(hrs) if hr_result else None,
+                creator='generate_recruitment_data',
+            ))))
+            count += 1
+            if len(candidates) >= self.batch_size:
+                Candidate.objects.bulk_create(candidates)
+                candidates = []
+        Candidate.objects.bulk_create(candidates)
+        self.log(Candidate, count, started)
@@ -5,34 +5,195 @@
 # FILE: import_candidates
 # ========================================
 import csv
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
 from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from interview.dedup import KEY_FIELDS, fill_keys, normalize_phone
+from interview.ranking import fill_composite
 from interview.models import Candidate
+from interview.performance import track
+from interview.signals import post_bulk_save
 
 # run command to import candidates
 # python manage.py import_candidates --path /path/to/your/file.csv
+# python manage.py import_candidates --path /path/to/your/file.csv --batch-size 5000 --key phone --dry-run
+
+# csv 文件的列顺序，第 9 列 userid 可选
+IMPORT_FIELDS = (
+    'username', 'city', 'phone', 'bachelor_school', 'major', 'degree', 'test_score_of_general_ability', 'paper_score')
+DECIMAL_FIELDS = ('test_score_of_general_ability', 'paper_score')
+UPDATE_FIELDS = IMPORT_FIELDS + ('modified_date', 'composite_score') + KEY_FIELDS
+
+# 按手机号判断是否已存在时，使用有索引的规范化手机号 phone_key 查询
+LOOKUP_FIELDS = {'phone': 'phone_key', 'userid': 'userid'}
+
+# 查询已存在候选人时每条 SQL 的参数个数
+LOOKUP_CHUNK_SIZE = 500
+
+# 最多展示的被拒绝行数
+MAX_REJECTED_REPORT = 20
+
+
+class RowError(ValueError):
+    pass
+
+
+def parse_row(row):
+    """
+    把 csv 的一行转换成字段字典，不合法时抛出 RowError
+    """
+    if len(row) < len(IMPORT_FIELDS):
+        raise RowError('列数不足: %s' % len(row))
+    values = {field: value.strip() for field, value in zip(IMPORT_FIELDS, row)}
+    if not values['username'] or not values['phone']:
+        raise RowError('姓名或手机号码为空')
+    for field in DECIMAL_FIELDS:
+        if not values[field]:
+            values[field] = None
+            continue
+        try:
+            values[field] = Decimal(values[field])
+        except InvalidOperation:
+            raise RowError('%s 不是数字: %s' % (field, values[field]))
+    if len(row) > len(IMPORT_FIELDS) and row[len(IMPORT_FIELDS)].strip():
+        try:
+            values['userid'] = int(row[len(IMPORT_FIELDS)])
+        except ValueError:
+            raise RowError('userid 不是整数: %s' % row[len(IMPORT_FIELDS)])
+    return values
 
 
 class Command(BaseCommand):
-    help = '从一个csv文件的内容中读取候选人列表，导入到数据库中'
+    help = '从一个csv文件的内容中读取候选人列表，按批次批量导入(新增或更新)到数据库中'
 
     def add_arguments(self, parser):
-        parser.add_argument('--path', type=str)
+        parser.add_argument('--path', type=str, required=True)
+        parser.add_argument('--encoding', type=str, default='GBK')
+        parser.add_argument('--delimiter', type=str, default=';')
+        parser.add_argument('--batch-size', type=int, default=2000, help='每批次处理的行数')
+        parser.add_argument('--key', choices=('phone', 'userid'), default='phone', help='判断候选人是否已存在的字段')
+        parser.add_argument('--dry-run', action='store_true', help='只校验和统计，不写入数据库')
 
     def handle(self, *args, **kwargs):
-        path = kwargs['path']
-
-        with open(path, 'r', encoding='GBK') as f:
-            reader = csv.reader(f, dialect='excel', delimiter=';')
-            for row in reader:
-
-                candidate, created = Candidate.objects.get_or_create(
-                    username=row[0],
-                    city=row[1],
-                    phone=row[2],
-                    bachelor_school=row[3],
-                    major=row[4],
-                    degree=row[5],
-                    test_score_of_general_ability=row[6],
-                    paper_score=row[7]
-                )
-                print(candidate, created)
+        self.key = kwargs['key']
+        self.dry_run = kwargs['dry_run']
+        batch_size = kwargs['batch_size']
+        self.created = self.updated = 0
+        self.rejected = []
+        started = time.monotonic()
+
+        with track('command:import_candidates', dry_run=self.dry_run) as record, \
+                open(kwargs['path'], 'r', encoding=kwargs['encoding'], newline='') as f:
+            reader = enumerate(csv.reader(f, dialect='excel', delimiter=kwargs['delimiter']), start=1)
+            batch_no = 0
+            while True:
+                chunk = list(islice(reader, batch_size))
+                if not chunk:
+                    break
+                batch_no += 1
+                batch_started = time.monotonic()
+                created, updated = self.import_batch(chunk)
+                elapsed = time.monotonic() - batch_started
+                self.stdout.write('批次 %s: 新增 %s, 更新 %s, 耗时 %.2fs, %.0f 行/秒' % (
+                    batch_no, created, updated, elapsed, len(chunk) / elapsed if elapsed else 0))
+            record.extra.update(created=self.created, updated=self.updated, rejected=len(self.rejected))
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS('%s完成: 新增 %s, 更新 %s, 拒绝 %s, 总耗时 %.2fs' % (
+            '校验(dry-run)' if self.dry_run else '导入', self.created, self.updated, len(self.rejected), elapsed)))
+        for line_no, reason in self.rejected[:MAX_REJECTED_REPORT]:
+            self.stdout.write(self.style.WARNING('第 %s 行被拒绝: %s' % (line_no, reason)))
+        if len(self.rejected) > MAX_REJECTED_REPORT:
+            self.stdout.write(self.style.WARNING('... 另有 %s 行被拒绝' % (len(self.rejected) - MAX_REJECTED_REPORT)))
+
+    def lookup_key(self, values):
+        if self.key == 'phone':
+            return normalize_phone(values['phone']) or None
+        return values.get('userid')
+
+    def find_existing(self, keys):
+        """
+        按去重字段查出已存在的候选人，分段查询避免超出数据库的参数个数限制
+        同一个规范化手机号有多条记录时（尚未合并的重复候选人）更新最早的一条
+        """
+        field = LOOKUP_FIELDS[self.key]
+        existing = {}
+        for i in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            lookup = {'%s__in' % field: keys[i:i + LOOKUP_CHUNK_SIZE]}
+            for candidate in Candidate.objects.filter(**lookup).order_by('id'):
+                existing.setdefault(getattr(candidate, field), candidate)
+        return existing
+
+    def find_userid_owners(self, userids):
+        """
+        {userid: 候选人ID}，按手机号导入时用来检查 userid 是否已经属于其他候选人
+        """
+        owners = {}
+        for i in range(0, len(userids), LOOKUP_CHUNK_SIZE):
+            chunk = userids[i:i + LOOKUP_CHUNK_SIZE]
+            owners.update(Candidate.objects.filter(userid__in=chunk).values_list('userid', 'pk'))
+        return owners
+
+    def import_batch(self, chunk):
+        """
+        一个批次：一次查询已存在的候选人，然后一次 bulk_create + 一次 bulk_update，放在同一个事务里
+        """
+        rows = {}
+        for line_no, row in chunk:
+            try:
+                values = parse_row(row)
+            except RowError as e:
+                self.rejected.append((line_no, str(e)))
+                continue
+            key = self.lookup_key(values)
+            if key is None:
+                self.rejected.append((line_no, '缺少去重字段 %s' % self.key))
+                continue
+            # 同一批次中重复的行，以最后一行为准
+            rows[key] = (line_no, values)
+
+        existing = self.find_existing(list(rows))
+        owners = {}
+        if self.key == 'phone':
+            owners = self.find_userid_owners([values['userid'] for _, values in rows.values() if 'userid' in values])
+        to_create, to_update = [], []
+        # 本批次中已经使用的 userid，新增的候选人还没有主键，用行号区分
+        claimed = {}
+        now = timezone.now()
+        for key, (line_no, values) in rows.items():
+            candidate = existing.get(key)
+            if 'userid' in values and self.key == 'phone':
+                owner = candidate.pk if candidate is not None else ('line', line_no)
+                userid = values['userid']
+                if owners.get(userid, owner) != owner or claimed.get(userid, owner) != owner:
+                    self.rejected.append((line_no, 'userid %s 已属于其他候选人' % userid))
+                    continue
+                claimed[userid] = owner
+            if candidate is None:
+                to_create.append(fill_composite(fill_keys(Candidate(**values))))
+                continue
+            for field, value in values.items():
+                setattr(candidate, field, value)
+            fill_keys(candidate)
+            fill_composite(candidate)
+            candidate.modified_date = now
+            to_update.append(candidate)
+
+        if not self.dry_run:
+            update_fields = UPDATE_FIELDS + (('userid', ) if self.key == 'phone' else ())
+            with transaction.atomic():
+                Candidate.objects.bulk_create(to_create)
+                Candidate.objects.bulk_update(to_update, update_fields)
+                post_bulk_save.send(
+                    sender=Candidate,
+                    queryset=Candidate.objects.filter(**{'%s__in' % LOOKUP_FIELDS[self.key]: list(rows)}),
+                    created=to_create, updated=to_update)
+
+        self.created += len(to_create)
+        self.updated += len(to_update)
+        return len(to_create), len(to_update)
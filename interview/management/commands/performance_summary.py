@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: performance_summary
+# ========================================
+import glob
+import json
+import os
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from interview.performance import LOG_PREFIX
+
+# run command to summarize recruitment.performance.log
+# python manage.py performance_summary
+# python manage.py performance_summary --sort p99 --top 20 --json
+# 滚动出去的历史文件（.1 .2 ...）一起汇总；抽样记录的请求按抽样率加权
+# 日志中只有慢请求时（PERFORMANCE_LOG_LEVEL=WARNING）百分位没有意义，只输出条数和最大值
+
+
+def percentile(values, p):
+    """
+    加权的最近秩法计算百分位，values 是按耗时排序的 [(耗时, 权重)]
+    """
+    rank = p / 100.0 * sum(weight for _, weight in values)
+    total = 0
+    for value, weight in values:
+        total += weight
+        if total >= rank:
+            return value
+    return values[-1][0]
+
+
+def read_lines(path):
+    with open(path, encoding='utf-8', errors='replace') as f:
+        yield from f
+
+
+def summarize(lines):
+    endpoints = defaultdict(lambda: {'wall_ms': [], 'queries': [], 'slow': 0, 'max_bytes': 0})
+    for line in lines:
+        position = line.find(LOG_PREFIX + '{')
+        if position < 0:
+            continue
+        try:
+            data = json.loads(line[position + len(LOG_PREFIX):])
+        except ValueError:
+            continue
+        name = data['endpoint']
+        if data.get('action'):
+            name = '%s [%s]' % (name, data['action'])
+        stats = endpoints[name]
+        weight = 1.0 / (data.get('sample') or 1)
+        stats['wall_ms'].append((data['wall_ms'], weight))
+        stats['queries'].append((data['queries'], weight))
+        stats['slow'] += bool(data.get('slow'))
+        stats['max_bytes'] = max(stats['max_bytes'], data.get('bytes') or 0)
+
+    summary = []
+    for name, stats in endpoints.items():
+        wall = sorted(stats['wall_ms'])
+        count = sum(weight for _, weight in wall)
+        summary.append({
+            'endpoint': name,
+            'count': int(round(count)),
+            'logged': len(wall),
+            'p50': percentile(wall, 50),
+            'p95': percentile(wall, 95),
+            'p99': percentile(wall, 99),
+            'max': wall[-1][0],
+            'avg_queries': round(sum(queries * weight for queries, weight in stats['queries']) / count, 1),
+            'max_queries': max(queries for queries, _ in stats['queries']),
+            'slow': stats['slow'],
+            'max_bytes': stats['max_bytes'],
+        })
+    return summary
+
+
+def slow_only(summary):
+    """
+    日志中的记录是否全部是慢请求
+    """
+    return bool(summary) and all(item['slow'] == item['logged'] for item in summary)
+
+
+class Command(BaseCommand):
+    help = '按接口汇总性能日志，输出 p50/p95/p99 耗时和 SQL 条数'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', type=str, default=settings.PERFORMANCE_LOG_FILE, help='性能日志文件')
+        parser.add_argument('--sort', choices=('count', 'p50', 'p95', 'p99', 'max', 'avg_queries', 'slow'),
+                            default='p95')
+        parser.add_argument('--top', type=int, default=30)
+        parser.add_argument('--json', action='store_true', help='输出 json')
+
+    def handle(self, *args, **kwargs):
+        paths = sorted(glob.glob(glob.escape(kwargs['log']) + '.[0-9]*')) + [kwargs['log']]
+        paths = [path for path in paths if os.path.exists(path)]
+        if not paths:
+            raise CommandError('性能日志不存在: %s' % kwargs['log'])
+        summary = summarize(line for path in paths for line in read_lines(path))
+        summary.sort(key=lambda item: item[kwargs['sort']], reverse=True)
+        summary = summary[:kwargs['top']]
+        percentiles = not slow_only(summary)
+        if not percentiles:
+            self.stderr.write('性能日志中只有慢请求（PERFORMANCE_LOG_LEVEL 是否为 WARNING？），'
+                              '不输出 p50/p95/p99，统计所有请求需要把日志级别改为 INFO')
+            for item in summary:
+                item.update(p50=None, p95=None, p99=None)
+
+        if kwargs['json']:
+            self.stdout.write(json.dumps(summary, ensure_ascii=False, indent=2))
+            return
+        self.stdout.write('%-60s %7s %9s %9s %9s %9s %8s %6s' % (
+            'endpoint', 'count', 'p50(ms)', 'p95(ms)', 'p99(ms)', 'max(ms)', 'queries', 'slow'))
+        for item in summary:
+            wall = ['%9.1f' % item[key] if percentiles else '%9s' % '-' for key in ('p50', 'p95', 'p99')]
+            self.stdout.write('%-60s %7d %s %9.1f %8.1f %6d' % (
+                item['endpoint'][:60], item['count'], ' '.join(wall), item['max'], item['avg_queries'], item['slow']))
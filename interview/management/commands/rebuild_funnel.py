@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: rebuild_funnel
+# ========================================
+import time
+
+from django.core.management import BaseCommand
+
+from interview import funnel
+
+# run command to rebuild the recruitment funnel statistics
+# python manage.py rebuild_funnel
+
+
+class Command(BaseCommand):
+    help = '根据候选人数据全量重建招聘漏斗统计'
+
+    def handle(self, *args, **kwargs):
+        started = time.monotonic()
+        count = funnel.rebuild()
+        self.stdout.write(self.style.SUCCESS('已重建 %s 行漏斗统计, 耗时 %.2fs' % (count, time.monotonic() - started)))
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: rebuild_search_index
+# ========================================
+import time
+
+from django.core.management import BaseCommand
+
+from interview import search
+from interview.models import Candidate
+from jobs.models import Resume
+
+# run command to rebuild the full text index
+# python manage.py rebuild_search_index
+# python manage.py rebuild_search_index --model resume
+
+MODELS = {
+    'candidate': Candidate,
+    'resume': Resume,
+}
+
+
+class Command(BaseCommand):
+    help = '重建候选人和简历的全文索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=tuple(MODELS), help='只重建一种模型的索引')
+        parser.add_argument('--chunk-size', type=int, default=search.REINDEX_CHUNK_SIZE)
+
+    def handle(self, *args, **kwargs):
+        names = [kwargs['model']] if kwargs['model'] else list(MODELS)
+        for name in names:
+            started = time.monotonic()
+            count = search.rebuild(MODELS[name], kwargs['chunk_size'])
+            self.stdout.write(self.style.SUCCESS('%s: 已索引 %s 行, 耗时 %.2fs' % (
+                name, count, time.monotonic() - started)))
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: recompute_composite_scores
+# ========================================
+import time
+
+from django.core.management import BaseCommand
+
+from interview import ranking
+from interview.performance import track
+
+# run command to recompute the composite score of all candidates after changing CANDIDATE_COMPOSITE_WEIGHTS
+# python manage.py recompute_composite_scores
+# python manage.py recompute_composite_scores --batch-size 10000
+
+
+class Command(BaseCommand):
+    help = '按 CANDIDATE_COMPOSITE_WEIGHTS 全量重算候选人的综合得分，只更新发生变化的行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=ranking.RECOMPUTE_BATCH_SIZE, help='每批处理的行数')
+
+    def handle(self, *args, **kwargs):
+        started = time.monotonic()
+
+        def progress(checked, updated):
+            self.stdout.write('已检查 %s 行, 更新 %s 行, 耗时 %.2fs' % (checked, updated, time.monotonic() - started))
+
+        with track('command:recompute_composite_scores'):
+            checked, updated = ranking.recompute(batch_size=kwargs['batch_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS('重算完成: 检查 %s 行, 更新 %s 行, 总耗时 %.2fs' % (
+            checked, updated, time.monotonic() - started)))
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: run_benchmarks
+# ========================================
+import json
+
+from django.core.management import BaseCommand, CommandError
+
+from interview import benchmarks
+
+# run command to benchmark the hot paths
+# python manage.py generate_recruitment_data --scale 100k
+# python manage.py run_benchmarks --output bench-100k.json
+# python manage.py run_benchmarks --only changelist_hr export_model_as_csv --repeat 10
+
+
+class Command(BaseCommand):
+    help = '执行热点路径的性能测试，输出 json 报告'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='*', choices=tuple(benchmarks.BENCHMARKS), help='只执行指定的测试')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--import-rows', type=int, default=1000, help='import_candidates 测试导入的行数')
+        parser.add_argument('--convert-rows', type=int, default=1000, help='enter_interview_process 测试转换的简历数')
+        parser.add_argument('--output', type=str, help='报告文件路径，默认输出到标准输出')
+
+    def handle(self, *args, **kwargs):
+        report = benchmarks.run(kwargs['only'], kwargs['repeat'], kwargs['import_rows'], kwargs['convert_rows'])
+        if not report['results']:
+            raise CommandError('没有执行任何测试')
+        for result in report['results']:
+            self.stderr.write('%(name)-24s median %(median)8.2fms' % dict(result, **result['wall_ms']) +
+                              '  queries %(queries)5s  peak %(peak_kb)10.1fKB' % result)
+        content = json.dumps(report, ensure_ascii=False, indent=2)
+        if kwargs['output']:
+            with open(kwargs['output'], 'w', encoding='utf-8') as f:
+                f.write(content)
+        else:
+            self.stdout.write(content)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: sync_replica
+# ========================================
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+# run command to copy the SQLite primary into the local replica files (settings/replica.py)
+# python manage.py sync_replica --settings=settings.replica
+# python manage.py sync_replica --settings=settings.replica --interval 5
+
+# 每一步复制的页数，复制期间主库仍然可以读写
+PAGES_PER_STEP = 1024
+
+
+class Command(BaseCommand):
+    help = '使用 SQLite 在线备份把主库复制到 DATABASE_REPLICAS 中的从库文件，用于本地模拟读写分离'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help='持续复制的间隔（秒），不传时只复制一次')
+
+    def handle(self, *args, **kwargs):
+        primary = settings.DATABASES['default']
+        aliases = getattr(settings, 'DATABASE_REPLICAS', ())
+        if not aliases:
+            raise CommandError('没有配置 DATABASE_REPLICAS，请使用 --settings=settings.replica')
+        for alias in ('default', ) + tuple(aliases):
+            if settings.DATABASES[alias]['ENGINE'] != 'django.db.backends.sqlite3':
+                raise CommandError('%s 不是 SQLite 数据库，请使用数据库自身的复制' % alias)
+
+        while True:
+            started = time.monotonic()
+            source = sqlite3.connect(str(primary['NAME']))
+            try:
+                for alias in aliases:
+                    target = sqlite3.connect(str(settings.DATABASES[alias]['NAME']))
+                    try:
+                        source.backup(target, pages=PAGES_PER_STEP)
+                    finally:
+                        target.close()
+            finally:
+                source.close()
+            self.stdout.write('已复制到 %s, 耗时 %.2fs' % (', '.join(aliases), time.monotonic() - started))
+            if kwargs['interval'] is None:
+                return
+            time.sleep(kwargs['interval'])
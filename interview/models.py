@@ -1,7 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 
-from jobs.models import DEGREE_TYPE
+from jobs.models import DEGREE_TYPE, Resume
 
 # 第一轮面试结果
 FIRST_INTERVIEW_RESULT_TYPE = ((u'建议复试', u'建议复试'), (u'待定', u'待定'), (u'放弃', u'放弃'))
@@ -93,6 +93,22 @@ class Candidate(models.Model):
     modified_date = models.DateTimeField(auto_now=True, null=True, blank=True, verbose_name=u'更新时间')
     last_editor = models.CharField(max_length=256, blank=True, verbose_name=u'最后编辑者')
 
+    # 当前简历（同一手机号最新的一份），进入面试流程和保存更新的简历时维护，见 interview.signals
+    resume = models.ForeignKey(Resume, related_name='candidates', blank=True, null=True, editable=False,
+                               on_delete=models.SET_NULL, verbose_name=u'简历')
+
+    # 综合得分，保存时由 interview.ranking 按职位的权重计算
+    composite_score = models.FloatField(default=0, editable=False, verbose_name=u'综合得分')
+
+    # 按面试官打分习惯校准后的分数，由 interview.analytics 全量计算后回写
+    first_score_calibrated = models.FloatField(null=True, blank=True, editable=False, verbose_name=u'初试校准分')
+    second_score_calibrated = models.FloatField(null=True, blank=True, editable=False, verbose_name=u'专业复试校准分')
+
+    # 去重字段，由 interview.dedup.fill_keys 计算
+    phone_key = models.CharField(max_length=32, blank=True, editable=False, db_index=True, verbose_name=u'规范化手机号')
+    email_key = models.CharField(max_length=135, blank=True, editable=False, db_index=True, verbose_name=u'规范化邮箱')
+    block_key = models.CharField(max_length=300, blank=True, editable=False, db_index=True, verbose_name=u'姓名学校分块')
+
     class Meta:
         db_table = u'candidate'
         verbose_name = u'应聘者'
@@ -103,6 +119,25 @@ class Candidate(models.Model):
             ("notify", "通知面试官审核候选人"),
         ]
 
+        # 与管理后台的默认排序、右侧筛选和面试官的数据权限过滤对应
+        # 外键字段 Django 已经自动建了单列索引，面试官组合索引用于面试官查看自己的候选人时按结果排序
+        indexes = [
+            models.Index(fields=['hr_result', 'second_result', 'first_result', '-id'],
+                         name='candidate_result_order_idx'),
+            models.Index(fields=['city', 'hr_result', 'second_result', 'first_result'],
+                         name='candidate_city_order_idx'),
+            models.Index(fields=['first_result'], name='candidate_first_result_idx'),
+            models.Index(fields=['second_result'], name='candidate_second_result_idx'),
+            models.Index(fields=['first_interviewer_user', 'hr_result', 'second_result', 'first_result'],
+                         name='candidate_first_iv_order_idx'),
+            models.Index(fields=['second_interviewer_user', 'hr_result', 'second_result', 'first_result'],
+                         name='candidate_second_iv_order_idx'),
+            # 接口增量同步按修改时间过滤和翻页
+            models.Index(fields=['modified_date', 'id'], name='candidate_modified_idx'),
+            # 某职位某城市按综合得分排名的前 K 名
+            models.Index(fields=['apply_position', 'city', '-composite_score', 'id'], name='candidate_rank_idx'),
+        ]
+
     # Python 2 优先使用这个方法，把对象转换成字符串； 如果没有__unicode__()方法，使用 __str__()方法
     def __unicode__(self):
         return self.username
@@ -110,3 +145,126 @@ class Candidate(models.Model):
     # Python 3 直接定义 __str__() 方法即可，系统使用这个方法来把对象转换成字符串
     def __str__(self):
         return self.username
+
+
+# 钉钉通知发件箱的状态
+NOTIFICATION_STATUS = (('pending', u'待发送'), ('sending', u'发送中'), ('sent', u'已发送'), ('dead', u'发送失败'))
+
+
+class DingtalkNotification(models.Model):
+    """
+    钉钉通知发件箱，消息先落库，由后台 worker 异步投递
+    """
+    message = models.TextField(verbose_name=u'消息内容')
+    at_mobiles = models.CharField(max_length=1024, blank=True, verbose_name=u'@手机号', help_text=u'多个手机号用逗号分隔')
+    status = models.CharField(max_length=16, choices=NOTIFICATION_STATUS, default='pending', verbose_name=u'状态')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name=u'已尝试次数')
+    next_attempt_at = models.DateTimeField(verbose_name=u'下次投递时间')
+    last_error = models.TextField(blank=True, verbose_name=u'最近一次错误')
+    created_date = models.DateTimeField(auto_now_add=True, verbose_name=u'创建时间')
+    sent_date = models.DateTimeField(null=True, blank=True, verbose_name=u'发送时间')
+
+    class Meta:
+        db_table = u'dingtalk_outbox'
+        verbose_name = u'钉钉通知'
+        verbose_name_plural = u'钉钉通知'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return self.message[:50]
+
+
+# 招聘漏斗的面试轮次
+FUNNEL_STAGES = (('first', u'第一轮面试'), ('second', u'第二轮面试'), ('hr', u'HR复试'))
+
+
+class FunnelStat(models.Model):
+    """
+    招聘漏斗统计：按 城市、应聘职位、面试轮次、面试结果 汇总的候选人数
+    候选人保存、删除和批量写入时由 interview.funnel 增量维护，python manage.py rebuild_funnel 全量重建
+    """
+    city = models.CharField(max_length=135, verbose_name=u'城市')
+    apply_position = models.CharField(max_length=135, blank=True, verbose_name=u'应聘职位')
+    stage = models.CharField(max_length=16, choices=FUNNEL_STAGES, verbose_name=u'面试轮次')
+    result = models.CharField(max_length=256, blank=True, verbose_name=u'面试结果')
+    count = models.IntegerField(default=0, verbose_name=u'人数')
+
+    class Meta:
+        db_table = u'candidate_funnel'
+        verbose_name = u'招聘漏斗'
+        verbose_name_plural = u'招聘漏斗'
+        unique_together = (('city', 'apply_position', 'stage', 'result'), )
+
+    def __str__(self):
+        return '%s %s %s %s: %s' % (self.city, self.apply_position, self.stage, self.result, self.count)
+
+
+EXPORT_FORMATS = (('csv', 'CSV'), ('jsonl', 'JSON Lines'))
+EXPORT_MODES = (('full', u'全量'), ('delta', u'增量'))
+EXPORT_STATUS = (('pending', u'等待中'), ('running', u'导出中'), ('done', u'已完成'), ('failed', u'失败'))
+
+
+class ExportJob(models.Model):
+    """
+    候选人数据的后台导出任务，由 interview.exports 执行
+    按 (modified_date, id) 顺序分块写入压缩文件，每写完一个文件记录一次进度，中断后可以从断点继续
+    增量导出只包含上一次成功导出的水位线之后修改过的候选人
+    """
+    format = models.CharField(max_length=16, choices=EXPORT_FORMATS, default='csv', verbose_name=u'格式')
+    mode = models.CharField(max_length=16, choices=EXPORT_MODES, default='delta', verbose_name=u'导出方式')
+    status = models.CharField(max_length=16, choices=EXPORT_STATUS, default='pending', verbose_name=u'状态')
+    output_dir = models.CharField(max_length=1024, blank=True, verbose_name=u'输出目录')
+    watermark_from = models.DateTimeField(null=True, blank=True, verbose_name=u'起始水位线')
+    watermark_to = models.DateTimeField(null=True, blank=True, verbose_name=u'结束水位线')
+    cursor_modified_date = models.DateTimeField(null=True, blank=True, verbose_name=u'断点修改时间')
+    cursor_id = models.IntegerField(null=True, blank=True, verbose_name=u'断点ID')
+    chunk_count = models.IntegerField(default=0, verbose_name=u'文件数')
+    rows_written = models.IntegerField(default=0, verbose_name=u'已导出行数')
+    error = models.TextField(blank=True, verbose_name=u'错误信息')
+    created_by = models.CharField(max_length=256, blank=True, verbose_name=u'创建人')
+    created_date = models.DateTimeField(auto_now_add=True, verbose_name=u'创建时间')
+    started_date = models.DateTimeField(null=True, blank=True, verbose_name=u'开始时间')
+    finished_date = models.DateTimeField(null=True, blank=True, verbose_name=u'完成时间')
+    # 执行中的任务定期更新，超时没有更新的视为进程已经退出，可以重新领取
+    heartbeat_date = models.DateTimeField(null=True, blank=True, verbose_name=u'心跳时间')
+
+    class Meta:
+        db_table = u'candidate_export_job'
+        verbose_name = u'候选人导出任务'
+        verbose_name_plural = u'候选人导出任务'
+
+    def __str__(self):
+        return '%s-%s-%s' % (self.pk, self.mode, self.format)
+
+
+DUPLICATE_STATUS = (('pending', u'待确认'), ('merged', u'已合并'), ('ignored', u'不是重复'))
+
+
+class DuplicateCandidate(models.Model):
+    """
+    疑似重复的两个候选人，由 interview.dedup 检测，candidate 为较早创建的一条，合并后保留
+    """
+    candidate = models.ForeignKey(Candidate, related_name='+', on_delete=models.CASCADE, verbose_name=u'候选人')
+    duplicate = models.ForeignKey(Candidate, related_name='+', null=True, on_delete=models.SET_NULL,
+                                  verbose_name=u'疑似重复')
+    score = models.FloatField(verbose_name=u'相似度')
+    reasons = models.CharField(max_length=256, blank=True, verbose_name=u'相同的信息')
+    status = models.CharField(max_length=16, choices=DUPLICATE_STATUS, default='pending', verbose_name=u'状态')
+    merged_from = models.CharField(max_length=512, blank=True, verbose_name=u'被合并的候选人')
+    reviewed_by = models.CharField(max_length=256, blank=True, verbose_name=u'处理人')
+    reviewed_date = models.DateTimeField(null=True, blank=True, verbose_name=u'处理时间')
+    created_date = models.DateTimeField(auto_now_add=True, verbose_name=u'发现时间')
+
+    class Meta:
+        db_table = u'candidate_duplicate'
+        verbose_name = u'重复候选人'
+        verbose_name_plural = u'重复候选人'
+        unique_together = (('candidate', 'duplicate'), )
+        indexes = [
+            models.Index(fields=['status', '-score'], name='duplicate_status_score_idx'),
+        ]
+
+    def __str__(self):
+        return '%s - %s' % (self.candidate_id, self.duplicate_id)
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: outbox
+# ========================================
+"""
+钉钉通知发件箱：管理后台只负责把通知写入数据库，由后台 worker 投递
+投递失败按指数退避重试，超过最大次数后标记为发送失败（死信），发送速率不超过钉钉每分钟的限制
+
+速率限制按数据库中最近 60 秒内已发送和正在发送的消息数计算，多个进程、多个 worker 共享同一个限额
+
+worker 有两种，通过 settings.DINGTALK_OUTBOX_WORKER 选择:
+    thread: 在当前进程内启动一个后台线程（默认），web 进程加载 recruitment.wsgi 时启动，之后有新消息时唤醒，
+            启动时会投递上次进程退出前遗留的消息
+    celery: 提交 interview.tasks.deliver_dingtalk_notifications 任务
+没有 web 进程（或者不想在 web 进程内投递）时运行 python manage.py deliver_notifications
+"""
+import logging
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from interview.dingtalk import send
+from interview.models import DingtalkNotification
+
+logger = logging.getLogger(__name__)
+
+# 一次从发件箱取出的消息数
+FETCH_SIZE = 20
+# 消息被 worker 领取后的租约时间，worker 异常退出后其他 worker 可以重新领取
+LEASE_SECONDS = 120
+# 退避基数和上限
+BACKOFF_BASE_SECONDS = 10
+BACKOFF_MAX_SECONDS = 60 * 60
+# 线程 worker 没有被唤醒时的轮询间隔
+POLL_INTERVAL_SECONDS = 30
+
+
+def get_setting(name, default):
+    return getattr(settings, name, default)
+
+
+class RateLimiter:
+    """
+    滑动窗口限流，钉钉机器人每分钟最多发送 20 条消息
+    窗口内的发送记录来自数据库: 最近 period 秒内发送成功的消息加上其他 worker 正在发送（租约未过期）的消息，
+    所有进程共享同一个限额
+    """
+    # 只有正在发送的消息占满限额时，等待它们发送完成的间隔
+    RETRY_SECONDS = 1
+
+    def __init__(self, max_calls, period=60, sleep=time.sleep):
+        self.max_calls = max_calls
+        self.period = period
+        self.sleep = sleep
+
+    def wait_seconds(self, exclude=None):
+        """
+        还需要等待的秒数，0 表示可以立即发送，exclude 为当前 worker 已领取的消息
+        """
+        now = timezone.now()
+        window_start = now - timedelta(seconds=self.period)
+        sent = DingtalkNotification.objects.filter(sent_date__gt=window_start)
+        sending = DingtalkNotification.objects.filter(status='sending', next_attempt_at__gt=now)
+        if exclude is not None:
+            sending = sending.exclude(pk=exclude.pk)
+        sent_dates = list(sent.order_by('-sent_date').values_list('sent_date', flat=True)[:self.max_calls])
+        in_flight = sending.count()
+        if len(sent_dates) + in_flight < self.max_calls:
+            return 0
+        # 窗口中第 max_calls - in_flight 新的发送记录过期后才有空位
+        index = self.max_calls - in_flight - 1
+        if index < 0 or index >= len(sent_dates):
+            return self.RETRY_SECONDS
+        return max((sent_dates[index] - window_start).total_seconds(), 0) or self.RETRY_SECONDS
+
+    def acquire(self, notification=None):
+        while True:
+            delay = self.wait_seconds(exclude=notification)
+            if not delay:
+                return
+            self.sleep(delay)
+
+
+def backoff_delay(attempts):
+    """
+    第 n 次失败后的等待时间，指数退避加随机抖动
+    """
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def enqueue(message, at_mobiles=()):
+    """
+    写入发件箱，事务提交后通知 worker 投递，立即返回
+    """
+    notification = DingtalkNotification.objects.create(
+        message=message,
+        at_mobiles=','.join(at_mobiles),
+        next_attempt_at=timezone.now(),
+    )
+    transaction.on_commit(wake_worker)
+    return notification
+
+
+def claim(notification):
+    """
+    通过条件更新领取消息，多个 worker 同时运行时同一条消息只会被一个 worker 领取
+    """
+    lease_until = timezone.now() + timedelta(seconds=LEASE_SECONDS)
+    claimed = DingtalkNotification.objects.filter(
+        pk=notification.pk, status=notification.status, next_attempt_at=notification.next_attempt_at,
+    ).update(status='sending', next_attempt_at=lease_until)
+    return claimed == 1
+
+
+def deliver(notification):
+    max_attempts = get_setting('DINGTALK_MAX_ATTEMPTS', 6)
+    notification.attempts += 1
+    try:
+        send(notification.message, at_mobiles=[m for m in notification.at_mobiles.split(',') if m])
+    except Exception as e:
+        notification.last_error = repr(e)
+        if notification.attempts >= max_attempts:
+            notification.status = 'dead'
+            logger.error("dingtalk notification %s is dead after %s attempts: %r", notification.pk,
+                         notification.attempts, e)
+        else:
+            notification.status = 'pending'
+            notification.next_attempt_at = timezone.now() + backoff_delay(notification.attempts)
+            logger.warning("dingtalk notification %s failed, will retry at %s: %r", notification.pk,
+                           notification.next_attempt_at, e)
+    else:
+        notification.status = 'sent'
+        notification.sent_date = timezone.now()
+    notification.save(update_fields=['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_date'])
+    return notification.status == 'sent'
+
+
+def deliver_due(limiter=None):
+    """
+    投递所有到期的消息，返回成功发送的条数
+    """
+    limiter = limiter or RateLimiter(get_setting('DINGTALK_RATE_LIMIT_PER_MINUTE', 20))
+    sent = 0
+    while True:
+        due = list(DingtalkNotification.objects.filter(
+            status__in=('pending', 'sending'), next_attempt_at__lte=timezone.now(),
+        ).order_by('next_attempt_at')[:FETCH_SIZE])
+        if not due:
+            return sent
+        for notification in due:
+            if not claim(notification):
+                continue
+            limiter.acquire(notification)
+            sent += deliver(notification)
+
+
+class OutboxWorker(threading.Thread):
+    """
+    进程内的后台投递线程
+    """
+
+    def __init__(self):
+        super().__init__(name='dingtalk-outbox', daemon=True)
+        self.event = threading.Event()
+        self.limiter = RateLimiter(get_setting('DINGTALK_RATE_LIMIT_PER_MINUTE', 20))
+
+    def run(self):
+        while True:
+            self.event.wait(POLL_INTERVAL_SECONDS)
+            self.event.clear()
+            try:
+                deliver_due(self.limiter)
+            except Exception:
+                logger.exception("dingtalk outbox worker failed")
+            finally:
+                close_old_connections()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_worker():
+    """
+    启动（或者重新启动）当前进程的投递线程并立即投递一次，返回该线程；celery 方式时不启动
+    """
+    global _worker
+    if get_setting('DINGTALK_OUTBOX_WORKER', 'thread') != 'thread':
+        return None
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = OutboxWorker()
+            _worker.start()
+    _worker.event.set()
+    return _worker
+
+
+def wake_worker():
+    if get_setting('DINGTALK_OUTBOX_WORKER', 'thread') == 'celery':
+        from interview.tasks import deliver_dingtalk_notifications
+        deliver_dingtalk_notifications.delay()
+        return
+    start_worker()
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: pagination
+# ========================================
+"""
+管理后台列表的游标（keyset）分页
+按 排序字段 + 主键 记住当前页最后一行，下一页用 WHERE (排序字段) > (上一页最后一行) 查询，不再使用 OFFSET，
+比较按字段层次拆成几条在索引上定位的查询（见 seek_filters），第 N 页和第 1 页的代价相同；总数优先读缓存，没有缓存时最多数到 COUNT_LIMIT 行，需要时再精确计数
+不支持的情况（搜索、显示全部、排序字段可以为空或者是表达式）回退到 Django 默认的分页
+"""
+import base64
+import hashlib
+import json
+from django.contrib.admin.views.main import ChangeList
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+
+CURSOR_VAR = 'cursor'
+COUNT_VAR = 'count'
+
+# 没有精确计数缓存时最多数的行数
+COUNT_LIMIT = 10000
+COUNT_CACHE_TIMEOUT = 60 * 5
+COUNT_CACHE_KEY = 'recruitment:changelist:count:%s'
+
+
+def encode_cursor(values, direction):
+    data = json.dumps({'v': values, 'd': direction}, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    返回 (排序字段的值, 方向)，游标不合法时返回 None
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return data['v'], data['d']
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def seek_filters(keys, values, direction):
+    """
+    keys 为 [(字段, 是否升序)]，返回 (k1, k2, ...) 在 values 之后（或之前）的条件，按从深到浅的层次拆开:
+        k1 = v1 AND k2 = v2 AND k3 > v3
+        k1 = v1 AND k2 > v2
+        k1 > v1
+    依次执行，前一层不够一页时再查下一层。每一层都是 等值前缀 + 一个范围条件，可以直接在组合索引上定位；
+    合并成一个 k1 > v1 OR (k1 = v1 AND k2 > v2) ... 的条件时数据库只能按索引顺序扫描，越往后翻越慢
+    """
+    filters = []
+    for i, (field, ascending) in enumerate(keys):
+        forward = ascending == (direction == 'next')
+        lookup = {keys[j][0]: values[j] for j in range(i)}
+        lookup['%s__%s' % (field, 'gt' if forward else 'lt')] = values[i]
+        filters.append(lookup)
+    return filters[::-1]
+
+
+def cached_count(queryset, exact=False):
+    """
+    返回 (行数, 是否精确)
+    """
+    key = COUNT_CACHE_KEY % hashlib.md5(str(queryset.query).encode()).hexdigest()
+    count = cache.get(key)
+    if count is not None:
+        return count, True
+    keys = queryset.order_by().values('pk')
+    count = keys.count() if exact else keys[:COUNT_LIMIT + 1].count()
+    if exact or count <= COUNT_LIMIT:
+        cache.set(key, count, COUNT_CACHE_TIMEOUT)
+        return count, True
+    return COUNT_LIMIT, False
+
+
+class KeysetChangeList(ChangeList):
+    """
+    游标分页的 ChangeList，ModelAdmin 通过 get_changelist 返回该类启用
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        super().__init__(request, *args, **kwargs)
+        # 翻页链接之外（筛选、排序、搜索）的链接都回到第一页
+        self.params.pop(CURSOR_VAR, None)
+        self.params.pop(COUNT_VAR, None)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        lookup_params.pop(COUNT_VAR, None)
+        return lookup_params
+
+    def get_keyset(self, request):
+        """
+        把排序转换成 [(字段, 是否升序)]，不支持游标分页时返回 None
+        """
+        if self.query or self.show_all:
+            return None
+        keys = []
+        for item in self.get_ordering(request, self.queryset):
+            if not isinstance(item, str) or '__' in item or '?' in item:
+                return None
+            name = item.lstrip('-')
+            try:
+                field = self.lookup_opts.pk if name == 'pk' else self.lookup_opts.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if field.null or field.many_to_many or field.one_to_many:
+                return None
+            # ChangeList.get_ordering 会把 ModelAdmin.ordering 和 queryset 的排序都加进来，重复的字段只保留第一次
+            if any(key == field.attname for key, _ in keys):
+                continue
+            keys.append((field.attname, not item.startswith('-')))
+        if not any(field == self.lookup_opts.pk.attname for field, _ in keys):
+            keys.append((self.lookup_opts.pk.attname, True))
+        return keys
+
+    def seek_querysets(self, cursor):
+        """
+        取一页排序字段和主键的查询，cursor 为 decode_cursor 的结果，没有游标时是第一页
+        """
+        direction = cursor[1] if cursor else 'next'
+        fields = [field for field, _ in self.keyset]
+        if direction == 'prev':
+            ordering = [field if not asc else '-' + field for field, asc in self.keyset]
+        else:
+            ordering = [field if asc else '-' + field for field, asc in self.keyset]
+        queryset = self.queryset.order_by(*ordering).values_list(*fields)
+        if not cursor:
+            return [queryset]
+        return [queryset.filter(**lookup) for lookup in seek_filters(self.keyset, cursor[0], direction)]
+
+    def get_results(self, request):
+        self.keyset = self.get_keyset(request)
+        if self.keyset is None:
+            return super().get_results(request)
+
+        cursor = decode_cursor(request.GET.get(CURSOR_VAR, ''))
+        if cursor and len(cursor[0]) != len(self.keyset):
+            # 排序改变之前生成的游标，回到第一页
+            cursor = None
+        direction = cursor[1] if cursor else 'next'
+        fields = [field for field, _ in self.keyset]
+        # 先只查排序字段和主键（可以走索引），再按主键取整行数据
+        rows = []
+        for queryset in self.seek_querysets(cursor):
+            rows.extend(queryset[:self.list_per_page + 1 - len(rows)])
+            if len(rows) > self.list_per_page:
+                break
+        has_more = len(rows) > self.list_per_page
+        rows = rows[:self.list_per_page]
+        if direction == 'prev':
+            rows.reverse()
+        pk_index = fields.index(self.lookup_opts.pk.attname)
+        self.result_list = self.queryset.filter(pk__in=[row[pk_index] for row in rows])
+
+        has_next = has_more if direction == 'next' else cursor is not None
+        has_previous = cursor is not None and (has_more if direction == 'prev' else True)
+        self.next_url = has_next and rows and self.get_query_string(
+            {CURSOR_VAR: encode_cursor(list(rows[-1]), 'next')}, [COUNT_VAR])
+        self.previous_url = has_previous and rows and self.get_query_string(
+            {CURSOR_VAR: encode_cursor(list(rows[0]), 'prev')}, [COUNT_VAR])
+        self.first_url = self.get_query_string(remove=[CURSOR_VAR, COUNT_VAR])
+
+        self.result_count, self.result_count_exact = cached_count(self.queryset, exact=COUNT_VAR in request.GET)
+        self.exact_count_url = self.get_query_string(dict(
+            {COUNT_VAR: 'exact'}, **({CURSOR_VAR: request.GET[CURSOR_VAR]} if cursor else {})))
+        self.show_full_result_count = False
+        self.full_result_count = None
+        self.show_admin_actions = True
+        # 默认的分页标签只显示总数，翻页链接由 admin/interview/keyset_pagination.html 渲染
+        self.can_show_all = False
+        self.multi_page = False
+        self.paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: performance
+# ========================================
+"""
+请求级别的性能记录，写入 settings 中配置的 interview.performance 日志 (recruitment.performance.log)
+每条记录一行: "perf {json}"，包含接口名、管理后台动作、耗时、SQL 条数和耗时、响应大小
+    - 超过 PERFORMANCE_SLOW_REQUEST_MS 的请求以 WARNING 级别记录，标记 slow 并附带最慢的几条 SQL
+    - 其他请求以 INFO 级别记录紧凑的一行，按 PERFORMANCE_SAMPLE_RATE 抽样，抽样率写在 sample 中，
+      没有被抽中或者日志级别不允许的请求不会序列化
+python manage.py performance_summary 按接口汇总 p50/p95/p99，汇总时按抽样率加权
+"""
+import asyncio
+import heapq
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('interview.performance')
+
+LOG_PREFIX = 'perf '
+# 每条记录保留的最慢 SQL 条数和 SQL 的最大长度
+SLOWEST_SQL_COUNT = 3
+SQL_MAX_LENGTH = 300
+
+
+def slow_threshold_ms():
+    return getattr(settings, 'PERFORMANCE_SLOW_REQUEST_MS', 500)
+
+
+def sample_rate():
+    return getattr(settings, 'PERFORMANCE_SAMPLE_RATE', 1.0)
+
+
+class QueryCollector:
+    """
+    通过 execute_wrapper 收集 SQL 的条数、总耗时和最慢的几条
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.duration += duration
+            item = (duration, sql[:SQL_MAX_LENGTH])
+            if len(self.slowest) < SLOWEST_SQL_COUNT:
+                heapq.heappush(self.slowest, item)
+            elif item > self.slowest[0]:
+                heapq.heapreplace(self.slowest, item)
+
+    @contextmanager
+    def collect(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+
+class Record:
+    """
+    一次被记录的执行（请求、管理后台动作或者命令）
+    """
+
+    def __init__(self, endpoint, **extra):
+        self.endpoint = endpoint
+        self.extra = extra
+        self.queries = QueryCollector()
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def finish(self, **extra):
+        self.elapsed += time.perf_counter() - self.started
+        self.extra.update(extra)
+        wall_ms = self.elapsed * 1000
+        slow = wall_ms > slow_threshold_ms()
+        level = logging.WARNING if slow else logging.INFO
+        if not logger.isEnabledFor(level):
+            return None
+        # 慢请求全部记录，其他请求按抽样率记录
+        sample = 1.0 if slow else sample_rate()
+        if sample < 1 and random.random() >= sample:
+            return None
+        data = dict(
+            self.extra,
+            endpoint=self.endpoint,
+            wall_ms=round(wall_ms, 2),
+            queries=self.queries.count,
+            query_ms=round(self.queries.duration * 1000, 2),
+            slow=slow,
+        )
+        if sample < 1:
+            data['sample'] = sample
+        if slow:
+            data['slowest_sql'] = [
+                {'ms': round(duration * 1000, 2), 'sql': sql}
+                for duration, sql in sorted(self.queries.slowest, reverse=True)
+            ]
+        logger.log(level, '%s%s', LOG_PREFIX,
+                   json.dumps(data, ensure_ascii=False, default=str, separators=(',', ':')))
+        return data
+
+
+@contextmanager
+def track(endpoint, **extra):
+    """
+    记录一段代码的性能，例如管理命令:
+        with track('command:import_candidates'):
+            ...
+    """
+    record = Record(endpoint, **extra)
+    with record.queries.collect():
+        yield record
+    record.finish()
+
+
+def endpoint_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match._func_path
+
+
+class PerformanceMiddleware:
+    """
+    记录每个请求的性能，放在 MIDDLEWARE 的第一位以覆盖整个处理过程
+    流式响应（例如导出 CSV）在内容发送完之后才记录，期间的 SQL 也会统计
+    同时支持同步和异步，ASGI 下不会让异步视图多一次线程切换；
+    异步视图的 SQL 在 sync_to_async 的线程中执行，连接是线程独立的，不计入 SQL 统计
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            # 让 Django 把该中间件当作异步中间件
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        record = Record(None, method=request.method, path=request.path)
+        with record.queries.collect():
+            response = self.get_response(request)
+        return self.process(record, request, response)
+
+    async def __acall__(self, request):
+        record = Record(None, method=request.method, path=request.path, asgi=True)
+        response = await self.get_response(request)
+        return self.process(record, request, response)
+
+    def process(self, record, request, response):
+        record.endpoint = endpoint_name(request)
+        record.extra['status'] = response.status_code
+        if request.method == 'POST' and request.content_type == 'application/x-www-form-urlencoded':
+            # 管理后台的动作在列表页 POST 中提交
+            action = request.POST.get('action')
+            if action:
+                record.extra['action'] = action
+
+        if response.streaming:
+            record.elapsed = time.perf_counter() - record.started
+            response.streaming_content = self.stream(record, response.streaming_content)
+        else:
+            record.finish(bytes=len(response.content))
+        return response
+
+    def stream(self, record, content):
+        size = 0
+        record.started = time.perf_counter()
+        try:
+            with record.queries.collect():
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            record.finish(bytes=size, streaming=True)
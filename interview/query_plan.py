@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: query_plan
+# ========================================
+"""
+查询计划检查，测试中用来确认管理后台的常用查询走索引，没有退化成全表扫描
+"""
+import re
+
+from django.db import connections
+
+# 各数据库 EXPLAIN 输出中全表扫描的写法
+FULL_SCAN_PATTERNS = {
+    # SQLite: "SCAN candidate" / "SCAN TABLE candidate"，带 USING INDEX 的是按索引顺序扫描
+    'sqlite': r'\bSCAN (?:TABLE )?%s\b(?! USING (?:COVERING )?INDEX)',
+    'postgresql': r'\bSeq Scan on %s\b',
+    'mysql': r'\btable: %s\b.*\btype: ALL\b',
+}
+
+# 按索引顺序扫描（没有用索引定位起点）的写法，游标分页的翻页查询不能出现；其他数据库的计划是多行的，暂不检查
+INDEX_SCAN_PATTERNS = {
+    'sqlite': r'\bSCAN (?:TABLE )?%s\b',
+}
+
+
+def explain(queryset):
+    """
+    返回查询计划的文本
+    """
+    return queryset.explain()
+
+
+def full_scans(queryset, table=None, patterns=FULL_SCAN_PATTERNS):
+    """
+    返回查询计划中对 table 做全表扫描的行，table 默认是 queryset 对应的表
+    """
+    vendor = connections[queryset.db].vendor
+    pattern = patterns.get(vendor)
+    if pattern is None:
+        return []
+    regex = re.compile(pattern % re.escape(table or queryset.model._meta.db_table))
+    return [line for line in explain(queryset).splitlines() if regex.search(line)]
+
+
+class QueryPlanAssertionsMixin:
+    """
+    TestCase 的断言扩展
+    """
+
+    def assertNoFullScan(self, queryset, table=None, msg=None):
+        scans = full_scans(queryset, table)
+        if scans:
+            self.fail(self._formatMessage(msg, '查询退化为全表扫描:\n%s\n\n%s' % (
+                '\n'.join(scans), explain(queryset))))
+
+    def assertIndexSeek(self, queryset, table=None, msg=None):
+        """
+        比 assertNoFullScan 更严格: 按索引顺序从头扫描也不行，必须用条件在索引上定位
+        """
+        scans = full_scans(queryset, table, INDEX_SCAN_PATTERNS)
+        if scans:
+            self.fail(self._formatMessage(msg, '查询没有在索引上定位:\n%s\n\n%s' % (
+                '\n'.join(scans), explain(queryset))))
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: ranking
+# ========================================
+"""
+候选人综合得分和按职位、城市的排名
+    composite_score = 各项分数按满分归一化到 0-1 后的加权平均 × 100，权重见 settings.CANDIDATE_COMPOSITE_WEIGHTS，
+    可以按应聘职位覆盖默认权重；没有填写的分数不参与加权（其余分数的权重重新归一），一项分数都没有时为 0
+save() 之前由 interview.signals 计算，bulk_create / bulk_update 之前需要调用 fill_composite；
+修改权重后执行 python manage.py recompute_composite_scores 全量重算
+(apply_position, city, -composite_score, id) 上的组合索引让"某职位某城市的前 K 名"只需要读取索引的前 K 项
+"""
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from interview.models import Candidate
+
+# 参与综合得分的分数
+COMPOSITE_FIELDS = ('test_score_of_general_ability', 'paper_score', 'first_score', 'second_score')
+# 各项分数的满分
+FULL_SCORES = {'test_score_of_general_ability': 100, 'paper_score': 100, 'first_score': 5, 'second_score': 5}
+DEFAULT_WEIGHTS = {'test_score_of_general_ability': 1, 'paper_score': 1, 'first_score': 2, 'second_score': 3}
+# CANDIDATE_COMPOSITE_WEIGHTS 中默认权重的键，其他键为应聘职位
+DEFAULT_KEY = 'default'
+
+TOP_K = 50
+MAX_TOP_K = 500
+RECOMPUTE_BATCH_SIZE = 5000
+
+
+def weights_for(position):
+    config = getattr(settings, 'CANDIDATE_COMPOSITE_WEIGHTS', {})
+    weights = dict(DEFAULT_WEIGHTS, **config.get(DEFAULT_KEY, {}))
+    weights.update(config.get(position, {}))
+    return weights
+
+
+def composite_score(scores, weights):
+    """
+    scores 为按 COMPOSITE_FIELDS 顺序的分数（Decimal / float / None）
+    """
+    total = weight_sum = 0.0
+    for field, value in zip(COMPOSITE_FIELDS, scores):
+        weight = weights.get(field, 0)
+        if value is None or not weight:
+            continue
+        total += weight * float(value) / FULL_SCORES[field]
+        weight_sum += weight
+    return round(total / weight_sum * 100, 2) if weight_sum else 0.0
+
+
+def fill_composite(candidate):
+    """
+    计算候选人的综合得分，分数字段被延迟加载时不计算，避免额外查询
+    """
+    if candidate.get_deferred_fields() & set(COMPOSITE_FIELDS + ('apply_position', )):
+        return candidate
+    candidate.composite_score = composite_score(
+        [getattr(candidate, field) for field in COMPOSITE_FIELDS], weights_for(candidate.apply_position))
+    return candidate
+
+
+def top_candidates(queryset, apply_position, city, limit=TOP_K):
+    """
+    某职位某城市综合得分最高的 limit 名候选人，按索引的顺序排序
+    """
+    return queryset.filter(apply_position=apply_position, city=city).order_by('-composite_score', 'id')[:limit]
+
+
+def recompute(queryset=None, batch_size=RECOMPUTE_BATCH_SIZE, progress=None):
+    """
+    按主键分批重算综合得分，只回写发生变化的行，不更新 modified_date，返回 (检查的行数, 更新的行数)
+    """
+    queryset = (Candidate.objects.all() if queryset is None else queryset).order_by('id')
+    db = router.db_for_write(Candidate)
+    connection = connections[db]
+    quote = connection.ops.quote_name
+    sql = 'UPDATE %s SET %s = %%s WHERE %s = %%s' % (
+        quote(Candidate._meta.db_table), quote(Candidate._meta.get_field('composite_score').column),
+        quote(Candidate._meta.pk.column))
+    weights = {}
+    last_id, checked, updated = 0, 0, 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).values_list(
+            'id', 'apply_position', 'composite_score', *COMPOSITE_FIELDS)[:batch_size])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        changed = []
+        for pk, position, old, *scores in rows:
+            if position not in weights:
+                weights[position] = weights_for(position)
+            new = composite_score(scores, weights[position])
+            if new != old:
+                changed.append((new, pk))
+        if changed:
+            with transaction.atomic(using=db), connection.cursor() as cursor:
+                cursor.executemany(sql, changed)
+        checked += len(rows)
+        updated += len(changed)
+        if progress:
+            progress(checked, updated)
+    return checked, updated
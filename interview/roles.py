@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: roles
+# ========================================
+"""
+用户角色解析：一次请求只解析一次用户的组和招聘相关权限，
+跨请求缓存在 django cache 中，组成员或权限变化时由 interview.signals 失效缓存
+失效只发生在修改数据的进程里，所以跨请求缓存只在多进程共享的缓存后端（redis 等）上启用，
+默认缓存是进程内的 locmem 时每个请求重新解析，见 cross_request_cache
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+ROLE_CACHE_TIMEOUT = 60 * 10
+ROLE_CACHE_KEY = 'recruitment:role:%s:%s'
+ROLE_GENERATION_KEY = 'recruitment:role:generation'
+
+# 挂在 request 上的属性名，同一个请求内复用
+REQUEST_ATTR = '_recruitment_role'
+
+# 只在当前进程内有效的缓存后端
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cross_request_cache():
+    """
+    是否启用跨请求缓存: settings.RECRUITMENT_CROSS_REQUEST_CACHE 为 None 时按默认缓存的后端判断，
+    进程内缓存无法被其他进程的信号失效，多进程部署时会读到过期的数据，不启用
+    """
+    enabled = getattr(settings, 'RECRUITMENT_CROSS_REQUEST_CACHE', None)
+    if enabled is None:
+        return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHE_BACKENDS
+    return enabled
+
+
+class Role:
+    """
+    当前用户在招聘系统里的角色
+    """
+
+    def __init__(self, user_id=None, is_superuser=False, is_active=False, group_names=(), permissions=()):
+        self.user_id = user_id
+        self.is_superuser = is_superuser
+        self.is_active = is_active
+        self.group_names = frozenset(group_names)
+        self.permissions = frozenset(permissions)
+
+    @property
+    def is_hr(self):
+        return 'hr' in self.group_names
+
+    @property
+    def is_interviewer(self):
+        return 'interviewer' in self.group_names
+
+    @property
+    def sees_all_candidates(self):
+        """
+        超级管理员和hr可以看到所有候选人
+        """
+        return self.is_superuser or self.is_hr
+
+    def has_perm(self, perm):
+        # 与 ModelBackend 保持一致：活跃的超级管理员拥有所有权限
+        if self.is_active and self.is_superuser:
+            return True
+        return perm in self.permissions
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'is_superuser': self.is_superuser,
+            'is_active': self.is_active,
+            'group_names': sorted(self.group_names),
+            'permissions': sorted(self.permissions),
+        }
+
+
+def _generation():
+    generation = cache.get(ROLE_GENERATION_KEY)
+    if generation is None:
+        generation = 1
+        cache.add(ROLE_GENERATION_KEY, generation, None)
+    return generation
+
+
+def resolve_role(user):
+    """
+    解析用户的角色，优先读取跨请求缓存
+    """
+    if not user.is_authenticated:
+        return Role()
+    shared = cross_request_cache()
+    if shared:
+        key = ROLE_CACHE_KEY % (_generation(), user.pk)
+        data = cache.get(key)
+        if data is not None:
+            return Role(**data)
+    role = Role(
+        user_id=user.pk,
+        is_superuser=user.is_superuser,
+        is_active=user.is_active,
+        group_names=user.groups.values_list('name', flat=True),
+        permissions=user.get_all_permissions(),
+    )
+    if shared:
+        cache.set(key, role.to_dict(), ROLE_CACHE_TIMEOUT)
+    return role
+
+
+def get_role(request):
+    """
+    获取当前请求用户的角色，同一个请求只解析一次
+    """
+    role = getattr(request, REQUEST_ATTR, None)
+    if role is None or role.user_id != request.user.pk:
+        role = resolve_role(request.user)
+        setattr(request, REQUEST_ATTR, role)
+    return role
+
+
+def invalidate_role(*user_ids):
+    """
+    用户的组或权限变化后，失效该用户的角色缓存
+    """
+    generation = _generation()
+    cache.delete_many([ROLE_CACHE_KEY % (generation, user_id) for user_id in user_ids])
+
+
+def invalidate_all_roles():
+    """
+    组的权限变化会影响组内所有用户，直接切换缓存代数，使旧缓存全部失效
+    """
+    try:
+        cache.incr(ROLE_GENERATION_KEY)
+    except ValueError:
+        cache.set(ROLE_GENERATION_KEY, 2, None)
+
+
+def filter_visible_candidates(queryset, request):
+    """
+    数据集权限
+    出了admin和hr组，其他的人，一面和二面是当前用户的才能看到
+    """
+    if get_role(request).sees_all_candidates:
+        return queryset
+    user = request.user
+    return queryset.filter(Q(first_interviewer_user=user) | Q(second_interviewer_user=user))
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: search
+# ========================================
+"""
+候选人和简历的全文索引
+SQLite 使用 FTS5 虚拟表，PostgreSQL 使用 tsvector + GIN 索引，其他数据库返回 None，由管理后台回退到默认的 LIKE 查询
+
+中文没有空格分词，写入索引前先在 Python 里切分：连续的中日韩字符切成单字和二元组，其余按字母数字切词，
+查询时同样切分，单字查单字、多字查二元组短语、字母数字做前缀匹配，因此姓名、学校名的任意片段都能命中；
+只有数字的查询多半是手机号片段，前缀匹配找不到号码中间或结尾的数字，同时按规范化手机号包含匹配
+
+索引在主库（db_for_write）上建表和写入，查询在 queryset 所在的数据库（可能是从库）上执行，索引表随复制同步
+"""
+import logging
+import re
+
+from django.contrib.admin.views.main import ORDER_VAR
+from django.db import DatabaseError, connections, router
+from django.db.models import FloatField, Q, Value
+
+logger = logging.getLogger(__name__)
+
+# 每种模型参与索引的字段
+INDEXED_FIELDS = {
+    'candidate': (
+        'username', 'phone', 'email', 'city', 'apply_position', 'bachelor_school', 'master_school', 'doctor_school',
+        'major'),
+    'resume': (
+        'username', 'phone', 'email', 'city', 'apply_position', 'bachelor_school', 'master_school', 'doctor_school',
+        'major', 'candidate_introduction', 'work_experience', 'project_experience'),
+}
+
+# 重建索引时每批读取的行数
+REINDEX_CHUNK_SIZE = 2000
+
+# 平假名片假名、中日韩统一表意文字（含扩展A和兼容区）、韩文音节
+CJK_CHARS = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+CJK_RE = re.compile('[%s]+' % CJK_CHARS)
+WORD_RE = re.compile(r'[%s]+|[^\W_]+' % CJK_CHARS)
+DIGITS_RE = re.compile('[0-9]+')
+
+
+def tokenize(text):
+    """
+    写入索引的分词：中文切成单字和二元组，其他按单词切分
+    """
+    tokens = []
+    for word in WORD_RE.findall((text or '').lower()):
+        if CJK_RE.fullmatch(word):
+            tokens.extend(word)
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return ' '.join(tokens)
+
+
+def query_terms(text):
+    """
+    查询的分词，返回 [(是否前缀匹配, [短语中的词])]，所有词条之间是 AND 关系
+    """
+    terms = []
+    for word in WORD_RE.findall((text or '').lower()):
+        if not CJK_RE.fullmatch(word):
+            terms.append((True, [word]))
+        elif len(word) == 1:
+            terms.append((False, [word]))
+        else:
+            terms.append((False, [word[i:i + 2] for i in range(len(word) - 1)]))
+    return terms
+
+
+def pk_column(connection, model):
+    quote = connection.ops.quote_name
+    return '%s.%s' % (quote(model._meta.db_table), quote(model._meta.pk.column))
+
+
+def document(values):
+    return tokenize(' '.join(str(value) for value in values if value))
+
+
+class SQLiteBackend:
+    """
+    FTS5 虚拟表，rowid 就是模型主键，增量更新只需要按 rowid 删除再插入
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def table(self, model_name):
+        return '%s_search' % model_name
+
+    def create(self, model_name):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS %s USING fts5(body, tokenize = 'unicode61')"
+                % self.table(model_name))
+
+    def upsert(self, model_name, rows):
+        table = self.table(model_name)
+        with self.connection.cursor() as cursor:
+            cursor.executemany('DELETE FROM %s WHERE rowid = %%s' % table, [(pk, ) for pk, _ in rows])
+            cursor.executemany('INSERT INTO %s (rowid, body) VALUES (%%s, %%s)' % table, rows)
+
+    def delete(self, model_name, pks):
+        with self.connection.cursor() as cursor:
+            cursor.executemany('DELETE FROM %s WHERE rowid = %%s' % self.table(model_name), [(pk, ) for pk in pks])
+
+    def clear(self, model_name):
+        with self.connection.cursor() as cursor:
+            cursor.execute('DELETE FROM %s' % self.table(model_name))
+
+    def filter(self, queryset, terms):
+        """
+        与索引表按 rowid 连接，在数据库中同时应用全文匹配和 queryset 已有的筛选、数据权限；
+        search_rank 为 FTS5 的 rank，越小越相关
+        """
+        table = self.table(queryset.model._meta.model_name)
+        expression = ' AND '.join(
+            '"%s"*' % phrase[0] if prefix else '"%s"' % ' '.join(phrase)
+            for prefix, phrase in terms
+        )
+        return queryset.extra(
+            select={'search_rank': '%s.rank' % table},
+            tables=[table],
+            where=['%s.rowid = %s' % (table, pk_column(self.connection, queryset.model)), '%s MATCH %%s' % table],
+            params=[expression])
+
+
+class PostgreSQLBackend:
+    """
+    普通表 + tsvector GIN 索引，使用 simple 配置，分词已经在 Python 里完成
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def table(self, model_name):
+        return '%s_search' % model_name
+
+    def create(self, model_name):
+        table = self.table(model_name)
+        with self.connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE IF NOT EXISTS %s (doc_id integer PRIMARY KEY, body tsvector NOT NULL)' % table)
+            cursor.execute('CREATE INDEX IF NOT EXISTS %s_body_idx ON %s USING gin (body)' % (table, table))
+
+    def upsert(self, model_name, rows):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO %s (doc_id, body) VALUES (%%s, to_tsvector('simple', %%s)) "
+                "ON CONFLICT (doc_id) DO UPDATE SET body = EXCLUDED.body" % self.table(model_name), rows)
+
+    def delete(self, model_name, pks):
+        with self.connection.cursor() as cursor:
+            cursor.execute('DELETE FROM %s WHERE doc_id = ANY(%%s)' % self.table(model_name), [list(pks)])
+
+    def clear(self, model_name):
+        with self.connection.cursor() as cursor:
+            cursor.execute('TRUNCATE %s' % self.table(model_name))
+
+    def filter(self, queryset, terms):
+        """
+        与索引表按 doc_id 连接，search_rank 为负的 ts_rank，与 SQLite 一样越小越相关
+        """
+        table = self.table(queryset.model._meta.model_name)
+        expression = ' & '.join(
+            "'%s':*" % phrase[0] if prefix else '(%s)' % ' <-> '.join("'%s'" % token for token in phrase)
+            for prefix, phrase in terms
+        )
+        return queryset.extra(
+            select={'search_rank': "-ts_rank(%s.body, to_tsquery('simple', %%s))" % table},
+            select_params=[expression],
+            tables=[table],
+            where=['%s.doc_id = %s' % (table, pk_column(self.connection, queryset.model)),
+                   "%s.body @@ to_tsquery('simple', %%s)" % table],
+            params=[expression])
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'postgresql': PostgreSQLBackend,
+}
+
+# 已经创建好索引表的 (数据库别名, 模型)，创建失败记为 False
+_ready = {}
+
+
+def get_backend(model, using=None):
+    """
+    返回模型的全文索引后端，不支持时返回 None
+    索引表只在主库上创建；using 为查询所在的数据库（例如从库），不传时使用主库，用于写入索引
+    """
+    alias = router.db_for_write(model)
+    if using is not None and using != alias:
+        backend = get_backend(model)
+        return backend and type(backend)(connections[using])
+    connection = connections[alias]
+    backend_class = BACKENDS.get(connection.vendor)
+    if backend_class is None:
+        return None
+    backend = backend_class(connection)
+    model_name = model._meta.model_name
+    if (alias, model_name) not in _ready:
+        try:
+            backend.create(model_name)
+        except DatabaseError:
+            # 例如 SQLite 没有编译 FTS5
+            logger.exception("full text index is not available for %s on %s", model_name, alias)
+            _ready[(alias, model_name)] = False
+            return None
+        # 在事务中建表时，事务回滚会把表一起回滚，只有在事务之外建表才记住结果，否则下次继续执行 CREATE ... IF NOT EXISTS
+        if not connection.in_atomic_block:
+            _ready[(alias, model_name)] = True
+        return backend
+    return backend if _ready[(alias, model_name)] else None
+
+
+def reindex(queryset, chunk_size=REINDEX_CHUNK_SIZE):
+    """
+    重新生成 queryset 中所有行的索引，返回处理的行数
+    """
+    model = queryset.model
+    backend = get_backend(model)
+    if backend is None:
+        return 0
+    model_name = model._meta.model_name
+    fields = INDEXED_FIELDS[model_name]
+    rows, count = [], 0
+    # 从主库读取，刚提交的修改在从库上可能还看不到
+    queryset = queryset.using(backend.connection.alias)
+    for values in queryset.values_list('pk', *fields).iterator(chunk_size=chunk_size):
+        rows.append((values[0], document(values[1:])))
+        if len(rows) >= chunk_size:
+            backend.upsert(model_name, rows)
+            count += len(rows)
+            rows = []
+    if rows:
+        backend.upsert(model_name, rows)
+        count += len(rows)
+    return count
+
+
+def remove(model, pks):
+    backend = get_backend(model)
+    if backend is not None:
+        backend.delete(model._meta.model_name, pks)
+
+
+def rebuild(model, chunk_size=REINDEX_CHUNK_SIZE):
+    backend = get_backend(model)
+    if backend is None:
+        return 0
+    backend.clear(model._meta.model_name)
+    return reindex(model._default_manager.all(), chunk_size)
+
+
+def search(queryset, text):
+    """
+    在 queryset 的范围内全文搜索，返回带 search_rank（越小越相关）的 queryset，当前数据库不支持全文索引时返回 None
+    不限制结果数，筛选条件和面试官的数据权限在同一条 SQL 中生效
+    """
+    terms = query_terms(text)
+    if not terms:
+        return None
+    backend = get_backend(queryset.model, queryset.db)
+    if backend is None:
+        return None
+    if all(prefix and DIGITS_RE.fullmatch(phrase[0]) for prefix, phrase in terms):
+        # 手机号片段: 全文索引的前缀匹配或者规范化手机号包含所有数字片段，不再按相关度区分
+        matched = backend.filter(queryset.model._default_manager.using(queryset.db), terms).values('pk')
+        phone = Q(*[Q(phone_key__contains=phrase[0]) for _, phrase in terms])
+        return queryset.filter(Q(pk__in=matched) | phone).annotate(search_rank=Value(0, output_field=FloatField()))
+    return backend.filter(queryset, terms)
+
+
+class FullTextSearchAdminMixin:
+    """
+    管理后台的搜索使用全文索引，按相关度排序；数据库不支持时回退到 search_fields 的 LIKE 查询
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        results = search(queryset, search_term)
+        if results is None:
+            return super().get_search_results(request, queryset, search_term)
+        if ORDER_VAR not in request.GET:
+            # 用户没有点击列排序时，按相关度排序
+            results = results.order_by('search_rank')
+        return results, False
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: services
+# ========================================
+"""
+候选人相关的批量操作，供管理后台动作和管理命令调用
+"""
+import heapq
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from interview import interviewers
+from interview.dedup import LOOKUP_CHUNK_SIZE, fill_keys
+from interview.models import Candidate
+from interview.signals import post_bulk_save
+from jobs.models import Resume
+
+# 简历字段 -> 候选人字段
+RESUME_TO_CANDIDATE_FIELDS = {
+    'username': 'username',
+    'city': 'city',
+    'phone': 'phone',
+    'email': 'email',
+    'apply_position': 'apply_position',
+    'born_address': 'born_address',
+    'gender': 'gender',
+    'bachelor_school': 'bachelor_school',
+    'master_school': 'master_school',
+    'doctor_school': 'doctor_school',
+    'major': 'major',
+    'degree': 'degree',
+}
+
+# 每次 INSERT 的行数
+CONVERT_BATCH_SIZE = 500
+
+
+def convert_resumes(queryset, creator, batch_size=CONVERT_BATCH_SIZE):
+    """
+    把简历批量转换成候选人，进入面试流程，候选人关联转换的简历
+    规范化后的手机号已经有候选人的简历跳过，同一手机号的多份简历只转换最新的一份
+    规范化手机号按简历的手机号重新计算，不依赖简历表中的 phone_key（存量简历可能还没有补齐）；
+    手机号规范化后为空的简历无法判断是否重复，全部转换
+    返回 (新建的候选人列表, 跳过的简历数)
+    """
+    now = timezone.now()
+    resume_fields = list(RESUME_TO_CANDIDATE_FIELDS)
+    resumes = []
+    for values in queryset.order_by('-modified_date').values('id', *resume_fields).iterator():
+        candidate = fill_keys(
+            Candidate(**{RESUME_TO_CANDIDATE_FIELDS[field]: values[field] for field in resume_fields}))
+        candidate.resume_id = values['id']
+        resumes.append(candidate)
+
+    keys = list({candidate.phone_key for candidate in resumes if candidate.phone_key})
+    existing_phones = set()
+    for i in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        existing_phones.update(Candidate.objects.filter(phone_key__in=keys[i:i + LOOKUP_CHUNK_SIZE])
+                               .values_list('phone_key', flat=True))
+
+    candidates, seen, unkeyed_phones, skipped = [], set(), [], 0
+    for candidate in resumes:
+        if candidate.phone_key:
+            if candidate.phone_key in existing_phones or candidate.phone_key in seen:
+                skipped += 1
+                continue
+            seen.add(candidate.phone_key)
+        else:
+            unkeyed_phones.append(candidate.phone)
+        candidate.creator = creator
+        candidate.created_date = now
+        candidate.modified_date = now
+        candidates.append(candidate)
+
+    with transaction.atomic():
+        Candidate.objects.bulk_create(candidates, batch_size=batch_size)
+        created = Candidate.objects.filter(
+            Q(phone_key__in=list(seen)) | Q(phone_key='', phone__in=unkeyed_phones, created_date=now))
+        post_bulk_save.send(sender=Candidate, queryset=created, created=candidates)
+    return candidates, skipped
+
+
+def link_latest_resume(resume):
+    """
+    简历保存后，同一手机号的候选人如果还没有简历或者关联的简历更旧，改为关联这份简历
+    返回更新的候选人数
+    """
+    if not resume.phone_key:
+        return 0
+    return Candidate.objects.filter(phone_key=resume.phone_key).exclude(resume=resume) \
+        .filter(Q(resume=None) | Q(resume__modified_date__lte=resume.modified_date)) \
+        .update(resume=resume, modified_date=timezone.now())
+
+
+def backfill_resumes(only_missing=True, batch_size=CONVERT_BATCH_SIZE * 10):
+    """
+    存量候选人关联同一手机号最新的简历，按主键分段执行 UPDATE ... SET resume_id = (子查询)
+    """
+    latest = Resume.objects.filter(phone_key=OuterRef('phone_key')).exclude(phone_key='') \
+        .order_by('-modified_date').values('id')[:1]
+    # 规范化手机号为空的候选人不能和同样为空的简历互相匹配
+    queryset = Candidate.objects.exclude(phone_key='')
+    if only_missing:
+        queryset = queryset.filter(resume=None)
+    last_id = Candidate.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    count = 0
+    for start in range(0, last_id, batch_size):
+        count += queryset.filter(id__gt=start, id__lte=start + batch_size).update(resume=Subquery(latest))
+    return count
+
+
+# 面试官同时负责的、还没有面试结果的候选人上限
+INTERVIEWER_OPEN_LOAD_CAP = 20
+
+# 面试轮次 -> (面试官字段, 结果字段)
+ASSIGNMENT_STAGES = {
+    'first': ('first_interviewer_user', 'first_result'),
+    'second': ('second_interviewer_user', 'second_result'),
+}
+
+
+def interviewer_pool():
+    return User.objects.filter(groups__name='interviewer', is_active=True)
+
+
+def interviewer_loads():
+    """
+    每个面试官当前的负载（一面、二面中还没有结果的候选人数），返回 {用户ID: 负载}
+    每一轮按面试官字段分组统计一次，在 Python 中合并；在一条 SQL 里同时连接两个反向外键会按面试官产生
+    一面 × 二面 的笛卡尔积
+    """
+    loads = dict.fromkeys(interviewer_pool().values_list('pk', flat=True), 0)
+    for interviewer_field, result_field in ASSIGNMENT_STAGES.values():
+        lookup = {'%s__in' % interviewer_field: interviewer_pool().values('pk'), result_field: ''}
+        rows = Candidate.objects.filter(**lookup).values_list(interviewer_field).annotate(total=Count('id')).order_by()
+        for pk, total in rows:
+            loads[pk] += total
+    return loads
+
+
+def interviewer_cities(interviewer_ids):
+    """
+    面试官所在的城市：按面试过的候选人中最多的城市推断
+    返回 {用户ID: 城市}
+    """
+    counts = {}
+    for field, _ in ASSIGNMENT_STAGES.values():
+        rows = Candidate.objects.filter(**{'%s__in' % field: interviewer_ids}) \
+            .values_list(field, 'city').annotate(total=Count('id')).order_by()
+        for pk, city, total in rows:
+            counts.setdefault(pk, Counter())[city] += total
+    return {pk: counter.most_common(1)[0][0] for pk, counter in counts.items()}
+
+
+class LoadBalancer:
+    """
+    按负载从低到高选择面试官，优先选择候选人所在城市的面试官，负载达到上限的不再分配
+    全局和每个城市各一个最小堆，负载变化后压入新的记录，弹出时丢弃过期的记录
+    """
+
+    def __init__(self, loads, cities, cap):
+        self.loads = dict(loads)
+        self.cities = cities
+        self.cap = cap
+        self.heaps = {None: []}
+        for pk, load in self.loads.items():
+            self.push(pk)
+
+    def push(self, pk):
+        entry = (self.loads[pk], pk)
+        heapq.heappush(self.heaps[None], entry)
+        city = self.cities.get(pk)
+        if city is not None:
+            heapq.heappush(self.heaps.setdefault(city, []), entry)
+
+    def pop(self, heap, exclude):
+        """
+        弹出堆中负载最低且未达到上限的面试官，没有时返回 None
+        """
+        skipped, found = [], None
+        while heap:
+            load, pk = heap[0]
+            if load != self.loads[pk]:
+                heapq.heappop(heap)
+            elif load >= self.cap:
+                break
+            elif pk == exclude:
+                skipped.append(heapq.heappop(heap))
+            else:
+                found = pk
+                heapq.heappop(heap)
+                break
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        return found
+
+    def choose(self, city, exclude=None):
+        pk = None
+        if city in self.heaps:
+            pk = self.pop(self.heaps[city], exclude)
+        if pk is None:
+            pk = self.pop(self.heaps[None], exclude)
+        if pk is not None:
+            self.loads[pk] += 1
+            self.push(pk)
+        return pk
+
+
+def assign_interviewers(queryset, stage='first', cap=None):
+    """
+    给一批候选人分配面试官，已经分配过该轮面试官的候选人不变
+    二面不会分配给该候选人的一面面试官
+    面试官只影响权限和列表，不影响漏斗和搜索索引，所以不发送 post_bulk_save，只失效面试官筛选的缓存
+    返回 (分配的候选人数, 因为面试官都达到上限而没有分配的候选人数)
+    """
+    interviewer_field, _ = ASSIGNMENT_STAGES[stage]
+    if cap is None:
+        cap = getattr(settings, 'INTERVIEWER_OPEN_LOAD_CAP', INTERVIEWER_OPEN_LOAD_CAP)
+
+    candidates = list(
+        queryset.filter(**{'%s__isnull' % interviewer_field: True})
+        .only('id', 'city', 'first_interviewer_user', 'modified_date').order_by('id')
+    )
+    if not candidates:
+        return 0, 0
+    loads = interviewer_loads()
+    balancer = LoadBalancer(loads, interviewer_cities(list(loads)), cap)
+
+    now = timezone.now()
+    assigned, unassigned = [], 0
+    for candidate in candidates:
+        exclude = candidate.first_interviewer_user_id if stage == 'second' else None
+        pk = balancer.choose(candidate.city, exclude)
+        if pk is None:
+            unassigned += 1
+            continue
+        setattr(candidate, '%s_id' % interviewer_field, pk)
+        candidate.modified_date = now
+        assigned.append(candidate)
+
+    Candidate.objects.bulk_update(assigned, [interviewer_field, 'modified_date'], batch_size=CONVERT_BATCH_SIZE)
+    interviewers.invalidate_filters()
+    return len(assigned), unassigned
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: signals
+# ========================================
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from interview import dedup, funnel, interviewers, ranking, search
+from interview.models import Candidate
+from interview.roles import invalidate_all_roles, invalidate_role
+from jobs.models import Resume
+
+# bulk_create / bulk_update 不会触发 post_save，批量写入之后发送该信号:
+# queryset 为本次写入的行，created / updated 为本次新建和修改的对象（可选）
+post_bulk_save = Signal()
+
+M2M_CHANGE_ACTIONS = ('post_add', 'post_remove', 'post_clear')
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    用户的组或者用户权限变化时，失效对应用户的角色缓存
+    """
+    if action not in M2M_CHANGE_ACTIONS:
+        return
+    if sender is User.groups.through:
+        interviewers.invalidate_choices()
+    if not reverse:
+        invalidate_role(instance.pk)
+    elif pk_set is None:
+        # 从组/权限一侧 clear，拿不到受影响的用户
+        invalidate_all_roles()
+    else:
+        # 从组/权限一侧修改，instance 是组或权限，pk_set 是用户
+        invalidate_role(*pk_set)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    if action in M2M_CHANGE_ACTIONS:
+        invalidate_all_roles()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, **kwargs):
+    invalidate_all_roles()
+    interviewers.invalidate_choices()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # is_superuser / is_active 的变化
+    invalidate_role(instance.pk)
+    # 登录时只更新 last_login，不影响面试官列表
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        interviewers.invalidate_choices()
+
+
+@receiver(post_save, sender=Candidate)
+@receiver(post_delete, sender=Candidate)
+def candidate_interviewers_changed(sender, **kwargs):
+    interviewers.invalidate_filters()
+
+
+@receiver(post_bulk_save, sender=Candidate)
+def candidate_interviewers_bulk_changed(sender, **kwargs):
+    interviewers.invalidate_filters()
+
+
+@receiver(post_save, sender=Candidate)
+@receiver(post_save, sender=Resume)
+def index_saved(sender, instance, **kwargs):
+    """
+    保存后增量更新全文索引
+    """
+    pk = instance.pk
+    transaction.on_commit(lambda: search.reindex(sender._default_manager.filter(pk=pk)))
+
+
+@receiver(post_delete, sender=Candidate)
+@receiver(post_delete, sender=Resume)
+def unindex_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: search.remove(sender, [pk]))
+
+
+@receiver(post_bulk_save)
+def index_bulk_saved(sender, queryset, **kwargs):
+    search.reindex(queryset)
+
+
+@receiver(post_init, sender=Candidate)
+def remember_funnel_snapshot(sender, instance, **kwargs):
+    """
+    记录加载时的漏斗字段，保存时据此增量更新漏斗统计
+    """
+    setattr(instance, funnel.SNAPSHOT_ATTR, funnel.snapshot(instance) if instance.pk else None)
+
+
+@receiver(pre_save, sender=Candidate)
+def load_funnel_snapshot(sender, instance, raw=False, **kwargs):
+    if not raw:
+        funnel.prepare_save(instance)
+
+
+@receiver(post_save, sender=Candidate)
+def update_funnel(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        funnel.record_save(instance, created)
+
+
+@receiver(post_delete, sender=Candidate)
+def update_funnel_on_delete(sender, instance, **kwargs):
+    funnel.record_delete(instance)
+
+
+@receiver(post_bulk_save, sender=Candidate)
+def update_funnel_bulk(sender, created=(), updated=(), **kwargs):
+    funnel.record_bulk(created, updated)
+
+
+@receiver(pre_save, sender=Candidate)
+@receiver(pre_save, sender=Resume)
+def fill_dedup_keys(sender, instance, raw=False, **kwargs):
+    if not raw:
+        dedup.fill_keys(instance)
+
+
+@receiver(pre_save, sender=Candidate)
+def fill_composite_score(sender, instance, raw=False, **kwargs):
+    if not raw:
+        ranking.fill_composite(instance)
+
+
+@receiver(post_save, sender=Candidate)
+def detect_duplicates(sender, instance, raw=False, **kwargs):
+    """
+    提交后检测新增或修改的候选人是否与已有候选人重复
+    """
+    if raw:
+        return
+    pk = instance.pk
+    transaction.on_commit(lambda: dedup.detect_for(Candidate.objects.filter(pk=pk)))
+
+
+@receiver(post_bulk_save, sender=Candidate)
+def detect_bulk_duplicates(sender, queryset, **kwargs):
+    dedup.detect_for(queryset)
+
+
+@receiver(post_save, sender=Resume)
+def link_saved_resume(sender, instance, raw=False, **kwargs):
+    """
+    投递或在管理后台修改的简历成为同一手机号候选人的当前简历
+    """
+    # interview.services 依赖本模块的 post_bulk_save，在这里导入避免循环导入
+    from interview.services import link_latest_resume
+
+    if not raw:
+        link_latest_resume(instance)
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: tasks
+# ========================================
+from celery import shared_task
+
+from interview.outbox import deliver_due
+
+
+@shared_task(ignore_result=True)
+def deliver_dingtalk_notifications():
+    """
+    celery 方式投递钉钉发件箱中到期的通知
+    """
+    return deliver_due()
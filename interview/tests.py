@@ -1,3 +1,840 @@
-from django.test import TestCase
+import csv
+import gzip
+import html
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.admin import site
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from interview import analytics, dedup, exports, funnel, interviewers, outbox
+from interview.models import Candidate, DingtalkNotification, DuplicateCandidate, ExportJob, FunnelStat
+from interview.pagination import CURSOR_VAR, decode_cursor, encode_cursor
+from interview.performance import LOG_PREFIX, Record
+from interview.query_plan import QueryPlanAssertionsMixin, explain
+from interview.ranking import top_candidates
+from interview.roles import resolve_role
+from interview import search
+from interview.signals import post_bulk_save
+from interview.services import assign_interviewers, backfill_resumes, convert_resumes, interviewer_loads
+from jobs.models import Resume
+from recruitment.db import PrimaryReplicaRouter, ReplicaRoutingMiddleware, replica_reads
+
+
+class CandidateChangelistQueryPlanTest(QueryPlanAssertionsMixin, TestCase):
+    """
+    管理后台候选人列表的常用查询不能退化为全表扫描
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = User.objects.create_superuser('hr', 'hr@example.com', 'password')
+        cls.interviewer = User.objects.create_user('interviewer', is_staff=True)
+        group = Group.objects.create(name='interviewer')
+        group.permissions.add(Permission.objects.get(codename='view_candidate'))
+        cls.interviewer.groups.add(group)
+
+    def changelist_queryset(self, user, **params):
+        request = RequestFactory().get('/admin/interview/candidate/', params)
+        request.user = user
+        changelist = site._registry[Candidate].get_changelist_instance(request)
+        return changelist.get_queryset(request)[:changelist.list_per_page]
+
+    def test_default_ordering(self):
+        self.assertNoFullScan(self.changelist_queryset(self.hr))
+
+    def test_list_filters(self):
+        filters = (
+            {'city': '北京'},
+            {'first_result__exact': '建议复试'},
+            {'second_result__exact': '建议录用'},
+            {'hr_result__exact': '建议录用'},
+            {'first_interviewer_user__id__exact': self.interviewer.pk},
+            {'second_interviewer_user__id__exact': self.interviewer.pk},
+            {'hr_interviewer_user__id__exact': self.hr.pk},
+        )
+        for params in filters:
+            with self.subTest(params=params):
+                self.assertNoFullScan(self.changelist_queryset(self.hr, **params))
+
+    def test_interviewer_scope(self):
+        self.assertNoFullScan(self.changelist_queryset(self.interviewer))
+
+    def test_keyset_seek(self):
+        Candidate.objects.bulk_create(
+            [Candidate(username='候选人%s' % i, city='北京', phone='1380000%04d' % i) for i in range(3)])
+        cursor = encode_cursor(['', '', '', 10 ** 9], 'next')
+        request = RequestFactory().get('/admin/interview/candidate/', {CURSOR_VAR: cursor})
+        request.user = self.hr
+        changelist = site._registry[Candidate].get_changelist_instance(request)
+        self.assertEqual(len(changelist.keyset), 4)
+        # 翻页的每一层查询都在索引上定位，不按索引顺序从头扫描
+        for queryset in changelist.seek_querysets(decode_cursor(cursor)):
+            self.assertIndexSeek(queryset[:changelist.list_per_page + 1])
+        self.assertIndexSeek(changelist.result_list)
+
+    def test_top_candidates(self):
+        queryset = top_candidates(Candidate.objects.all(), '后端开发工程师', '北京')
+        self.assertNoFullScan(queryset)
+        if connection.vendor == 'sqlite':
+            # 按索引的顺序读取前 K 行，不需要额外排序
+            self.assertNotIn('TEMP B-TREE', explain(queryset))
+
+
+class CandidateKeysetPaginationTest(TestCase):
+    """
+    游标分页的翻页链接在 grappelli 的列表页中渲染，沿着"下一页"可以翻到最后一行
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = User.objects.create_superuser('hr', 'hr@example.com', 'password')
+        Candidate.objects.bulk_create(
+            [Candidate(username='候选人%s' % i, city='北京', phone='1380000%04d' % i) for i in range(250)])
+
+    def test_follow_next_cursor(self):
+        self.client.force_login(self.hr)
+        url = reverse('admin:interview_candidate_changelist')
+        seen, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(candidate.pk for candidate in response.context['cl'].result_list)
+            pages += 1
+            match = re.search(r'<a href="([^"]+)">下一页</a>', response.content.decode())
+            url = match and reverse('admin:interview_candidate_changelist') + html.unescape(match.group(1))
+        self.assertEqual(pages, 3)
+        self.assertEqual(sorted(seen), sorted(Candidate.objects.values_list('pk', flat=True)))
+
+
+class CandidateApiSyncTest(TestCase):
+    """
+    接口增量同步：大量候选人（超过 DRF CursorPagination 的 offset_cutoff）的修改时间相同时，沿着 next 翻页每一行只返回一次
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = User.objects.create_superuser('hr', 'hr@example.com', 'password')
+        Candidate.objects.bulk_create(
+            [Candidate(username='候选人%s' % i, city='北京', phone='1380000%04d' % i) for i in range(1200)])
+        # 批量导入、批量分配面试官时同一批候选人共用一个修改时间
+        Candidate.objects.update(modified_date=timezone.now().replace(microsecond=123456))
+
+    def test_sync_across_tie(self):
+        self.client.force_login(self.hr)
+        url = reverse('interview:candidate-list') + '?page_size=100&fields=id,username'
+        ids, pages = [], 0
+        # 翻页出错时不会结束，最多翻 20 页
+        while url and pages < 20:
+            data = self.client.get(url).json()
+            ids.extend(row['id'] for row in data['results'])
+            pages += 1
+            url = data['next']
+        self.assertEqual(pages, 12)
+        self.assertEqual(len(ids), 1200)
+        self.assertEqual(sorted(ids), sorted(Candidate.objects.values_list('pk', flat=True)))
+
+    def test_not_modified(self):
+        self.client.force_login(self.hr)
+        url = reverse('interview:candidate-list') + '?page_size=100'
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        Candidate.objects.filter(pk=response.json()['results'][0]['id']).update(
+            username='已修改', modified_date=timezone.now())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+class CandidateApiFieldPermissionTest(TestCase):
+    """
+    接口的字段权限与管理后台详情页相同，面试官拿不到 hr 的评分和备注
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        group = Group.objects.create(name='interviewer')
+        cls.first = User.objects.create_user('first', is_staff=True)
+        cls.second = User.objects.create_user('second', is_staff=True)
+        group.user_set.add(cls.first, cls.second)
+        cls.candidate = Candidate.objects.create(
+            username='张三', city='北京', phone='13800000001', first_interviewer_user=cls.first,
+            second_interviewer_user=cls.second, first_result='建议复试', second_result='建议录用', hr_result='建议录用',
+            hr_score=5, hr_remark='薪资要求偏高')
+
+    def fetch(self, user, **params):
+        self.client.force_login(user)
+        rows = self.client.get(reverse('interview:candidate-list'), params).json()['results']
+        detail = self.client.get(reverse('interview:candidate-detail', args=(self.candidate.pk, ))).json()
+        return rows, detail
+
+    def test_interviewers_never_receive_hr_fields(self):
+        for user in (self.first, self.second):
+            rows, detail = self.fetch(user)
+            for data in rows + [detail]:
+                with self.subTest(user=user.username):
+                    self.assertEqual([name for name in data if name.startswith('hr_')], [])
+                    self.assertEqual(data['first_result'], '建议复试')
+        rows, detail = self.fetch(self.first)
+        self.assertNotIn('second_result', detail)
+        rows, detail = self.fetch(self.second)
+        self.assertEqual(detail['second_result'], '建议录用')
+
+    def test_interviewers_cannot_filter_on_hidden_fields(self):
+        rows, _ = self.fetch(self.first, hr_result='不存在的结果')
+        self.assertEqual([row['id'] for row in rows], [self.candidate.pk])
+
+    def test_interviewers_see_resumes_with_differently_formatted_phones(self):
+        Candidate.objects.update(resume=None)
+        mine = Resume.objects.create(username='张三', city='北京', phone='+86 138-0000-0001')
+        Resume.objects.create(username='李四', city='北京', phone='13800000002')
+        self.client.force_login(self.first)
+        rows = self.client.get(reverse('interview:resume-list')).json()['results']
+        self.assertEqual([row['id'] for row in rows], [mine.pk])
+
+        # 手机号筛选同样按规范化手机号匹配
+        for phone in ('13800000001', '0086 138 0000 0001'):
+            rows = self.client.get(reverse('interview:resume-list'), {'phone': phone}).json()['results']
+            self.assertEqual([row['id'] for row in rows], [mine.pk])
+
+    def test_hr_receives_all_fields(self):
+        hr = User.objects.create_superuser('hr', 'hr@example.com', 'password')
+        rows, detail = self.fetch(hr, fields='id,hr_remark')
+        self.assertEqual(rows, [{'id': self.candidate.pk, 'hr_remark': '薪资要求偏高'}])
+        self.assertEqual(detail['hr_score'], '5')
+
+
+class CandidateFullTextSearchTest(TestCase):
+    """
+    全文搜索在管理后台的筛选和数据权限范围内进行，结果数不受限制
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = User.objects.create_superuser('hr', 'hr@example.com', 'password')
+        cls.interviewer = User.objects.create_user('interviewer', is_staff=True)
+        group = Group.objects.create(name='interviewer')
+        group.permissions.add(Permission.objects.get(codename='view_candidate'))
+        cls.interviewer.groups.add(group)
+        Candidate.objects.bulk_create(
+            [dedup.fill_keys(Candidate(username='张三%s' % i, city='北京' if i % 2 else '上海', phone='1380000%04d' % i,
+                                       bachelor_school='北京大学')) for i in range(400)])
+        cls.assigned = Candidate.objects.order_by('-pk').first()
+        Candidate.objects.filter(pk=cls.assigned.pk).update(first_interviewer_user=cls.interviewer)
+        search.reindex(Candidate.objects.all())
+
+    def search_results(self, user, **params):
+        request = RequestFactory().get('/admin/interview/candidate/', params)
+        request.user = user
+        changelist = site._registry[Candidate].get_changelist_instance(request)
+        return changelist.get_queryset(request)
+
+    def test_results_are_not_capped(self):
+        results = self.search_results(self.hr, q='北京大学')
+        self.assertIn('search_rank', str(results.query))
+        self.assertEqual(results.count(), 400)
+
+    def test_filters_apply_before_ranking(self):
+        self.assertEqual(self.search_results(self.hr, q='北京大学', city='北京').count(), 200)
+
+    def test_interviewer_scope(self):
+        self.assertEqual(list(self.search_results(self.interviewer, q='张三').values_list('pk', flat=True)),
+                         [self.assigned.pk])
+
+    def test_phone_fragments(self):
+        phones = lambda **params: sorted(self.search_results(self.hr, **params).values_list('phone', flat=True))
+        self.assertEqual(phones(q='0399'), ['13800000399'])
+        self.assertEqual(phones(q='138 0399'), ['13800000399'])
+        self.assertEqual(len(phones(q='1380000039')), 10)
+        self.assertEqual(phones(q='0399', city='上海'), [])
+
+
+class InterviewerAssignmentTest(TestCase):
+    """
+    面试官负载按一面、二面未出结果的候选人数计算，分配时优先负载低的面试官
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        group = Group.objects.create(name='interviewer')
+        cls.busy = User.objects.create_user('busy')
+        cls.idle = User.objects.create_user('idle')
+        group.user_set.add(cls.busy, cls.idle)
+        Candidate.objects.bulk_create(
+            [Candidate(username='一面%s' % i, city='北京', phone='1380000%04d' % i, first_interviewer_user=cls.busy)
+             for i in range(3)] +
+            [Candidate(username='二面%s' % i, city='北京', phone='1390000%04d' % i, first_interviewer_user=cls.idle,
+                       first_result='建议复试', second_interviewer_user=cls.busy) for i in range(2)])
+
+    def test_loads(self):
+        self.assertEqual(interviewer_loads(), {self.busy.pk: 5, self.idle.pk: 0})
+
+    def test_assign_to_least_loaded(self):
+        Candidate.objects.create(username='新候选人', city='北京', phone='13700000000')
+        assigned, unassigned = assign_interviewers(Candidate.objects.filter(username='新候选人'))
+        self.assertEqual((assigned, unassigned), (1, 0))
+        self.assertEqual(Candidate.objects.get(username='新候选人').first_interviewer_user, self.idle)
+
+
+class InterviewerFormTest(TestCase):
+    """
+    面试官字段只限制新选择的用户，已经离开面试官组的当前面试官可以原样保存
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        group = Group.objects.create(name='interviewer')
+        cls.member = User.objects.create_user('member')
+        cls.departed = User.objects.create_user('departed')
+        cls.outsider = User.objects.create_user('outsider')
+        group.user_set.add(cls.member)
+        cls.candidate = Candidate.objects.create(
+            username='张三', city='北京', phone='13800000001', first_interviewer_user=cls.departed)
+        cls.hr = User.objects.create_superuser('hr', 'hr@example.com', 'password')
+
+    def bind(self, **data):
+        request = RequestFactory().get('/')
+        request.user = self.hr
+        form_class = site._registry[Candidate].get_changelist_form(
+            request, fields=('first_interviewer_user', 'second_interviewer_user'))
+        data = {'first_interviewer_user': self.departed.pk, 'second_interviewer_user': '', **data}
+        return form_class(data, instance=self.candidate)
+
+    def test_keeps_current_interviewer(self):
+        form = self.bind(second_interviewer_user=self.member.pk)
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.save().first_interviewer_user_id, self.departed.pk)
+
+    def test_rejects_new_users_outside_groups(self):
+        self.assertFalse(self.bind(second_interviewer_user=self.outsider.pk).is_valid())
+        self.assertFalse(self.bind(first_interviewer_user=self.outsider.pk).is_valid())
+
+
+class StubDingtalkHandler(BaseHTTPRequestHandler):
+    """
+    钉钉机器人接口的桩，返回 server.errcode，收到的消息记录在 server.received
+    """
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.received.append(json.loads(body.decode()))
+        data = json.dumps({'errcode': self.server.errcode, 'errmsg': 'stub error' if self.server.errcode else 'ok'})
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(data.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class DingtalkOutboxTest(TestCase):
+    """
+    发件箱投递到本地的钉钉桩服务: 退避重试、死信、租约过期后重新领取、跨进程共享的速率限制
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = HTTPServer(('127.0.0.1', 0), StubDingtalkHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.webhook = override_settings(DINGTALK_WEB_HOOK='http://127.0.0.1:%s/robot/send' % cls.server.server_port)
+        cls.webhook.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.webhook.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.errcode = 0
+        self.server.received = []
+
+    def notify(self, **kwargs):
+        kwargs.setdefault('next_attempt_at', timezone.now())
+        return DingtalkNotification.objects.create(message='面试通知', **kwargs)
+
+    def deliver_due(self):
+        return outbox.deliver_due(outbox.RateLimiter(100, sleep=self.fail))
+
+    def test_delivered(self):
+        notification = self.notify(at_mobiles='13800000000')
+        self.assertEqual(self.deliver_due(), 1)
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts), ('sent', 1))
+        self.assertIsNotNone(notification.sent_date)
+        self.assertTrue(self.server.received[0]['text']['content'].startswith('通知: 面试通知'))
+        self.assertEqual(self.server.received[0]['at']['atMobiles'], ['13800000000'])
+
+    def test_backoff(self):
+        self.server.errcode = 310000
+        notification = self.notify()
+        before = timezone.now()
+        self.assertEqual(self.deliver_due(), 0)
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts), ('pending', 1))
+        self.assertIn('stub error', notification.last_error)
+        self.assertGreaterEqual(notification.next_attempt_at, before + timedelta(seconds=outbox.BACKOFF_BASE_SECONDS * 0.8))
+        # 退避时间未到，不会再次投递
+        self.assertEqual(self.deliver_due(), 0)
+        self.assertEqual(len(self.server.received), 1)
+
+    @override_settings(DINGTALK_MAX_ATTEMPTS=3)
+    def test_dead_letter(self):
+        self.server.errcode = 310000
+        notification = self.notify(attempts=2)
+        self.deliver_due()
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts), ('dead', 3))
+        self.assertEqual(self.deliver_due(), 0)
+        self.assertEqual(len(self.server.received), 1)
+
+    def test_lease_expiry(self):
+        expired = self.notify(status='sending', next_attempt_at=timezone.now() - timedelta(seconds=1))
+        leased = self.notify(status='sending', next_attempt_at=timezone.now() + timedelta(seconds=outbox.LEASE_SECONDS))
+        self.assertEqual(self.deliver_due(), 1)
+        expired.refresh_from_db()
+        leased.refresh_from_db()
+        self.assertEqual(expired.status, 'sent')
+        self.assertEqual((leased.status, leased.attempts), ('sending', 0))
+
+    def test_rate_limit_counts_sent_messages(self):
+        now = timezone.now()
+        # 其他进程在最近一分钟内已经发送了 2 条
+        for seconds in (50, 20):
+            self.notify(status='sent', sent_date=now - timedelta(seconds=seconds))
+        notification = self.notify()
+        delays = []
+
+        def sleep(delay):
+            delays.append(delay)
+            DingtalkNotification.objects.filter(status='sent').update(sent_date=now - timedelta(seconds=120))
+
+        self.assertEqual(outbox.deliver_due(outbox.RateLimiter(2, sleep=sleep)), 1)
+        # 等到较早的一条移出窗口
+        self.assertEqual(len(delays), 1)
+        self.assertAlmostEqual(delays[0], 10, delta=2)
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, 'sent')
+
+
+class ImportCandidatesTest(TestCase):
+    """
+    import_candidates 按规范化手机号匹配已有候选人，userid 冲突的行被拒绝，不影响同批次的其他行
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.existing = Candidate.objects.create(username='张三', city='北京', phone='138-0000-0001')
+        cls.owner = Candidate.objects.create(username='李四', city='上海', phone='13800000002', userid=7)
+
+    def import_rows(self, *rows):
+        with tempfile.NamedTemporaryFile('w', encoding='GBK', suffix='.csv', delete=False) as f:
+            f.write('\n'.join(';'.join(row) for row in rows))
+        self.addCleanup(os.remove, f.name)
+        out = StringIO()
+        call_command('import_candidates', path=f.name, stdout=out)
+        return out.getvalue()
+
+    def test_update_by_normalized_phone(self):
+        self.import_rows(['张三', '深圳', '+86 13800000001', '北京大学', '计算机', '本科', '90', ''])
+        self.assertEqual(Candidate.objects.count(), 2)
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.city, self.existing.phone), ('深圳', '+86 13800000001'))
+
+    def test_reject_userid_conflict(self):
+        output = self.import_rows(
+            ['王五', '广州', '13800000003', '', '', '', '', '', '7'],
+            ['赵六', '广州', '13800000004', '', '', '', '', '', '8'],
+            ['孙七', '广州', '13800000005', '', '', '', '', '', '8'],
+        )
+        self.assertIn('第 1 行被拒绝: userid 7 已属于其他候选人', output)
+        self.assertIn('第 3 行被拒绝: userid 8 已属于其他候选人', output)
+        self.assertEqual(Candidate.objects.get(userid=8).username, '赵六')
+        self.assertFalse(Candidate.objects.filter(username__in=('王五', '孙七')).exists())
+
+
+class ConvertResumesTest(TestCase):
+    """
+    简历转候选人按重新计算的规范化手机号去重，手机号规范化后为空的简历不参与去重
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = User.objects.create_superuser('hr', 'hr@example.com', 'password')
+        Candidate.objects.create(username='张三', city='北京', phone='13800000001')
+        Resume.objects.create(username='张三', city='北京', phone='+86 138 0000 0001')
+        Resume.objects.create(username='李四', city='北京', phone='无')
+        Resume.objects.create(username='王五', city='北京', phone='暂无')
+        # 存量简历还没有补齐规范化手机号
+        Resume.objects.update(phone_key='')
+
+    def test_convert(self):
+        candidates, skipped = convert_resumes(Resume.objects.all(), self.hr)
+        self.assertEqual(skipped, 1)
+        self.assertEqual(sorted(candidate.username for candidate in candidates), ['李四', '王五'])
+        self.assertEqual(Candidate.objects.filter(username__in=('李四', '王五'), phone_key='').count(), 2)
+
+
+class BackfillResumesTest(TestCase):
+    """
+    存量候选人关联同一规范化手机号的最新简历，规范化手机号为空的候选人和简历不互相关联
+    """
+
+    def test_backfill(self):
+        keyed = Candidate.objects.create(username='张三', city='北京', phone='13800000001')
+        unkeyed = Candidate.objects.create(username='李四', city='北京', phone='无')
+        resume = Resume.objects.create(username='张三', city='北京', phone='138 0000 0001')
+        Resume.objects.create(username='王五', city='北京', phone='暂无')
+        Candidate.objects.update(resume=None)
+        backfill_resumes()
+        keyed.refresh_from_db()
+        unkeyed.refresh_from_db()
+        self.assertEqual((keyed.resume_id, unkeyed.resume_id), (resume.pk, None))
+
+
+class GenerateRecruitmentDataTest(TransactionTestCase):
+    """
+    小规模生成的数据中候选人关联同一手机号的简历，身份信息一致，性能测试能在生成的数据上跑完
+    性能测试自己用事务回滚写库的测试，TransactionTestCase 不把测试包在事务里
+    """
+
+    @override_settings(ALLOWED_HOSTS=['localhost'])
+    def test_seeded_run(self):
+        call_command('generate_recruitment_data', scale='200', seed=7, stdout=StringIO())
+        candidates = Candidate.objects.select_related('resume')
+        self.assertTrue(candidates.exists())
+        for candidate in candidates:
+            self.assertEqual((candidate.username, candidate.phone_key, candidate.bachelor_school),
+                             (candidate.resume.username, candidate.resume.phone_key, candidate.resume.bachelor_school))
+
+        # 与线上一样: hr 使用超级用户，面试官组有查看候选人的权限
+        User.objects.create_superuser('hr', 'hr@example.com', 'password')
+        Group.objects.get(name='interviewer').permissions.add(Permission.objects.get(codename='view_candidate'))
+        stdout, stderr = StringIO(), StringIO()
+        call_command('run_benchmarks', repeat=1, import_rows=20, convert_rows=20, stdout=stdout, stderr=stderr)
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(report['rows']['resume'], 200)
+        self.assertEqual(report['rows']['candidate'], candidates.count())
+        self.assertTrue(report['results'])
+        for result in report['results']:
+            self.assertIn(result['status'], (None, 200, 302), result['name'])
+
+
+class ExportResumeTest(TestCase):
+    """
+    导出任务中断后从断点继续，心跳超时的执行中任务可以重新领取
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Candidate.objects.bulk_create(
+            [Candidate(username='候选人%s' % i, city='北京', phone='1380000%04d' % i) for i in range(5)])
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings = override_settings(EXPORT_ROOT=root.name, EXPORT_WATERMARK_LAG_SECONDS=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def exported_ids(self, job):
+        ids = []
+        for name in sorted(os.listdir(job.output_dir)):
+            if name.startswith('part-'):
+                with gzip.open(os.path.join(job.output_dir, name), 'rt', encoding='utf-8') as f:
+                    ids.extend(int(row['id']) for row in csv.DictReader(f))
+        return ids
+
+    def test_resume_after_failure(self):
+        job = ExportJob.objects.create(mode='full')
+
+        def interrupt(job):
+            raise RuntimeError('interrupted')
+
+        with self.assertRaises(RuntimeError):
+            exports.run(exports.claim(job.pk), chunk_rows=2, progress=interrupt)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_written, job.chunk_count), ('failed', 2, 1))
+        self.assertIn('interrupted', job.error)
+
+        exports.run(exports.claim(job.pk), chunk_rows=2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_written, job.chunk_count), ('done', 5, 3))
+        self.assertEqual(self.exported_ids(job), list(Candidate.objects.order_by('modified_date', 'id')
+                                                      .values_list('id', flat=True)))
+        with open(os.path.join(job.output_dir, 'manifest.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['rows'], 5)
+
+    def test_delta_leaves_recent_rows_to_the_next_run(self):
+        Candidate.objects.update(modified_date=timezone.now() - timedelta(hours=1))
+        with override_settings(EXPORT_WATERMARK_LAG_SECONDS=60):
+            full = exports.run(exports.claim(ExportJob.objects.create(mode='full').pk))
+            # 写事务在导出开始前取了 modified_date，但是在导出之后才提交
+            late = Candidate.objects.create(username='晚提交', city='北京', phone='13900000000')
+            Candidate.objects.filter(pk=late.pk).update(modified_date=timezone.now() - timedelta(seconds=30))
+            delta = exports.run(exports.claim(ExportJob.objects.create(mode='delta').pk))
+        self.assertEqual(len(self.exported_ids(full)), 5)
+        self.assertEqual(self.exported_ids(delta), [])
+        self.assertLessEqual(delta.watermark_to, timezone.now() - timedelta(seconds=60))
+
+        # 延迟过去之后的下一次增量
+        following = exports.run(exports.claim(ExportJob.objects.create(mode='delta').pk))
+        self.assertEqual(self.exported_ids(following), [late.pk])
+
+    def test_claim_stale_running_job(self):
+        fresh = ExportJob.objects.create(status='running', heartbeat_date=timezone.now())
+        stale = ExportJob.objects.create(
+            status='running', heartbeat_date=timezone.now() - timedelta(seconds=exports.STALE_SECONDS + 1))
+        self.assertIsNone(exports.claim(fresh.pk))
+        self.assertEqual(exports.claim(stale.pk).pk, stale.pk)
+        self.assertIsNone(exports.claim(stale.pk))
+
+
+class RoleCacheTest(TestCase):
+    """
+    进程内缓存无法被其他进程失效，角色和面试官列表的跨请求缓存只在共享缓存上启用
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('interviewer')
+        self.group = Group.objects.create(name='hr')
+
+    def join_group_elsewhere(self):
+        # 模拟其他进程修改组成员：不经过本进程的信号
+        User.groups.through.objects.bulk_create([User.groups.through(user=self.user, group=self.group)])
+
+    def test_process_local_cache_is_not_used(self):
+        self.assertFalse(resolve_role(self.user).is_hr)
+        self.join_group_elsewhere()
+        self.assertTrue(resolve_role(self.user).is_hr)
+
+    @override_settings(RECRUITMENT_CROSS_REQUEST_CACHE=True)
+    def test_shared_cache(self):
+        self.assertFalse(resolve_role(self.user).is_hr)
+        with self.assertNumQueries(0):
+            self.assertFalse(resolve_role(self.user).is_hr)
+
+    def test_interviewer_choices_without_shared_cache(self):
+        self.assertEqual(interviewers.load_choices(), [])
+        self.join_group_elsewhere()
+        self.assertEqual(interviewers.load_choices(), [(self.user.pk, 'interviewer')])
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTest(TransactionTestCase):
+    """
+    只读的代码块读从库；写入之后、以及主库事务中的读取回到主库
+    TransactionTestCase 不把测试包在事务里，才能区分事务内外
+    """
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        # 每个请求开始时重置路由状态
+        ReplicaRoutingMiddleware(lambda request: None).process_request(RequestFactory().get('/'))
+
+    def test_reads_use_replica(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Candidate), 'replica')
+        self.assertEqual(self.router.db_for_read(Candidate), 'default')
+
+    def test_reads_after_write_use_primary(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_write(Candidate), 'default')
+            self.assertEqual(self.router.db_for_read(Candidate), 'default')
+
+    def test_reads_inside_atomic_use_primary(self):
+        with replica_reads():
+            with transaction.atomic():
+                self.assertEqual(self.router.db_for_read(Candidate), 'default')
+            self.assertEqual(self.router.db_for_read(Candidate), 'replica')
+
+
+class FunnelDeltaTest(TestCase):
+    """
+    保存、修改、删除和批量写入后增量维护的漏斗统计与全量重建的结果一致
+    """
+
+    def stats(self):
+        return {(row.city, row.apply_position, row.stage, row.result): row.count
+                for row in FunnelStat.objects.exclude(count=0)}
+
+    def assert_matches_rebuild(self):
+        incremental = self.stats()
+        funnel.rebuild()
+        self.assertEqual(incremental, self.stats())
+
+    def test_deltas(self):
+        a = Candidate.objects.create(username='张三', city='北京', phone='13800000001', apply_position='后端')
+        b = Candidate.objects.create(username='李四', city='北京', phone='13800000002', apply_position='后端')
+        Candidate.objects.create(username='王五', city='上海', phone='13800000003')
+        self.assertEqual(self.stats()[('北京', '后端', 'first', '')], 2)
+
+        a.first_result = '建议复试'
+        a.save()
+        b.city = '上海'
+        b.save()
+        # 只加载部分字段的候选人保存时从数据库读取修改前的值
+        deferred = Candidate.objects.only('id', 'second_result').get(pk=a.pk)
+        deferred.second_result = '建议录用'
+        deferred.save()
+        Candidate.objects.get(username='王五').delete()
+        self.assertEqual(self.stats()[('北京', '后端', 'first', '建议复试')], 1)
+        self.assert_matches_rebuild()
+
+        updated = list(Candidate.objects.all())
+        for candidate in updated:
+            candidate.hr_result = '录用'
+        Candidate.objects.bulk_update(updated, ['hr_result'])
+        created = [Candidate(username='赵六', city='广州', phone='13800000004')]
+        Candidate.objects.bulk_create(created)
+        post_bulk_save.send(sender=Candidate, queryset=Candidate.objects.all(), created=created, updated=updated)
+        self.assertEqual(self.stats()[('广州', '', 'hr', '')], 1)
+        self.assert_matches_rebuild()
+
+
+class DuplicateCandidateTest(TestCase):
+    """
+    按规范化手机号、邮箱、姓名学校分块检测重复候选人，重复检测不产生重复的记录对，合并后补齐空字段并删除重复记录
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.keep = Candidate.objects.create(username='张三', city='北京', phone='13800000001',
+                                           email='zhangsan@qq.com', bachelor_school='北京大学')
+        cls.other = Candidate.objects.create(username='张三', city='北京', phone='+86 138 0000 0001',
+                                            email='zhangsan@qq.con', bachelor_school='北京大学', major='计算机',
+                                            userid=42)
+        Candidate.objects.create(username='李四', city='上海', phone='13900000000', bachelor_school='复旦大学')
+
+    def test_detect_and_merge(self):
+        dedup.detect_all()
+        dedup.detect_all()
+        pair = DuplicateCandidate.objects.get()
+        self.assertEqual((pair.candidate_id, pair.duplicate_id), (self.keep.pk, self.other.pk))
+        self.assertTrue({'phone', 'email', 'name', 'school'} <= set(pair.reasons.split(',')))
+
+        keep = dedup.merge(pair, 'hr')
+        self.assertEqual((keep.major, keep.userid, keep.last_editor), ('计算机', 42, 'hr'))
+        self.assertFalse(Candidate.objects.filter(pk=self.other.pk).exists())
+        pair.refresh_from_db()
+        self.assertEqual(pair.status, 'merged')
+
+    def test_detect_phone_typo_for_new_candidate(self):
+        typo = Candidate.objects.create(username='张三', city='北京', phone='13800000007', bachelor_school='北京大学')
+        dedup.detect_for(Candidate.objects.filter(pk=typo.pk))
+        reasons = dict(DuplicateCandidate.objects.filter(duplicate=typo).values_list('candidate_id', 'reasons'))
+        self.assertEqual(set(reasons), {self.keep.pk, self.other.pk})
+        self.assertIn('phone_typo', reasons[self.keep.pk])
+
+
+class PerformanceLogTest(TestCase):
+    """
+    所有请求都以紧凑的一行记录，抽样的记录在汇总时按抽样率加权；只有慢请求的日志不输出百分位
+    """
+
+    def write_log(self, records):
+        f = tempfile.NamedTemporaryFile('w', suffix='.log', delete=False, encoding='utf-8')
+        self.addCleanup(os.remove, f.name)
+        with f:
+            for data in records:
+                f.write('2026-10-18 perf 1 INFO %s%s\n' % (LOG_PREFIX, json.dumps(data)))
+        return f.name
+
+    def summary(self, records):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('performance_summary', log=self.write_log(records), json=True, stdout=stdout, stderr=stderr)
+        return json.loads(stdout.getvalue()), stderr.getvalue()
+
+    @override_settings(PERFORMANCE_SAMPLE_RATE=0)
+    def test_sampling_keeps_slow_requests(self):
+        self.assertIsNone(Record('fast').finish())
+        with override_settings(PERFORMANCE_SLOW_REQUEST_MS=-1):
+            data = Record('slow').finish()
+        self.assertTrue(data['slow'])
+        self.assertIn('slowest_sql', data)
+        self.assertNotIn('sample', data)
+
+    def test_sampled_records_are_weighted(self):
+        fast = {'endpoint': 'board', 'wall_ms': 10, 'queries': 1, 'slow': False, 'sample': 0.5}
+        slow = {'endpoint': 'board', 'wall_ms': 1000, 'queries': 3, 'slow': True}
+        (item, ), warning = self.summary([fast] * 9 + [slow] * 2)
+        self.assertEqual(warning, '')
+        self.assertEqual((item['count'], item['logged'], item['slow']), (20, 11, 2))
+        self.assertEqual((item['p50'], item['p95'], item['max']), (10, 1000, 1000))
+        self.assertEqual(item['avg_queries'], 1.2)
+
+    def test_slow_only_log(self):
+        slow = {'endpoint': 'board', 'wall_ms': 1000, 'queries': 3, 'slow': True}
+        (item, ), warning = self.summary([slow] * 3)
+        self.assertIn('只有慢请求', warning)
+        self.assertEqual((item['p50'], item['p95'], item['p99'], item['max']), (None, None, None, 1000))
+
+
+class InterviewerCalibrationTest(TestCase):
+    """
+    校准后宽松和严格的面试官的分数互相靠近，打分人数少的面试官修正得更少，校准分没有变化的行不回写
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.lenient, cls.strict, cls.newcomer = [
+            User.objects.create_user(name) for name in ('lenient', 'strict', 'newcomer')]
+        offsets = ('-0.4', '-0.2', '0.0', '0.2', '0.4')
+        rows = [(cls.lenient, Decimal('4.5') + Decimal(offset)) for offset in offsets * 4] + \
+            [(cls.strict, Decimal('2.5') + Decimal(offset)) for offset in offsets * 4] + \
+            [(cls.newcomer, Decimal('2.3')), (cls.newcomer, Decimal('2.5'))]
+        Candidate.objects.bulk_create([
+            Candidate(username='候选人%s' % i, city='北京', phone='1380000%04d' % i, first_score=score,
+                      first_interviewer_user=user)
+            for i, (user, score) in enumerate(rows)])
+
+    def calibrated_by(self, user, calibrated, table):
+        return calibrated[table.interviewers['first'] == user.pk]
+
+    def test_lenient_and_strict_move_toward_each_other(self):
+        table = analytics.load()
+        _, calibrated = analytics.calibrate(table, 'first')
+        raw = table.scores['first_score']
+        raw_gap = self.calibrated_by(self.lenient, raw, table).mean() - self.calibrated_by(self.strict, raw, table).mean()
+        gap = self.calibrated_by(self.lenient, calibrated, table).mean() - \
+            self.calibrated_by(self.strict, calibrated, table).mean()
+        self.assertAlmostEqual(raw_gap, 2.0)
+        self.assertLess(abs(gap), raw_gap)
+
+    def test_low_count_interviewers_are_shrunk(self):
+        table = analytics.load()
+        _, calibrated = analytics.calibrate(table, 'first')
+        raw = table.scores['first_score']
+        # 同样打 2.5 分，面试过 20 人的严格面试官的分数被提高得更多
+        strict = calibrated[(table.interviewers['first'] == self.strict.pk) & (raw == 2.5)]
+        newcomer = calibrated[(table.interviewers['first'] == self.newcomer.pk) & (raw == 2.5)]
+        self.assertGreater(strict.min(), newcomer.max())
+        # 不收缩时只面试过 2 人的面试官被修正得更多
+        _, unshrunk = analytics.calibrate(table, 'first', prior=0)
+        self.assertGreater(self.calibrated_by(self.newcomer, unshrunk, table).mean(),
+                           self.calibrated_by(self.newcomer, calibrated, table).mean())
+
+    def test_unchanged_rows_are_not_rewritten(self):
+        modified = dict(Candidate.objects.values_list('pk', 'modified_date'))
+        self.assertEqual(analytics.run_calibration(), (42, 42))
+        self.assertEqual(analytics.run_calibration(), (42, 0))
+        changed = Candidate.objects.filter(first_interviewer_user=self.newcomer).first()
+        Candidate.objects.filter(pk=changed.pk).update(first_score_calibrated=None)
+        self.assertEqual(analytics.run_calibration(), (42, 1))
+        # 校准分是派生数据，回写不更新修改时间
+        self.assertEqual(dict(Candidate.objects.values_list('pk', 'modified_date')), modified)
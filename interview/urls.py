@@ -3,4 +3,16 @@
 # Author: wjh
 # Date：2020/11/12
 # FILE: urls
-# ========================================
\ No newline at end of file
+# ========================================
+from rest_framework import routers
+
+from interview import api
+
+app_name = 'interview'
+
+router = routers.DefaultRouter()
+router.register('jobs', api.JobViewSet)
+router.register('resumes', api.ResumeViewSet)
+router.register('candidates', api.CandidateViewSet)
+
+urlpatterns = router.urls
@@ -3,27 +3,27 @@ from django.utils import timezone
 from django.contrib import messages
 
 from jobs.models import Job, Resume
-from interview.models import Candidate
+from interview.search import FullTextSearchAdminMixin
+from interview.services import convert_resumes
+
+# 提示信息中最多列出的候选人姓名数
+MESSAGE_NAME_LIMIT = 20
 
 
 def enter_interview_process(model_admin, request, queryset):
     """
     将简历添加到招聘内容中，激活面试流程
+    在一个事务里批量创建候选人，已经进入面试流程的简历会被跳过
     """
-    candidate_names = []
-    for resume in queryset:
-        candidate = Candidate()
-        # 把 obj 对象中的所有属性拷贝到 candidate 对象中:
-        candidate.__dict__.update(resume.__dict__)
-        candidate.created_date = timezone.now()
-        candidate.modified_date = timezone.now()
-        candidate_names.append(candidate.username)
-        candidate.creator = request.user.username
-        candidate.save()
+    candidates, skipped = convert_resumes(queryset, creator=request.user.username)
+    names = '、'.join(candidate.username for candidate in candidates[:MESSAGE_NAME_LIMIT])
+    if len(candidates) > MESSAGE_NAME_LIMIT:
+        names += ' 等'
     messages.add_message(
         request=request,
         level=messages.INFO,
-        message='候选人: %s 已成功进入面试流程' % ('、'.join(candidate_names)),
+        message='已创建 %s 位候选人%s，跳过 %s 份简历（候选人已存在或同一手机号重复）' % (
+            len(candidates), names and '(%s)' % names, skipped),
     )
 
 
@@ -36,12 +36,17 @@ class JobAdmin(admin.ModelAdmin):
 
     def save_model(self, request, obj, form, change):
         obj.creator = request.user
+        # 修改时间用于职位页面的 ETag/Last-Modified
+        obj.modified_date = timezone.now()
         super().save_model(request, obj, form, change)
 
 
-class ResumeAdmin(admin.ModelAdmin):
+class ResumeAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     actions = (enter_interview_process, )
 
+    # 查询字段，支持全文索引时可以搜索工作经历和项目经历
+    search_fields = ('username', 'phone', 'email', 'bachelor_school')
+
     list_display = (
         'username', 'applicant', 'city', 'apply_position', 'bachelor_school', 'master_school', 'major', 'created_date')
 
@@ -57,6 +62,8 @@ class ResumeAdmin(admin.ModelAdmin):
 
     def save_model(self, request, obj, form, change):
         obj.applicant = request.user
+        # 修改时间用于接口增量同步（modified_since）和候选人关联最新的简历
+        obj.modified_date = timezone.now()
         super().save_model(request, obj, form, change)
 
 
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class JobsConfig(AppConfig):
     name = 'jobs'
+
+    def ready(self):
+        # 注册信号处理
+        from jobs import signals  # noqa: F401
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: async_views
+# ========================================
+"""
+公开职位页面和投递简历的异步视图，ASGI 部署时使用（settings.JOBS_ASYNC_VIEWS = True，见 settings/asgi.py）
+行为与 jobs.views 中的同步视图相同：
+    - Django 3.1 没有异步 ORM 和异步缓存，数据库、缓存、会话和模板渲染都通过 sync_to_async 在线程中执行，
+      事件循环只负责等待，慢速客户端上传简历时不会占用 worker
+    - condition / vary_on_cookie 装饰器和 LoginRequiredMixin 不支持异步视图，这里直接实现对应的逻辑
+"""
+from calendar import timegm
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404, HttpResponse
+from django.shortcuts import redirect, render, reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from jobs import cache as job_cache
+from jobs import intake
+from jobs.forms import ResumeForm
+from jobs.models import Resume
+
+arender = sync_to_async(render, thread_sensitive=True)
+
+
+async def resolve_user(request):
+    """
+    在线程中解析登录用户（会话和用户需要查询数据库），之后 request.user 可以在事件循环中直接使用
+    """
+    return await sync_to_async(lambda: request.user.is_authenticated, thread_sensitive=True)()
+
+
+async def render_cached(request, key, template_name, context):
+    """
+    同 jobs.views.render_cached，匿名用户缓存整页 HTML
+    """
+    if request.user.is_authenticated:
+        return await arender(request, template_name, context)
+    content = await job_cache.aget_page(key)
+    if content is None:
+        response = await arender(request, template_name, context)
+        await job_cache.aset_page(key, response.content)
+        return response
+    return HttpResponse(content)
+
+
+async def conditional(request, etag, last_modified, get_response):
+    """
+    同 django.views.decorators.http.condition + vary_on_cookie
+    """
+    timestamp = last_modified and timegm(last_modified.utctimetuple())
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = await get_response()
+    if request.method in ('GET', 'HEAD'):
+        if timestamp and not response.has_header('Last-Modified'):
+            response['Last-Modified'] = http_date(timestamp)
+        if etag:
+            response.setdefault('ETag', etag)
+    patch_vary_headers(response, ('Cookie', ))
+    return response
+
+
+async def joblist(request):
+    await resolve_user(request)
+    state = await job_cache.aget_board_state()
+
+    async def get_response():
+        jobs = await job_cache.aget_job_list()
+        return await render_cached(request, job_cache.JOB_LIST_PAGE_KEY, 'joblist.html', {'jobs': jobs})
+
+    etag = job_cache.make_etag(state['version'], request)
+    return await conditional(request, etag, state['last_modified'], get_response)
+
+
+async def job_detail(request, job_id):
+    await resolve_user(request)
+    job = await job_cache.aget_job(job_id)
+    if job is None:
+        raise Http404("Job does not exist")
+
+    async def get_response():
+        return await render_cached(request, job_cache.JOB_PAGE_KEY % job_id, 'job.html', {'job': job})
+
+    etag = job_cache.make_etag(job_cache.job_version(job), request)
+    return await conditional(request, etag, job['modified_date'], get_response)
+
+
+async def resume_detail(request, pk):
+    try:
+        resume = await sync_to_async(Resume.objects.get, thread_sensitive=True)(pk=pk)
+    except Resume.DoesNotExist:
+        raise Http404("Job does not exist")
+    return await arender(request, 'resume_detail.html', {'resume': resume})
+
+
+def save_resume(form, user):
+    if not form.is_valid():
+        return None
+    resume = Resume()
+    for v, k in form.cleaned_data.items():
+        setattr(resume, v, k)
+    resume.applicant = user
+    resume.save()
+    return resume
+
+
+async def resume_add(request):
+    """
+    同 jobs.views.ResumeView，需要登录
+    ASGI 服务器在调用视图之前已经读完请求体，表单校验和保存在线程中执行
+    """
+    if not await resolve_user(request):
+        return redirect_to_login(request.get_full_path())
+    if request.method == 'POST':
+        form = ResumeForm(request.POST)
+        if form.is_valid() and intake.enabled():
+            # 只写本地日志文件，不需要数据库线程
+            await sync_to_async(intake.submit, thread_sensitive=False)(form.cleaned_data, request.user)
+            await sync_to_async(messages.add_message, thread_sensitive=True)(request, messages.INFO, '简历已提交')
+        else:
+            await sync_to_async(save_resume, thread_sensitive=True)(form, request.user)
+        return redirect(reverse('jobs:joblist'))
+    form = ResumeForm()
+    for x in request.GET:
+        form.initial[x] = request.GET[x]
+    return await arender(request, 'resume_form.html', {'form': form})
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: cache
+# ========================================
+"""
+公开职位页面的缓存，职位在后台保存或删除时由 jobs.signals 精确失效
+匿名用户访问缓存整页 HTML，登录用户（页头包含用户名）只复用缓存的职位数据
+"""
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+
+from jobs.models import Job
+
+BOARD_STATE_KEY = 'jobs:board:state'
+JOB_LIST_KEY = 'jobs:board:list'
+JOB_LIST_PAGE_KEY = 'jobs:board:page:list'
+JOB_KEY = 'jobs:board:job:%s'
+JOB_PAGE_KEY = 'jobs:board:page:job:%s'
+
+# 缓存过期时间作为兜底，多进程使用 locmem 时其他进程的缓存最多延迟这么久
+CACHE_TIMEOUT = getattr(settings, 'JOB_BOARD_CACHE_TIMEOUT', 60 * 5)
+
+# 缓存中表示职位不存在
+MISSING = 'missing'
+
+
+def get_board_state():
+    """
+    职位列表的版本：最后修改时间（精确到微秒）+ 职位数 + 职位ID之和
+    删除职位的同时新增一个修改时间更早的职位时，数量和最后修改时间都不变，新职位的ID更大，ID之和会变化
+    """
+    state = cache.get(BOARD_STATE_KEY)
+    if state is None:
+        aggregate = Job.objects.aggregate(last_modified=Max('modified_date'), count=Count('id'), id_sum=Sum('id'))
+        version = '%s-%s-%s' % (aggregate['count'], aggregate['id_sum'],
+                                aggregate['last_modified'] and aggregate['last_modified'].isoformat())
+        state = {
+            'last_modified': aggregate['last_modified'],
+            'version': hashlib.md5(version.encode()).hexdigest(),
+        }
+        cache.set(BOARD_STATE_KEY, state, CACHE_TIMEOUT)
+    return state
+
+
+def get_job_list():
+    """
+    职位列表，城市和类别已经转换成显示名
+    """
+    jobs = cache.get(JOB_LIST_KEY)
+    if jobs is None:
+        jobs = [
+            {
+                'id': job.id,
+                'job_name': job.job_name,
+                'job_type': job.get_job_type_display(),
+                'job_city': job.get_job_city_display(),
+            }
+            for job in Job.objects.order_by('job_type').only('id', 'job_name', 'job_type', 'job_city')
+        ]
+        cache.set(JOB_LIST_KEY, jobs, CACHE_TIMEOUT)
+    return jobs
+
+
+def get_job(job_id):
+    """
+    单个职位的数据，不存在时返回 None
+    """
+    key = JOB_KEY % job_id
+    job = cache.get(key)
+    if job is None:
+        try:
+            obj = Job.objects.get(pk=job_id)
+        except Job.DoesNotExist:
+            job = MISSING
+        else:
+            job = {
+                'id': obj.id,
+                'job_name': obj.job_name,
+                'city_name': obj.get_job_city_display(),
+                'job_responsibility': obj.job_responsibility,
+                'job_requirement': obj.job_requirement,
+                'modified_date': obj.modified_date,
+            }
+        cache.set(key, job, CACHE_TIMEOUT)
+    return None if job == MISSING else job
+
+
+def job_version(job):
+    """
+    职位详情的版本：精确到微秒的修改时间，同一秒内的两次修改也能区分
+    """
+    return job['modified_date'].strftime('%Y%m%d%H%M%S%f')
+
+
+def get_page(key):
+    return cache.get(key)
+
+
+def set_page(key, content):
+    cache.set(key, content, CACHE_TIMEOUT)
+
+
+def make_etag(version, request):
+    """
+    登录用户的页头不同，ETag 中带上用户
+    """
+    return '"%s-%s"' % (version, request.user.pk or 'anon')
+
+
+def invalidate(job_id):
+    """
+    职位保存或删除后失效相关缓存
+    """
+    cache.delete_many([BOARD_STATE_KEY, JOB_LIST_KEY, JOB_LIST_PAGE_KEY, JOB_KEY % job_id, JOB_PAGE_KEY % job_id])
+
+
+# 异步视图使用的版本: Django 3.1 的 ORM 和缓存都只有同步接口，在 sync_to_async 的线程中执行
+# thread_sensitive=True 让所有调用共用一个线程，与同步视图使用同样的数据库连接
+aget_board_state = sync_to_async(get_board_state, thread_sensitive=True)
+aget_job_list = sync_to_async(get_job_list, thread_sensitive=True)
+aget_job = sync_to_async(get_job, thread_sensitive=True)
+aget_page = sync_to_async(get_page, thread_sensitive=True)
+aset_page = sync_to_async(set_page, thread_sensitive=True)
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: intake
+# ========================================
+"""
+招聘高峰期的简历投递缓冲（settings.RESUME_INTAKE_MODE = 'journal'）
+    - 校验通过的简历追加写入本地日志文件（每行一个 json，写入后 fsync），立即返回，不占用数据库写锁
+    - 后台 flusher 把日志文件改名后整批 bulk_create，每 RESUME_INTAKE_BATCH_SIZE 行一个事务，成功后删除文件；
+      进程中断时改名后的文件保留，下次继续写入
+    - 每份简历带幂等键 submission_key（申请人 + 简历内容的哈希），重复提交和重复写入都只会保存一份
+flusher 默认是 web 进程内的线程（RESUME_INTAKE_WORKER = 'thread'），多进程部署时改为 'command'，
+由 python manage.py flush_resume_intake 单独运行
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+
+from interview.dedup import fill_keys
+from interview.services import link_latest_resume
+from interview.signals import post_bulk_save
+from jobs.models import Resume
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover  Windows 只能在单进程中使用
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_NAME = 'resumes.journal'
+LOCK_NAME = 'resumes.lock'
+# 改名后等待写入数据库的文件
+PENDING_PATTERN = 'resumes.journal.*.pending'
+
+BATCH_SIZE = 500
+FLUSH_INTERVAL_SECONDS = 1
+# 没有新投递时也定期检查，重试之前写入失败的文件
+POLL_INTERVAL_SECONDS = 30
+
+_lock = threading.Lock()
+
+
+def get_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def intake_dir():
+    path = get_setting('RESUME_INTAKE_DIR', os.path.join(settings.BASE_DIR, 'intake'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def enabled():
+    return get_setting('RESUME_INTAKE_MODE', 'direct') == 'journal'
+
+
+class JournalLock:
+    """
+    进程内的线程锁 + 进程间的文件锁，写入和改名日志文件时持有
+    """
+
+    def __enter__(self):
+        _lock.acquire()
+        self.file = open(os.path.join(intake_dir(), LOCK_NAME), 'a')
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *args):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+        finally:
+            _lock.release()
+
+
+def submission_key(data, applicant_id):
+    raw = json.dumps([applicant_id, sorted(data.items())], cls=DjangoJSONEncoder, ensure_ascii=False)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def submit(data, applicant):
+    """
+    写入一份校验过的简历（ResumeForm.cleaned_data），返回幂等键
+    """
+    applicant_id = applicant.pk if applicant is not None else None
+    key = submission_key(data, applicant_id)
+    line = json.dumps({'key': key, 'applicant_id': applicant_id, 'data': data},
+                      cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+    with JournalLock():
+        with open(os.path.join(intake_dir(), JOURNAL_NAME), 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            if get_setting('RESUME_INTAKE_FSYNC', True):
+                os.fsync(f.fileno())
+    wake_flusher()
+    return key
+
+
+def rotate():
+    """
+    把当前日志文件改名为待写入的文件，之后的投递写入新的日志文件
+    """
+    directory = intake_dir()
+    journal = os.path.join(directory, JOURNAL_NAME)
+    with JournalLock():
+        if os.path.exists(journal) and os.path.getsize(journal):
+            os.replace(journal, os.path.join(directory, '%s.%s.pending' % (JOURNAL_NAME, time.time_ns())))
+    return sorted(glob.glob(os.path.join(directory, PENDING_PATTERN)))
+
+
+def read_journal(path):
+    """
+    读取日志文件，最后一行不完整（写入时进程中断）时跳过
+    """
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                logger.warning("skip broken line %s in %s", line_no, path)
+    return entries
+
+
+def to_resume(entry):
+    resume = Resume(applicant_id=entry['applicant_id'], submission_key=entry['key'])
+    for name, value in entry['data'].items():
+        setattr(resume, name, Resume._meta.get_field(name).to_python(value))
+    return fill_keys(resume)
+
+
+def save_batch(resumes):
+    """
+    一个事务写入一批简历，已经存在的幂等键被忽略；bulk_create 不触发 post_save，这里补上相应的处理
+    """
+    keys = [resume.submission_key for resume in resumes]
+    with transaction.atomic():
+        existing = set(Resume.objects.filter(submission_key__in=keys).values_list('submission_key', flat=True))
+        created = [resume for resume in resumes if resume.submission_key not in existing]
+        Resume.objects.bulk_create(created, ignore_conflicts=True)
+        queryset = Resume.objects.filter(submission_key__in=[resume.submission_key for resume in created])
+        for resume in queryset.only('id', 'phone_key', 'modified_date'):
+            link_latest_resume(resume)
+        post_bulk_save.send(sender=Resume, queryset=queryset, created=created)
+    return len(created)
+
+
+def flush():
+    """
+    把所有待写入的简历写入数据库，返回新写入的份数
+    """
+    batch_size = get_setting('RESUME_INTAKE_BATCH_SIZE', BATCH_SIZE)
+    saved = 0
+    for path in rotate():
+        entries = read_journal(path)
+        # 同一个文件中的重复提交只保留一份
+        resumes = list({entry['key']: to_resume(entry) for entry in entries}.values())
+        for i in range(0, len(resumes), batch_size):
+            saved += save_batch(resumes[i:i + batch_size])
+        os.remove(path)
+        logger.info("flushed %s resumes from %s", len(resumes), path)
+    return saved
+
+
+class IntakeFlusher(threading.Thread):
+    """
+    进程内的后台写入线程，有新投递时被唤醒，最多每 FLUSH_INTERVAL_SECONDS 秒写入一次，把多次投递合并成一批
+    """
+
+    def __init__(self):
+        super().__init__(name='resume-intake', daemon=True)
+        self.event = threading.Event()
+
+    def run(self):
+        while True:
+            if self.event.wait(POLL_INTERVAL_SECONDS):
+                time.sleep(get_setting('RESUME_INTAKE_FLUSH_INTERVAL', FLUSH_INTERVAL_SECONDS))
+            self.event.clear()
+            try:
+                flush()
+            except Exception:
+                logger.exception("resume intake flush failed")
+            finally:
+                close_old_connections()
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def wake_flusher():
+    global _flusher
+    if get_setting('RESUME_INTAKE_WORKER', 'thread') != 'thread':
+        return
+    with _flusher_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = IntakeFlusher()
+            _flusher.start()
+    _flusher.event.set()
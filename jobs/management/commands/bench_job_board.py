@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: bench_job_board
+# ========================================
+import json
+import socket
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from urllib.parse import urlsplit
+
+from django.core.management import BaseCommand, CommandError
+
+# run command to compare WSGI and ASGI deployments of the job board under concurrent load
+# 先分别启动两个服务，例如:
+#   gunicorn recruitment.wsgi -w 4 -b 127.0.0.1:8000
+#   uvicorn recruitment.asgi:application --workers 4 --port 8001
+# python manage.py bench_job_board --target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001 \
+#     --concurrency 200 --duration 30 --slow-clients 50
+
+# 压测的页面，job/<id>/ 使用 --job-id
+PATHS = ('/joblist/', '/job/%s/')
+
+
+def percentile(values, p):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class SlowClient(threading.Thread):
+    """
+    模拟网速很慢的投递简历请求：发送请求头后，在 seconds 秒内逐字节发送请求体
+    同步部署中每个慢速请求占用一个 worker，异步部署中只占用一个连接
+    """
+
+    def __init__(self, host, port, seconds, stop):
+        super().__init__(daemon=True)
+        self.host, self.port, self.seconds, self.stop = host, port, seconds, stop
+
+    def run(self):
+        body = b'username=' + b'x' * 200
+        while not self.stop.is_set():
+            try:
+                with socket.create_connection((self.host, self.port), timeout=self.seconds + 10) as sock:
+                    sock.sendall((
+                        'POST /resume/add/ HTTP/1.1\r\nHost: %s\r\n'
+                        'Content-Type: application/x-www-form-urlencoded\r\nContent-Length: %s\r\n\r\n'
+                        % (self.host, len(body))).encode())
+                    interval = self.seconds / len(body)
+                    for i in range(len(body)):
+                        if self.stop.is_set():
+                            return
+                        sock.sendall(body[i:i + 1])
+                        time.sleep(interval)
+                    sock.recv(1024)
+            except OSError:
+                time.sleep(0.1)
+
+
+class Command(BaseCommand):
+    help = '对运行中的 WSGI / ASGI 服务压测职位列表和职位详情页，比较并发连接下的吞吐量和延迟'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True, help='名称=地址，可以重复，例如 asgi=http://127.0.0.1:8001')
+        parser.add_argument('--concurrency', type=int, default=100, help='并发连接数')
+        parser.add_argument('--duration', type=float, default=30, help='每个服务的压测时长（秒）')
+        parser.add_argument('--job-id', type=int, default=1)
+        parser.add_argument('--slow-clients', type=int, default=0, help='同时模拟的慢速投递简历连接数')
+        parser.add_argument('--slow-seconds', type=float, default=20, help='慢速请求发送请求体的时长')
+        parser.add_argument('--output', help='结果写入 json 文件')
+
+    def handle(self, *args, **kwargs):
+        results = []
+        for target in kwargs['target']:
+            name, _, url = target.partition('=')
+            if not url:
+                raise CommandError('--target 的格式为 名称=地址: %s' % target)
+            result = self.run_target(name, url, kwargs)
+            results.append(result)
+            self.stdout.write('%(name)s: %(requests)s 请求, %(rps).1f 请求/秒, 错误 %(errors)s, '
+                              'p50 %(p50_ms).1fms, p95 %(p95_ms).1fms, p99 %(p99_ms).1fms' % result)
+        if kwargs['output']:
+            with open(kwargs['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS('结果已写入 %s' % kwargs['output']))
+
+    def run_target(self, name, url, options):
+        parts = urlsplit(url)
+        host, port = parts.hostname, parts.port or 80
+        paths = [path % options['job_id'] if '%s' in path else path for path in PATHS]
+        deadline = time.monotonic() + options['duration']
+        stop = threading.Event()
+        slow_clients = [SlowClient(host, port, options['slow_seconds'], stop) for _ in range(options['slow_clients'])]
+        for client in slow_clients:
+            client.start()
+
+        def worker(index):
+            """
+            每个并发连接保持长连接，循环请求直到压测结束
+            """
+            latencies, errors = [], 0
+            connection = HTTPConnection(host, port, timeout=30)
+            i = index
+            while time.monotonic() < deadline:
+                path = paths[i % len(paths)]
+                i += 1
+                started = time.perf_counter()
+                try:
+                    connection.request('GET', path)
+                    response = connection.getresponse()
+                    response.read()
+                    if response.status >= 500:
+                        errors += 1
+                    else:
+                        latencies.append(time.perf_counter() - started)
+                except (OSError, ValueError):
+                    errors += 1
+                    connection.close()
+                    connection = HTTPConnection(host, port, timeout=30)
+            connection.close()
+            return latencies, errors
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            outcomes = list(executor.map(worker, range(options['concurrency'])))
+        elapsed = time.monotonic() - started
+        stop.set()
+
+        latencies = [latency * 1000 for values, _ in outcomes for latency in values]
+        return {
+            'name': name,
+            'url': url,
+            'concurrency': options['concurrency'],
+            'slow_clients': options['slow_clients'],
+            'requests': len(latencies),
+            'errors': sum(errors for _, errors in outcomes),
+            'rps': len(latencies) / elapsed if elapsed else 0,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'mean_ms': statistics.mean(latencies) if latencies else 0,
+        }
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: flush_resume_intake
+# ========================================
+import time
+
+from django.core.management import BaseCommand
+
+from jobs import intake
+
+# run command to write buffered resume submissions into the database
+# 多进程部署时设置 RESUME_INTAKE_WORKER = 'command'，由该命令单独写入
+# python manage.py flush_resume_intake              # 常驻，轮询写入
+# python manage.py flush_resume_intake --once       # 写入一次后退出
+
+
+class Command(BaseCommand):
+    help = '把缓冲投递（RESUME_INTAKE_MODE = journal）中的简历批量写入数据库'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='写入一次后退出')
+        parser.add_argument('--interval', type=float, default=1, help='轮询间隔（秒）')
+
+    def handle(self, *args, **kwargs):
+        while True:
+            started = time.monotonic()
+            saved = intake.flush()
+            if saved:
+                self.stdout.write('已写入 %s 份简历, 耗时 %.2fs' % (saved, time.monotonic() - started))
+            if kwargs['once']:
+                return
+            time.sleep(kwargs['interval'])
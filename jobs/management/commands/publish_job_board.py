@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: publish_job_board
+# ========================================
+import time
+
+from django.core.management import BaseCommand
+
+from jobs import publish
+
+# run command to render the public job board to static files for nginx
+# python manage.py publish_job_board
+
+
+class Command(BaseCommand):
+    help = '全量生成职位列表和职位详情的静态页面（含 gzip / brotli 预压缩文件），并清理已删除的职位'
+
+    def handle(self, *args, **kwargs):
+        started = time.monotonic()
+        jobs, files = publish.publish_all()
+        self.stdout.write(self.style.SUCCESS('已生成 %s 个职位, %s 个文件到 %s, 耗时 %.2fs' % (
+            jobs, files, publish.publish_root(), time.monotonic() - started)))
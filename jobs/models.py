@@ -71,9 +71,24 @@ class Resume(models.Model):
     work_experience = models.TextField(max_length=1024, blank=True, verbose_name=u'工作经历')
     project_experience = models.TextField(max_length=1024, blank=True, verbose_name=u'项目经历')
 
+    # 去重字段，由 interview.dedup.fill_keys 计算
+    phone_key = models.CharField(max_length=32, blank=True, editable=False, verbose_name=u'规范化手机号')
+    email_key = models.CharField(max_length=135, blank=True, editable=False, db_index=True, verbose_name=u'规范化邮箱')
+    block_key = models.CharField(max_length=300, blank=True, editable=False, db_index=True, verbose_name=u'姓名学校分块')
+
+    # 缓冲投递的幂等键，见 jobs.intake，直接保存的简历为空
+    submission_key = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False,
+                                      verbose_name=u'投递幂等键')
+
     class Meta:
         verbose_name = _('简历')
         verbose_name_plural = _('简历列表')
+        indexes = [
+            # 按规范化手机号查找最新简历（backfill_resumes、接口的手机号筛选），手机号格式不同（空格、+86）也能对应
+            models.Index(fields=['phone_key', '-modified_date'], name='resume_phonekey_modified_idx'),
+            # 接口增量同步按修改时间过滤和翻页
+            models.Index(fields=['modified_date', 'id'], name='resume_modified_idx'),
+        ]
 
     def __str__(self):
         return f"{self.username}"
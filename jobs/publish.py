@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: publish
+# ========================================
+"""
+把公开的职位页面生成静态 HTML，由 nginx 直接提供（配置示例见 README），招聘高峰期匿名访问不经过 Python
+    JOB_BOARD_PUBLISH_ROOT/index.html                 首页
+    JOB_BOARD_PUBLISH_ROOT/joblist/index.html         职位列表
+    JOB_BOARD_PUBLISH_ROOT/job/<id>/index.html        职位详情
+每个页面同时生成 .gz（以及安装了 brotli 时的 .br）预压缩文件，所有文件先写临时文件再改名，nginx 不会读到写了一半的文件
+JOB_BOARD_PUBLISH = True 时，职位保存或删除后由 jobs.signals 只重新生成该职位和列表页；
+python manage.py publish_job_board 全量重新生成并清理已删除的职位
+页面按匿名用户渲染，与 jobs.views 缓存的匿名页面相同
+"""
+import gzip
+import logging
+import os
+import shutil
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from jobs import cache as job_cache
+from jobs.models import Job
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = 'index.html'
+
+
+def enabled():
+    return getattr(settings, 'JOB_BOARD_PUBLISH', False)
+
+
+def publish_root():
+    return getattr(settings, 'JOB_BOARD_PUBLISH_ROOT', os.path.join(settings.BASE_DIR, 'public'))
+
+
+def atomic_write(path, content):
+    tmp_path = '%s.tmp.%s' % (path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def write_page(relative_dir, html):
+    """
+    写入一个页面和它的预压缩文件，返回写入的文件数
+    """
+    directory = os.path.join(publish_root(), relative_dir)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, INDEX_NAME)
+    content = html.encode('utf-8')
+    # 先写压缩文件再写 html，nginx 的 gzip_static / brotli_static 总能找到对应的 html
+    atomic_write(path + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+    count = 2
+    if brotli is not None:
+        atomic_write(path + '.br', brotli.compress(content))
+        count += 1
+    atomic_write(path, content)
+    return count
+
+
+def publish_list():
+    html = render_to_string('joblist.html', {'jobs': job_cache.get_job_list()})
+    return write_page('', html) + write_page('joblist', html)
+
+
+def job_dir(job_id):
+    return os.path.join('job', str(job_id))
+
+
+def publish_job(job_id):
+    """
+    重新生成一个职位的详情页和列表页，职位已删除时删除详情页
+    """
+    job = job_cache.get_job(job_id)
+    count = 0
+    if job is None:
+        shutil.rmtree(os.path.join(publish_root(), job_dir(job_id)), ignore_errors=True)
+    else:
+        count += write_page(job_dir(job_id), render_to_string('job.html', {'job': job}))
+    return count + publish_list()
+
+
+def publish_all():
+    """
+    全量生成，并删除已经不存在的职位页面，返回 (职位数, 写入的文件数)
+    """
+    job_ids = list(Job.objects.values_list('id', flat=True))
+    count = publish_list()
+    for job_id in job_ids:
+        count += write_page(job_dir(job_id), render_to_string('job.html', {'job': job_cache.get_job(job_id)}))
+    jobs_root = os.path.join(publish_root(), 'job')
+    existing = set(os.listdir(jobs_root)) if os.path.isdir(jobs_root) else set()
+    for name in existing - {str(job_id) for job_id in job_ids}:
+        shutil.rmtree(os.path.join(jobs_root, name), ignore_errors=True)
+    return len(job_ids), count
+
+
+def job_changed(job_id):
+    """
+    jobs.signals 在事务提交后调用，生成失败不影响后台保存职位
+    """
+    if not enabled():
+        return
+    try:
+        publish_job(job_id)
+    except Exception:
+        logger.exception("failed to publish job %s", job_id)
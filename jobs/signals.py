@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: signals
+# ========================================
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from jobs import cache, publish
+from jobs.models import Job
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def job_changed(sender, instance, **kwargs):
+    """
+    职位保存或删除，事务提交后失效职位页面缓存，重新生成静态页面
+    """
+    job_id = instance.pk
+
+    def refresh():
+        cache.invalidate(job_id)
+        publish.job_changed(job_id)
+
+    transaction.on_commit(refresh)
@@ -1,3 +1,223 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.admin import site
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs import async_views, intake
+from jobs import cache as job_cache
+from jobs.models import Job, Resume
+
+
+class ResumeModifiedDateTest(TestCase):
+    """
+    管理后台修改简历后更新修改时间，接口增量同步能取到修改过的简历
+    """
+
+    def test_admin_edit_bumps_modified_date(self):
+        hr = User.objects.create_superuser('hr', 'hr@example.com', 'password')
+        resume = Resume.objects.create(username='候选人', city='北京', phone='13800000000',
+                                       modified_date=timezone.now() - timedelta(days=30))
+        since = timezone.now() - timedelta(minutes=1)
+
+        request = RequestFactory().post('/')
+        request.user = hr
+        resume.work_experience = '新的工作经历'
+        site._registry[Resume].save_model(request, resume, None, True)
+
+        self.client.force_login(hr)
+        response = self.client.get(reverse('interview:resume-list'), {'modified_since': since.isoformat()})
+        self.assertEqual([row['id'] for row in response.json()['results']], [resume.pk])
+
+
+class ResumeIntakeTest(TestCase):
+    """
+    缓冲投递的简历由 flush_resume_intake 写入，重复提交和重复写入同一个日志文件都只保存一份
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(RESUME_INTAKE_MODE='journal', RESUME_INTAKE_WORKER='command',
+                                     RESUME_INTAKE_DIR=directory.name, RESUME_INTAKE_FSYNC=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.directory = directory.name
+        self.client.force_login(User.objects.create_user('applicant'))
+
+    def submit(self, phone='13800000000'):
+        self.client.post(reverse('jobs:resume_add'), {
+            'username': '候选人', 'city': '北京', 'phone': phone, 'created_date': '2026-10-18 10:00:00',
+            'modified_date': '2026-10-18 10:00:00',
+        })
+
+    def test_duplicate_submission(self):
+        self.submit()
+        self.submit()
+        self.submit(phone='13900000000')
+        self.assertFalse(Resume.objects.exists())
+        call_command('flush_resume_intake', once=True, stdout=StringIO())
+        self.assertEqual(sorted(Resume.objects.values_list('phone', flat=True)), ['13800000000', '13900000000'])
+
+        # 写入数据库后又提交了一次
+        self.submit()
+        self.assertEqual(intake.flush(), 0)
+        self.assertEqual(Resume.objects.count(), 2)
+
+    def test_replay_pending_file(self):
+        self.submit()
+        pending = intake.rotate()[0]
+        with open(pending, encoding='utf-8') as f:
+            journal = f.read()
+        self.assertEqual(intake.flush(), 1)
+        # 写入数据库后、删除文件前进程中断，下次启动时同一个文件再写入一次
+        with open(pending, 'w', encoding='utf-8') as f:
+            f.write(journal + '{"key": "broken')
+        self.assertEqual(intake.flush(), 0)
+        self.assertEqual(Resume.objects.count(), 1)
+        self.assertEqual(intake.rotate(), [])
+
+
+class JobBoardConditionalGetTest(TransactionTestCase):
+    """
+    职位页面带 ETag，未变化时返回 304；职位保存后（事务提交时失效缓存）ETag 变化
+    TransactionTestCase 才会执行 transaction.on_commit 中的缓存失效
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.job = Job.objects.create(job_type=0, job_name='后端工程师', job_city=0, job_responsibility='开发',
+                                      job_requirement='Python', modified_date=timezone.now() - timedelta(days=1))
+
+    def assert_not_modified(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        return response['ETag']
+
+    def test_job_list(self):
+        url = reverse('jobs:joblist')
+        etag = self.assert_not_modified(url)
+        self.job.job_name = '高级后端工程师'
+        self.job.modified_date = timezone.now()
+        self.job.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '高级后端工程师')
+        self.assertNotEqual(response['ETag'], etag)
+
+        # 新增后又删除的职位不改变列表，仍然返回 304；修改时间更早的新职位只改变职位数，版本也会变化
+        etag = response['ETag']
+        Job.objects.create(job_type=1, job_name='产品经理', job_city=1, job_responsibility='需求',
+                           job_requirement='沟通', modified_date=timezone.now() - timedelta(days=2)).delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        older = Job.objects.create(job_type=1, job_name='产品经理', job_city=1, job_responsibility='需求',
+                                   job_requirement='沟通', modified_date=timezone.now() - timedelta(days=2))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        # 删除一个职位的同时新增一个修改时间更早的职位，职位数和最后修改时间都不变，版本仍然变化
+        etag = response['ETag']
+        older.delete()
+        Job.objects.create(job_type=1, job_name='测试工程师', job_city=1, job_responsibility='测试',
+                           job_requirement='细心', modified_date=timezone.now() - timedelta(days=3))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '测试工程师')
+
+    def test_job_detail(self):
+        url = reverse('jobs:job_detail', args=(self.job.pk, ))
+        anonymous = self.assert_not_modified(url)
+        self.client.force_login(User.objects.create_user('applicant'))
+        # 登录用户的页头不同，不能使用匿名用户的 ETag
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=anonymous).status_code, 200)
+        self.assert_not_modified(url)
+        self.assertEqual(self.client.get(reverse('jobs:job_detail', args=(self.job.pk + 1, ))).status_code, 404)
+
+    def test_job_detail_changes_within_a_second(self):
+        url = reverse('jobs:job_detail', args=(self.job.pk, ))
+        etag = self.assert_not_modified(url)
+        self.job.job_requirement = 'Python, Django'
+        self.job.modified_date += timedelta(microseconds=1)
+        self.job.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Python, Django')
+
+
+class AsyncJobViewsTest(TransactionTestCase):
+    """
+    ASGI 部署使用的异步视图与同步视图行为相同：条件请求、匿名用户整页缓存、登录跳转、缓冲投递和直接保存
+    URL 在导入时按 JOBS_ASYNC_VIEWS 选择视图，这里直接调用视图函数
+    视图中的数据库调用在 sync_to_async 的线程中执行，使用另一个连接，TransactionTestCase 不把测试包在事务里
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.job = Job.objects.create(job_type=0, job_name='后端工程师', job_city=0, job_responsibility='开发',
+                                      job_requirement='Python', modified_date=timezone.now() - timedelta(days=1))
+        self.applicant = User.objects.create_user('applicant')
+
+    def call(self, view, *args, method='get', user=None, data=None, **headers):
+        factory = getattr(RequestFactory(), method)
+        request = factory('/', data, **headers) if data is not None else factory('/', **headers)
+        request.user = user or AnonymousUser()
+        request._messages = CookieStorage(request)
+        return request, async_to_sync(view)(request, *args)
+
+    def test_not_modified(self):
+        for view, args in ((async_views.joblist, ()), (async_views.job_detail, (self.job.pk, ))):
+            _, response = self.call(view, *args)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Cookie', response['Vary'])
+            _, response = self.call(view, *args, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+            # 登录用户的页头不同，不能使用匿名用户的 ETag
+            _, logged_in = self.call(view, *args, user=self.applicant, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(logged_in.status_code, 200)
+
+    def test_anonymous_page_cache(self):
+        self.call(async_views.joblist)
+        self.assertIsNotNone(job_cache.get_page(job_cache.JOB_LIST_PAGE_KEY))
+        job_cache.set_page(job_cache.JOB_LIST_PAGE_KEY, b'cached page')
+        _, response = self.call(async_views.joblist)
+        self.assertEqual(response.content, b'cached page')
+        _, response = self.call(async_views.joblist, user=self.applicant)
+        self.assertContains(response, '后端工程师')
+
+    def test_resume_add_requires_login(self):
+        _, response = self.call(async_views.resume_add)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith(settings.LOGIN_URL))
+
+    def post_resume(self):
+        return self.call(async_views.resume_add, method='post', user=self.applicant, data={
+            'username': '候选人', 'city': '北京', 'phone': '13800000000', 'created_date': '2026-10-18 10:00:00',
+            'modified_date': '2026-10-18 10:00:00',
+        })
+
+    def test_direct_post(self):
+        _, response = self.post_resume()
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Resume.objects.get().applicant, self.applicant)
+
+    def test_journal_post(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with override_settings(RESUME_INTAKE_MODE='journal', RESUME_INTAKE_WORKER='command',
+                               RESUME_INTAKE_DIR=directory.name, RESUME_INTAKE_FSYNC=False):
+            request, response = self.post_resume()
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual([str(message) for message in request._messages], ['简历已提交'])
+            self.assertFalse(Resume.objects.exists())
+            self.assertEqual(intake.flush(), 1)
+        self.assertEqual(Resume.objects.get().applicant, self.applicant)
@@ -5,17 +5,26 @@
 # FILE: urls
 # ========================================
 
+from django.conf import settings
 from django.conf.urls import url
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'jobs'
 
+# ASGI 部署时使用异步视图，见 settings/asgi.py
+if getattr(settings, 'JOBS_ASYNC_VIEWS', False):
+    public_views = async_views
+    resume_add = async_views.resume_add
+else:
+    public_views = views
+    resume_add = views.ResumeView.as_view()
+
 urlpatterns = [
     # 首页自动跳转到 职位列表
-    url(r"^$", views.joblist, name="index"),
-    url(r"^joblist/", views.joblist, name="joblist"),
-    url(r'^job/(?P<job_id>\d+)/$', views.job_detail, name='job_detail'),
-    path('resume/add/', views.ResumeView.as_view(), name='resume_add'),
-    path('resume/<int:pk>/', views.resume_detail, name='resume_detail'),
+    url(r"^$", public_views.joblist, name="index"),
+    url(r"^joblist/", public_views.joblist, name="joblist"),
+    url(r'^job/(?P<job_id>\d+)/$', public_views.job_detail, name='job_detail'),
+    path('resume/add/', resume_add, name='resume_add'),
+    path('resume/<int:pk>/', public_views.resume_detail, name='resume_detail'),
 ]
\ No newline at end of file
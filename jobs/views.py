@@ -1,27 +1,63 @@
 from django.views import View
-from django.http import Http404
+from django.http import Http404, HttpResponse
 from django.shortcuts import render, redirect, reverse
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
 
-from jobs.models import Job, Resume
+from jobs import cache as job_cache
+from jobs import intake
+from jobs.models import Resume
 from jobs.forms import ResumeForm
 
 
+def joblist_etag(request):
+    return job_cache.make_etag(job_cache.get_board_state()['version'], request)
+
+
+def joblist_last_modified(request):
+    return job_cache.get_board_state()['last_modified']
+
+
+def job_detail_etag(request, job_id):
+    job = job_cache.get_job(job_id)
+    return job and job_cache.make_etag(job_cache.job_version(job), request)
+
+
+def job_detail_last_modified(request, job_id):
+    job = job_cache.get_job(job_id)
+    return job and job['modified_date']
+
+
+def render_cached(request, key, template_name, context):
+    """
+    匿名用户的页面相同，缓存整页 HTML；登录用户页头带用户名，只使用缓存的数据渲染
+    """
+    if request.user.is_authenticated:
+        return render(request, template_name, context)
+    content = job_cache.get_page(key)
+    if content is None:
+        response = render(request, template_name, context)
+        job_cache.set_page(key, response.content)
+        return response
+    return HttpResponse(content)
+
+
+@vary_on_cookie
+@condition(etag_func=joblist_etag, last_modified_func=joblist_last_modified)
 def joblist(request):
-    jobs = Job.objects.order_by('job_type')
-    for job in jobs:
-        job.job_city = job.get_job_city_display()
-        job.job_type = job.get_job_type_display()
-    return render(request, 'joblist.html', locals())
+    jobs = job_cache.get_job_list()
+    return render_cached(request, job_cache.JOB_LIST_PAGE_KEY, 'joblist.html', {'jobs': jobs})
 
 
+@vary_on_cookie
+@condition(etag_func=job_detail_etag, last_modified_func=job_detail_last_modified)
 def job_detail(request, job_id):
-    try:
-        job = Job.objects.get(pk=job_id)
-        job.city_name = job.get_job_city_display()
-    except Job.DoesNotExist:
+    job = job_cache.get_job(job_id)
+    if job is None:
         raise Http404("Job does not exist")
-    return render(request, 'job.html', locals())
+    return render_cached(request, job_cache.JOB_PAGE_KEY % job_id, 'job.html', {'job': job})
 
 
 def resume_detail(request, pk):
@@ -44,7 +80,11 @@ class ResumeView(LoginRequiredMixin, View):
 
     def post(self, request):
         form = ResumeForm(request.POST)
-        if form.is_valid():
+        if form.is_valid() and intake.enabled():
+            # 高峰期先写入本地日志，由后台批量写入数据库
+            intake.submit(form.cleaned_data, request.user)
+            messages.add_message(request, messages.INFO, '简历已提交')
+        elif form.is_valid():
             resume = Resume()
             for v, k in form.cleaned_data.items():
                 setattr(resume, v, k)
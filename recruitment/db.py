@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: db
+# ========================================
+"""
+数据库调优和读写分离
+    - SQLite 连接建立时执行 settings.SQLITE_PRAGMAS（WAL、synchronous、cache_size、mmap_size、busy_timeout），参数只在 settings 中配置
+    - PrimaryReplicaRouter: 写入总是使用 default（主库）；请求被 ReplicaRoutingMiddleware 标记为只读时，
+      读取使用 settings.DATABASE_REPLICAS 中的从库
+    - 主库的事务中（transaction.atomic）的读取总是使用主库
+    - 读己之写：请求中发生过写入后，本请求剩余的读取回到主库，并通过 cookie 让之后 REPLICA_STICKY_SECONDS 秒内
+      该用户的请求都读主库，避免从库延迟导致看不到刚保存的数据
+本地使用两个 SQLite 文件模拟主从，见 settings/replica.py 和 python manage.py sync_replica
+"""
+import random
+from contextlib import contextmanager
+
+from asgiref.local import Local
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.deprecation import MiddlewareMixin
+
+STICKY_COOKIE = 'db_primary'
+
+# 当前请求的路由状态，asgiref 的 Local 在 sync_to_async / async_to_sync 之间共享
+_state = Local()
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute('PRAGMA %s = %s' % (name, value))
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+@contextmanager
+def replica_reads():
+    """
+    代码块中的读取使用从库，例如后台导出
+    """
+    previous = getattr(_state, 'use_replica', False)
+    _state.use_replica = True
+    try:
+        yield
+    finally:
+        _state.use_replica = previous
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        # 主库上有未提交的事务时，事务中的读取（例如先读后写、select_for_update）必须在同一个连接上
+        if (getattr(_state, 'use_replica', False) and not getattr(_state, 'wrote', False) and replicas()
+                and not connections['default'].in_atomic_block
+                and model._meta.app_label not in getattr(settings, 'REPLICA_EXCLUDED_APPS', ())):
+            return random.choice(replicas())
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 从库是主库的副本，跨库的关联也是同一份数据
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # 从库由 sync_replica 从主库复制，不单独迁移
+        return db == 'default'
+
+
+def is_replica_request(request, view_name):
+    if request.COOKIES.get(STICKY_COOKIE):
+        return False
+    if request.method in ('GET', 'HEAD'):
+        return view_name in getattr(settings, 'REPLICA_VIEW_NAMES', ())
+    # 导出等只读的管理后台动作
+    return (request.method == 'POST' and view_name in getattr(settings, 'REPLICA_VIEW_NAMES', ())
+            and request.POST.get('action') in getattr(settings, 'REPLICA_ADMIN_ACTIONS', ()))
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    按 url 名称把只读的请求路由到从库，写入后设置读主库的 cookie
+    """
+
+    def process_request(self, request):
+        _state.use_replica = False
+        _state.wrote = False
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _state.use_replica = is_replica_request(request, request.resolver_match.view_name)
+
+    def process_response(self, request, response):
+        # GET 请求中 Django 也会为 admin 详情页的事务调用 db_for_write，只有修改类的请求才设置 cookie
+        if getattr(_state, 'wrote', False) and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            response.set_cookie(STICKY_COOKIE, '1', max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', 10),
+                                httponly=True, samesite='Lax')
+        _state.use_replica = False
+        _state.wrote = False
+        return response
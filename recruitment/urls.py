@@ -22,6 +22,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     url(r"^", include("jobs.urls")),
     path('grappelli/', include('grappelli.urls')),
+    path('api/', include('interview.urls')),
     url(r'^accounts/', include('registration.backends.simple.urls')),
 ]
 
@@ -11,6 +11,11 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'recruitment.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings.production')
 
 application = get_wsgi_application()
+
+# web 进程内的钉钉发件箱投递线程，DINGTALK_OUTBOX_WORKER 不是 thread 时不启动，见 interview.outbox
+from interview.outbox import start_worker  # noqa: E402
+
+start_worker()
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: asgi
+# ========================================
+"""
+ASGI 部署（uvicorn）使用的配置，recruitment/asgi.py 默认使用该配置:
+    uvicorn recruitment.asgi:application --host 127.0.0.1 --port 8001 --workers 4
+职位页面和投递简历使用异步视图，其他页面（管理后台等）仍然是同步视图，由 Django 放到线程中执行
+"""
+from .production import *
+
+JOBS_ASYNC_VIEWS = True
@@ -43,9 +43,32 @@ INSTALLED_APPS = [
     'interview',
     'dingtalkchatbot',
     'registration',
-    'bootstrap4'
+    'bootstrap4',
+    'rest_framework',
+    'django_filters',
 ]
 
+# 只读同步接口，见 interview/api.py
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+}
+
+# 性能日志，由 interview.performance.PerformanceMiddleware 写入，python manage.py performance_summary 汇总
+PERFORMANCE_LOG_FILE = os.path.join(BASE_DIR, 'recruitment.performance.log')
+# 超过该耗时（毫秒）的请求标记为慢请求
+PERFORMANCE_SLOW_REQUEST_MS = 500
+# 性能日志的级别: INFO 记录所有请求，performance_summary 才能统计 p50/p95；改为 WARNING 只记录慢请求
+PERFORMANCE_LOG_LEVEL = os.environ.get('PERFORMANCE_LOG_LEVEL', 'INFO')
+# 非慢请求的抽样率（0~1），请求量大时调低，慢请求总是记录
+PERFORMANCE_SAMPLE_RATE = float(os.environ.get('PERFORMANCE_SAMPLE_RATE', '1.0'))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -59,6 +82,12 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
+        # 控制台只输出慢请求，所有请求写入性能日志文件
+        'performance_console': {
+            'level': 'WARNING',
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
 
         'mail_admins': {  # Add Handler for mail_admins for `warning` and above
             'level': 'ERROR',
@@ -71,11 +100,15 @@ LOGGING = {
             'filename': os.path.join(BASE_DIR, 'recruitment.admin.log'),
         },
 
+        # 按大小滚动，保留 5 个历史文件
         'performance': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'logging.handlers.RotatingFileHandler',
             'formatter': 'simple',
-            'filename': os.path.join(BASE_DIR, 'recruitment.performance.log'),
+            'filename': PERFORMANCE_LOG_FILE,
+            'maxBytes': 50 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
         },
     },
 
@@ -91,14 +124,15 @@ LOGGING = {
         },
 
         "interview.performance": {
-            "handlers": ["console", "performance"],
-            "level": "INFO",
+            "handlers": ["performance_console", "performance"],
+            "level": PERFORMANCE_LOG_LEVEL,
             "propagate": False,
         },
     },
 }
 
 MIDDLEWARE = [
+    'interview.performance.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -136,9 +170,53 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # 持久连接，避免每个请求重新连接和重新执行 SQLITE_PRAGMAS
+        'CONN_MAX_AGE': 60,
+    }
+}
+
+# SQLite 连接建立时执行的 PRAGMA，见 recruitment.db:
+# WAL 允许读写并发，synchronous=NORMAL 在 WAL 下只在 checkpoint 时 fsync，busy_timeout 让写锁冲突时等待而不是立即报错
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # 负数表示 KiB，即 64MB
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+# 本地使用进程内缓存，生产环境见 settings/production.py 的 django-redis 配置
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'recruitment',
     }
 }
 
+# 角色、面试官列表的跨请求缓存: None 表示按上面的缓存后端自动判断，进程内缓存（locmem）无法被其他进程失效，自动关闭；
+# 单进程部署可以设置为 True 强制打开
+RECRUITMENT_CROSS_REQUEST_CACHE = None
+
+# 候选人列表使用游标分页，翻到后面的页面不再变慢，总数最多数到 1 万行，需要时点击精确计数
+CANDIDATE_KEYSET_PAGINATION = True
+
+# 职位页面缓存的过期时间（秒），职位修改时会主动失效
+JOB_BOARD_CACHE_TIMEOUT = 60 * 5
+# 职位页面静态化（jobs.publish），打开后职位保存或删除时增量生成，全量生成: python manage.py publish_job_board
+JOB_BOARD_PUBLISH = False
+JOB_BOARD_PUBLISH_ROOT = os.path.join(BASE_DIR, 'public')
+
+# 简历投递方式: direct 直接保存; journal 先写入 RESUME_INTAKE_DIR 下的日志文件，由后台批量写入数据库，见 jobs.intake
+# RESUME_INTAKE_WORKER: thread 进程内线程写入; command 由 python manage.py flush_resume_intake 写入（多进程部署）
+RESUME_INTAKE_MODE = 'direct'
+RESUME_INTAKE_WORKER = 'thread'
+RESUME_INTAKE_DIR = os.path.join(BASE_DIR, 'intake')
+RESUME_INTAKE_BATCH_SIZE = 500
+# 职位页面和投递简历使用异步视图（jobs.async_views），只在 ASGI 部署时打开，见 settings/asgi.py
+JOBS_ASYNC_VIEWS = False
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -184,6 +262,31 @@ STATICFILES_DIRS = [
 GRAPPELLI_ADMIN_TITLE = '浆果科技招聘后台管理'
 
 DINGTALK_WEB_HOOK = ''
+# 钉钉通知发件箱: worker 类型(thread/celery)，每分钟发送上限，最大尝试次数
+# 测试时可以把 DINGTALK_WEB_HOOK 指向本地的桩服务
+DINGTALK_OUTBOX_WORKER = 'thread'
+DINGTALK_RATE_LIMIT_PER_MINUTE = 20
+DINGTALK_MAX_ATTEMPTS = 6
+
+# 自动分配面试官时，每个面试官同时负责的、还没有面试结果的候选人上限
+INTERVIEWER_OPEN_LOAD_CAP = 20
+
+# 候选人综合得分的权重，见 interview.ranking；default 为默认权重，其他键为应聘职位，只需要写与默认不同的分数
+# 修改后执行 python manage.py recompute_composite_scores 重算
+CANDIDATE_COMPOSITE_WEIGHTS = {
+    'default': {'test_score_of_general_ability': 1, 'paper_score': 1, 'first_score': 2, 'second_score': 3},
+}
+
+# 重复候选人的相似度阈值，见 interview.dedup
+DEDUP_MIN_SCORE = 0.45
+
+# 候选人后台导出（python manage.py export_candidates / 管理后台导出任务）的输出目录
+EXPORT_ROOT = os.path.join(BASE_DIR, 'exports')
+# 导出的结束水位线比开始时间提前的秒数，需要长于最长的写事务，见 interview.exports
+EXPORT_WATERMARK_LAG_SECONDS = 300
+
+# 管理后台面试打分分析报表的缓存时间（秒），见 interview.analytics
+ANALYTICS_CACHE_TIMEOUT = 300
 
 ACCOUNT_ACTIVATION_DAYS = 7
 
@@ -13,6 +13,18 @@ DEBUG = False
 
 ALLOWED_HOSTS = ["127.0.0.1"]
 
+# 多进程部署时使用 redis 共享缓存，职位页面缓存的失效才能对所有进程生效
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        }
+    }
+
 INSTALLED_APPS += (
     # other apps for production site
 )
\ No newline at end of file
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# ========================================
+# Author: wjh
+# Date：2026/10/18
+# FILE: replica
+# ========================================
+"""
+读写分离配置，本地用两个 SQLite 文件模拟主库和从库:
+    python manage.py migrate --settings=settings.replica
+    python manage.py sync_replica --settings=settings.replica --interval 5     # 持续把主库复制到从库
+    python manage.py runserver --settings=settings.replica
+职位页面、管理后台列表页和导出读从库，其他请求和所有写入使用主库，见 recruitment.db
+生产环境把 replica 换成真实的只读从库连接即可
+"""
+from .base import *
+
+DATABASES['replica'] = dict(
+    DATABASES['default'],
+    NAME=BASE_DIR / 'db.replica.sqlite3',
+    # 测试时从库与主库使用同一个测试库
+    TEST={'MIRROR': 'default'},
+)
+
+DATABASE_ROUTERS = ['recruitment.db.PrimaryReplicaRouter']
+DATABASE_REPLICAS = ['replica']
+
+# 会话总是读主库，刚登录的用户不会因为从库延迟被当成未登录
+REPLICA_EXCLUDED_APPS = ('sessions', )
+
+# 读从库的页面（url 名称）
+REPLICA_VIEW_NAMES = (
+    'jobs:index',
+    'jobs:joblist',
+    'jobs:job_detail',
+    'admin:interview_candidate_changelist',
+    'admin:interview_candidate_analytics',
+    'admin:interview_candidate_shortlist',
+    'admin:jobs_resume_changelist',
+    'admin:jobs_job_changelist',
+)
+# 在列表页 POST 提交的只读动作
+REPLICA_ADMIN_ACTIONS = ('export_model_as_csv', )
+
+# 写入之后多少秒内该用户的请求都读主库，应大于 sync_replica 的复制间隔
+REPLICA_STICKY_SECONDS = 10
+
+MIDDLEWARE = MIDDLEWARE + ['recruitment.db.ReplicaRoutingMiddleware']